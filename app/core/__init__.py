@@ -1,3 +1,11 @@
 # app/core/
 
-from app.core.winmerge_comparator import WinMergeLikeComparator
\ No newline at end of file
+from app.core.winmerge_comparator import WinMergeLikeComparator
+from app.core.batch_comparator import BatchComparator
+from app.core.catalog_stream import merge_join, prefetch
+from app.core.diff_engines import intraline_changes
+from app.core.html_report import HtmlReportWriter
+from app.core.diff_cache import DiffCache, default_cache_path
+from app.core.table_comparator import TableSchemaComparator
+from app.core.data_comparator import TableDataComparator
+from app.core.comparison_result import ComparisonResult, ComparisonEntry, ACTION_ALTER, ACTION_CREATE
\ No newline at end of file
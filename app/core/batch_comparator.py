@@ -0,0 +1,214 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.winmerge_comparator import WinMergeLikeComparator, DiffAlgorithm
+from app.core.diff_cache import DiffCache
+
+# Tamanho alvo (em caracteres) de cada lote enviado a um processo
+CHUNK_TARGET_CHARS = 1_000_000
+# Número máximo de pares por lote, mesmo que sejam pequenos
+CHUNK_MAX_PAIRS = 200
+# Abaixo desse volume total a comparação roda no próprio processo
+PARALLEL_MIN_CHARS = 2_000_000
+# Intervalo (segundos) entre verificações de cancelamento enquanto aguarda o pool
+CANCEL_POLL_SECONDS = 0.2
+# Variável de ambiente com o número de processos da comparação; sem ela (ou
+# com valor inválido) é usado um processo por núcleo. Nunca passa de os.cpu_count()
+COMPARE_WORKERS_ENV = "SQLCOMPARE_WORKERS"
+
+
+def resolve_workers(requested: Optional[int] = None) -> int:
+    """
+    Número de processos do pool: `requested`, ou o valor de
+    COMPARE_WORKERS_ENV, ou um por núcleo; sempre entre 1 e os.cpu_count().
+    """
+    cpu_count = os.cpu_count() or 1
+    if requested is None:
+        try:
+            requested = int(os.environ.get(COMPARE_WORKERS_ENV, ""))
+        except ValueError:
+            requested = cpu_count
+    return max(1, min(requested, cpu_count))
+
+
+# Comparadores reaproveitados entre lotes no mesmo processo, para que o cache
+# de normalização das opções de ignore valha para a execução inteira
+_comparators: Dict[Tuple, WinMergeLikeComparator] = {}
+
+
+def _new_comparator(algorithm_value: str, ignore_options: Dict[str, Any],
+                    cache_path: Optional[str] = None) -> WinMergeLikeComparator:
+    """Obtém um comparador configurado com o algoritmo, as opções de ignore e o cache."""
+    key = (algorithm_value, cache_path, tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in ignore_options.items()
+    )))
+    comparator = _comparators.get(key)
+    if comparator is None:
+        cache = DiffCache(cache_path) if cache_path else None
+        comparator = WinMergeLikeComparator(DiffAlgorithm(algorithm_value), cache=cache)
+        comparator.set_ignore_options(**ignore_options)
+        _comparators[key] = comparator
+    return comparator
+
+
+def _compare_pair(comparator: WinMergeLikeComparator, name: str,
+                  text1: str, text2: str, format_output: bool = True) -> Dict[str, Any]:
+    """Compara um único par e monta o dicionário de resultado."""
+    if not format_output:
+        blocks = comparator.compare_blocks(text1, text2)
+        has_differences = comparator.has_differences()
+        return {
+            'name': name,
+            'has_differences': has_differences,
+            'blocks': blocks if has_differences else None
+        }
+
+    source_body, target_body = comparator.compare(text1, text2)
+    return {
+        'name': name,
+        'has_differences': comparator.has_differences(),
+        'source_body': source_body,
+        'target_body': target_body
+    }
+
+
+def _compare_chunk(algorithm_value: str, ignore_options: Dict[str, Any], cache_path: Optional[str],
+                   format_output: bool, chunk: List[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+    """Compara um lote de pares (executado em um processo do pool)."""
+    comparator = _new_comparator(algorithm_value, ignore_options, cache_path)
+    return [_compare_pair(comparator, name, text1, text2, format_output) for name, text1, text2 in chunk]
+
+
+class BatchComparator:
+    """
+    Compara muitos pares de textos distribuindo o trabalho em um pool de processos.
+
+    Os pares são agrupados em lotes pelo tamanho do conteúdo, de modo que uma
+    procedure gigante fique sozinha em seu lote e não atrase as demais.
+    Os resultados são devolvidos ordenados pelo nome. O tamanho do pool vem
+    de `max_workers` ou de COMPARE_WORKERS_ENV (ver resolve_workers).
+
+    Com `cache_path`, cada processo consulta o cache persistente de diffs
+    (DiffCache) e só compara os pares ainda não vistos.
+
+    Com `format_output=False` os resultados trazem apenas os blocos compactos
+    ('blocks', ou None sem diferenças) no lugar de 'source_body'/'target_body';
+    a saída formatada pode ser gerada depois com
+    WinMergeLikeComparator.format_blocks, só para os objetos exibidos.
+    """
+
+    def __init__(self, algorithm: DiffAlgorithm = DiffAlgorithm.DEFAULT,
+                 max_workers: Optional[int] = None, cache_path: Optional[str] = None,
+                 format_output: bool = True, **ignore_options):
+        self.algorithm = algorithm
+        self.max_workers = resolve_workers(max_workers)
+        self.cache_path = cache_path
+        self.format_output = format_output
+        self.ignore_options = ignore_options
+
+    def options_signature(self) -> str:
+        """
+        Texto que identifica as opções que afetam o resultado (algoritmo,
+        detecção de blocos movidos e opções de ignore), para reaproveitar
+        resultados guardados só quando foram obtidos com as mesmas opções.
+        """
+        comparator = _new_comparator(self.algorithm.value, self.ignore_options)
+        return repr((comparator.algorithm.value, comparator.detect_moved_blocks,
+                     comparator.ignore_options._signature()))
+
+    def _iter_chunks(self, pairs: Iterable[Tuple[str, str, str]]) -> Iterator[List[Tuple[str, str, str]]]:
+        """Agrupa os pares, na ordem em que chegam, em lotes de tamanho semelhante."""
+        current = []
+        current_size = 0
+        for pair in pairs:
+            size = len(pair[1]) + len(pair[2])
+            if current and (current_size + size > CHUNK_TARGET_CHARS or len(current) >= CHUNK_MAX_PAIRS):
+                yield current
+                current = []
+                current_size = 0
+            current.append(pair)
+            current_size += size
+
+        if current:
+            yield current
+
+    def iter_compare(self, pairs: Iterable[Tuple[str, str, str]],
+                     cancel_event=None) -> Iterator[Dict[str, Any]]:
+        """
+        Compara os pares (nome, texto1, texto2) entregando cada resultado assim
+        que fica pronto, na ordem de conclusão.
+
+        `pairs` é consumido sob demanda: no máximo 2 lotes por processo ficam
+        em andamento, então um gerador que busca os corpos no banco mantém a
+        memória limitada ao tamanho dos lotes.
+
+        Args:
+            pairs: pares a comparar
+            cancel_event (threading.Event, opcional): interrompe a comparação
+                quando sinalizado; lotes pendentes são descartados
+        """
+        pairs = iter(pairs)
+
+        # Lê o início do fluxo: volumes pequenos são comparados no próprio processo
+        head = []
+        head_chars = 0
+        if self.max_workers > 1:
+            for pair in pairs:
+                head.append(pair)
+                head_chars += len(pair[1]) + len(pair[2])
+                if head_chars >= PARALLEL_MIN_CHARS:
+                    break
+
+        if self.max_workers <= 1 or head_chars < PARALLEL_MIN_CHARS:
+            comparator = _new_comparator(self.algorithm.value, self.ignore_options, self.cache_path)
+            for name, text1, text2 in itertools.chain(head, pairs):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield _compare_pair(comparator, name, text1, text2, self.format_output)
+            return
+
+        chunks = self._iter_chunks(itertools.chain(head, pairs))
+        max_in_flight = self.max_workers * 2
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+
+                while not exhausted and len(pending) < max_in_flight:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        pending.add(executor.submit(
+                            _compare_chunk, self.algorithm.value, self.ignore_options,
+                            self.cache_path, self.format_output, chunk
+                        ))
+
+                if not pending:
+                    break
+                done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def compare_all(self, pairs: Iterable[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+        """
+        Compara todos os pares (nome, texto1, texto2).
+        Os maiores são enviados primeiro para equilibrar a carga entre processos.
+
+        Returns:
+            list: um dicionário por par com 'name', 'has_differences',
+                  'source_body' e 'target_body' (ou 'blocks', ver format_output),
+                  ordenado pelo nome
+        """
+        by_size = sorted(pairs, key=lambda p: len(p[1]) + len(p[2]), reverse=True)
+        results = list(self.iter_compare(by_size))
+        results.sort(key=lambda r: r['name'])
+        return results
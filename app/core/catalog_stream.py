@@ -0,0 +1,138 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+# Quantidade de itens que a thread de leitura antecipada pode manter à frente do consumidor
+PREFETCH_BUFFER_SIZE = 1000
+# Intervalo (segundos) em que esperas no buffer verificam pedidos de parada
+PREFETCH_POLL_INTERVAL = 0.1
+
+_ITEM, _DONE, _ERROR = range(3)
+
+
+def merge_join(left: Iterable[Any], right: Iterable[Any],
+               key: Callable[[Any], Any]) -> Iterator[Tuple[Optional[Any], Optional[Any]]]:
+    """
+    Junta dois fluxos já ordenados pela mesma chave (merge-join).
+
+    Produz pares (esquerda, direita); quando a chave existe apenas em um dos
+    lados o outro elemento do par é None. Só mantém um item de cada fluxo em
+    memória por vez.
+    """
+    sentinel = object()
+    left = iter(left)
+    right = iter(right)
+    left_item = next(left, sentinel)
+    right_item = next(right, sentinel)
+
+    while left_item is not sentinel or right_item is not sentinel:
+        if right_item is sentinel:
+            yield left_item, None
+            left_item = next(left, sentinel)
+        elif left_item is sentinel:
+            yield None, right_item
+            right_item = next(right, sentinel)
+        else:
+            left_key = key(left_item)
+            right_key = key(right_item)
+            if left_key < right_key:
+                yield left_item, None
+                left_item = next(left, sentinel)
+            elif right_key < left_key:
+                yield None, right_item
+                right_item = next(right, sentinel)
+            else:
+                yield left_item, right_item
+                left_item = next(left, sentinel)
+                right_item = next(right, sentinel)
+
+
+class PrefetchStream:
+    """
+    Iterador devolvido por prefetch: uma thread produtora consome o fluxo
+    original e o consumidor lê do buffer.
+
+    close() para a produtora, descarta o que ficou no buffer e espera a
+    thread terminar; depois dele o fluxo original (e a conexão que ele usa)
+    já foi fechado. Esperas no buffer, dos dois lados, acordam a cada
+    PREFETCH_POLL_INTERVAL para verificar o pedido de parada.
+    """
+
+    def __init__(self, iterable: Iterable[Any], buffer_size: int = PREFETCH_BUFFER_SIZE,
+                 cancel_event: Optional[threading.Event] = None):
+        self._iterable = iterable
+        self._buffer: queue.Queue = queue.Queue(maxsize=buffer_size)
+        self._stop = threading.Event()
+        self._cancel_event = cancel_event
+        self._finished = False
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _put(self, entry) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._buffer.put(entry, timeout=PREFETCH_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for item in self._iterable:
+                if not self._put((_ITEM, item)):
+                    return
+            self._put((_DONE, None))
+        except BaseException as e:
+            self._put((_ERROR, e))
+        finally:
+            close = getattr(self._iterable, 'close', None)
+            if close:
+                close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self._finished:
+            if self._cancel_event is not None and self._cancel_event.is_set():
+                break
+            try:
+                kind, value = self._buffer.get(timeout=PREFETCH_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if kind == _ITEM:
+                return value
+            self.close()
+            if kind == _ERROR:
+                raise value
+            break
+
+        self.close()
+        raise StopIteration
+
+    def close(self):
+        """Para a thread produtora e espera que ela termine."""
+        self._finished = True
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._buffer.get(timeout=PREFETCH_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        self._thread.join()
+
+
+def prefetch(iterable: Iterable[Any], buffer_size: int = PREFETCH_BUFFER_SIZE,
+             cancel_event: Optional[threading.Event] = None) -> PrefetchStream:
+    """
+    Consome `iterable` em uma thread própria, mantendo no máximo `buffer_size`
+    itens à frente do consumidor.
+
+    Permite que dois fluxos de rede (source e target) sejam lidos ao mesmo
+    tempo mesmo quando consumidos alternadamente por um merge-join. Exceções
+    do fluxo original são relançadas no consumidor; com `cancel_event`, o
+    fluxo termina assim que o evento é sinalizado. Chame close() (em um
+    finally) para garantir que a thread terminou.
+    """
+    return PrefetchStream(iterable, buffer_size, cancel_event)
@@ -0,0 +1,120 @@
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Ações exibidas para cada objeto do resultado
+ACTION_ALTER = "Alter"
+ACTION_CREATE = "Create"
+
+# Quantos objetos abertos recentemente mantêm a saída formatada em memória
+FORMATTED_CACHE_SIZE = 8
+
+# Um objeto do resultado. Para 'Alter' com diff_blocks os corpos são os textos
+# originais e a saída formatada é gerada sob demanda (ver
+# ComparisonResult.get_formatted); sem diff_blocks os corpos já estão formatados.
+# Para 'Create' source_body é o corpo do objeto e target_body é None
+ComparisonEntry = namedtuple(
+    "ComparisonEntry",
+    "object_name object_type action source_modified target_modified source_body target_body diff_blocks",
+    defaults=(None,)
+)
+
+# (schema, nome, tipo)
+ResultKey = Tuple[str, str, str]
+
+
+def make_result_key(object_name: str, object_type: str) -> ResultKey:
+    """Chave do objeto a partir do nome no formato schema.nome e do tipo."""
+    schema, _, name = object_name.rpartition('.')
+    return schema, name, object_type
+
+
+class ComparisonResult:
+    """
+    Resultado de uma comparação, indexado para consulta pela interface.
+
+    Cada objeto é guardado uma única vez (com uma única cópia de cada corpo),
+    acessível em O(1) por (schema, nome, tipo). Índices secundários por ação
+    e por tipo de objeto guardam apenas as chaves, na ordem de inclusão.
+    Adicionar um objeto com uma chave já existente substitui o anterior.
+
+    Objetos guardados com diff_blocks são formatados apenas quando abertos,
+    por `formatter(source_body, target_body, diff_blocks)` (tipicamente
+    WinMergeLikeComparator.format_blocks); as últimas FORMATTED_CACHE_SIZE
+    saídas ficam memorizadas.
+    """
+
+    def __init__(self, formatter: Optional[Callable] = None,
+                 formatted_cache_size: int = FORMATTED_CACHE_SIZE):
+        self.formatter = formatter
+        self.formatted_cache_size = formatted_cache_size
+        self._entries: Dict[ResultKey, ComparisonEntry] = {}
+        # dict usado como conjunto ordenado de chaves
+        self._by_action: Dict[str, Dict[ResultKey, None]] = {}
+        self._by_type: Dict[str, Dict[ResultKey, None]] = {}
+        self._formatted: "OrderedDict[ResultKey, Tuple[str, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[ComparisonEntry]:
+        return iter(self._entries.values())
+
+    def add(self, entry: ComparisonEntry) -> ResultKey:
+        """Inclui (ou substitui) um objeto e retorna a sua chave."""
+        key = make_result_key(entry.object_name, entry.object_type)
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._by_action[previous.action].pop(key, None)
+            self._formatted.pop(key, None)
+        self._entries[key] = entry
+        self._by_action.setdefault(entry.action, {})[key] = None
+        self._by_type.setdefault(entry.object_type, {})[key] = None
+        return key
+
+    def get(self, object_name: str, object_type: str) -> Optional[ComparisonEntry]:
+        """Objeto pelo nome (schema.nome) e tipo, ou None."""
+        return self._entries.get(make_result_key(object_name, object_type))
+
+    def get_by_key(self, key: ResultKey) -> Optional[ComparisonEntry]:
+        return self._entries.get(key)
+
+    def get_formatted(self, object_name: str, object_type: str) -> Optional[Tuple[str, str]]:
+        """
+        Corpos (source, target) prontos para exibição: formata sob demanda os
+        objetos guardados com diff_blocks. None se o objeto não existir.
+        """
+        key = make_result_key(object_name, object_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.diff_blocks is None:
+            return entry.source_body, entry.target_body
+
+        formatted = self._formatted.get(key)
+        if formatted is not None:
+            self._formatted.move_to_end(key)
+            return formatted
+
+        formatted = self.formatter(entry.source_body, entry.target_body, entry.diff_blocks)
+        self._formatted[key] = formatted
+        if len(self._formatted) > self.formatted_cache_size:
+            self._formatted.popitem(last=False)
+        return formatted
+
+    def keys_by_action(self, action: str) -> List[ResultKey]:
+        return list(self._by_action.get(action, ()))
+
+    def keys_by_type(self, object_type: str) -> List[ResultKey]:
+        return list(self._by_type.get(object_type, ()))
+
+    def count(self, action: Optional[str] = None) -> int:
+        """Quantidade de objetos, no total ou de uma ação."""
+        if action is None:
+            return len(self._entries)
+        return len(self._by_action.get(action, ()))
+
+    def clear(self):
+        self._entries.clear()
+        self._by_action.clear()
+        self._by_type.clear()
+        self._formatted.clear()
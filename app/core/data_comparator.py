@@ -0,0 +1,112 @@
+import math
+from collections import namedtuple
+from typing import Iterator, List, Optional, Sequence
+
+# Intervalos com até esta quantidade de linhas (em cada lado) são baixados e comparados linha a linha
+DATA_LEAF_ROWS = 1000
+# Em quantos sub-intervalos um intervalo divergente é dividido a cada nível
+DATA_FANOUT = 16
+# Profundidade máxima da subdivisão; depois disso o intervalo é baixado inteiro
+DATA_MAX_DEPTH = 12
+
+# Uma linha divergente: change = 'added' (só no source) | 'dropped' (só no target) | 'altered'
+RowDifference = namedtuple("RowDifference", "table_name key change source_row target_row")
+
+
+def _same_summary(source_summary, target_summary) -> bool:
+    """Resumos (quantidade, soma dos hashes, linhas sem hash) iguais e sem linhas sem hash."""
+    return source_summary == target_summary and not source_summary[2]
+
+
+class TableDataComparator:
+    """
+    Compara os dados de uma tabela em dois servidores sem transferi-la inteira.
+
+    A tabela é particionada por intervalos da chave primária. Para cada intervalo
+    os servidores devolvem apenas (quantidade, soma dos hashes SHA2_256 das
+    linhas, linhas sem hash); os intervalos iguais são descartados e só os
+    divergentes são subdivididos (como em uma árvore de Merkle), até ficarem
+    pequenos o bastante para que as linhas sejam baixadas e comparadas. O volume transferido acompanha o tamanho das
+    diferenças, não o da tabela.
+
+    `source` e `target` precisam oferecer get_range_checksums,
+    get_range_boundaries e iter_range_rows (ver DatabaseConnectionManager).
+    Intervalos com linhas sem hash (longas demais para o HASHBYTES de servidores
+    anteriores ao SQL Server 2016) são sempre tratados como divergentes.
+    """
+
+    def __init__(self, source, target, leaf_rows: int = DATA_LEAF_ROWS,
+                 fanout: int = DATA_FANOUT, max_depth: int = DATA_MAX_DEPTH):
+        self.source = source
+        self.target = target
+        self.leaf_rows = leaf_rows
+        self.fanout = fanout
+        self.max_depth = max_depth
+        self.ranges_checked = 0
+        self.rows_fetched = 0
+
+    def iter_differences(self, table_name: str, columns: Sequence[str], key_columns: Sequence[str],
+                         cancel_event=None) -> Iterator[RowDifference]:
+        """
+        Produz as linhas divergentes da tabela, intervalo por intervalo na ordem da chave.
+
+        Args:
+            table_name: tabela no formato schema.nome
+            columns: nomes das colunas na ordem de SELECT *
+            key_columns: colunas da chave primária
+            cancel_event (threading.Event, opcional): interrompe a comparação
+        """
+        key_positions = [list(columns).index(column) for column in key_columns]
+        source_total = self.source.get_range_checksums(table_name, key_columns, None, None, [])[0]
+        target_total = self.target.get_range_checksums(table_name, key_columns, None, None, [])[0]
+        self.ranges_checked += 1
+        if _same_summary(source_total, target_total):
+            return
+
+        # Pilha em ordem inversa da chave, para que as diferenças saiam ordenadas
+        pending = [(None, None, source_total, target_total, 0)]
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+
+            low, high, source_summary, target_summary, depth = pending.pop()
+            largest = max(source_summary[0], target_summary[0])
+            if largest <= self.leaf_rows or depth >= self.max_depth:
+                yield from self._diff_rows(table_name, key_columns, key_positions, low, high)
+                continue
+
+            # As fronteiras vêm do lado com mais linhas no intervalo
+            reader = self.source if source_summary[0] >= target_summary[0] else self.target
+            step = math.ceil(largest / self.fanout)
+            boundaries = reader.get_range_boundaries(table_name, key_columns, low, high, step)
+            source_buckets = self.source.get_range_checksums(table_name, key_columns, low, high, boundaries)
+            target_buckets = self.target.get_range_checksums(table_name, key_columns, low, high, boundaries)
+            self.ranges_checked += len(source_buckets)
+
+            edges = [low] + boundaries + [high]
+            for bucket in reversed(range(len(source_buckets))):
+                if not _same_summary(source_buckets[bucket], target_buckets[bucket]):
+                    pending.append((edges[bucket], edges[bucket + 1],
+                                    source_buckets[bucket], target_buckets[bucket], depth + 1))
+
+    def _diff_rows(self, table_name: str, key_columns: Sequence[str], key_positions: List[int],
+                   low: Optional[tuple], high: Optional[tuple]) -> Iterator[RowDifference]:
+        """Baixa as linhas de um intervalo pequeno dos dois lados e compara pela chave."""
+        source_rows = {}
+        for row in self.source.iter_range_rows(table_name, key_columns, low, high):
+            source_rows[tuple(row[position] for position in key_positions)] = row
+        target_rows = {}
+        for row in self.target.iter_range_rows(table_name, key_columns, low, high):
+            target_rows[tuple(row[position] for position in key_positions)] = row
+        self.rows_fetched += len(source_rows) + len(target_rows)
+
+        # Dicionários (e não merge por ordem) porque a ordenação de strings do
+        # servidor pode não coincidir com a do Python
+        for key, source_row in source_rows.items():
+            target_row = target_rows.pop(key, None)
+            if target_row is None:
+                yield RowDifference(table_name, key, 'added', source_row, None)
+            elif source_row != target_row:
+                yield RowDifference(table_name, key, 'altered', source_row, target_row)
+        for key, target_row in target_rows.items():
+            yield RowDifference(table_name, key, 'dropped', None, target_row)
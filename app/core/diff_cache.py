@@ -0,0 +1,179 @@
+import hashlib
+import os
+import sqlite3
+import time
+from array import array
+from typing import List, Optional, Tuple
+
+# Tamanho máximo (bytes de blocos armazenados) antes de descartar os menos usados
+DIFF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# A cada quantas gravações o tamanho total do cache é verificado
+DIFF_CACHE_EVICT_EVERY = 200
+# Versão do formato dos blocos; mudar invalida as entradas antigas
+DIFF_CACHE_VERSION = 5
+
+# Tipos de bloco codificados como inteiros no cache
+_BLOCK_TYPES = ('equal', 'replace', 'delete', 'insert', 'move_from', 'move_to')
+_BLOCK_CODES = {name: code for code, name in enumerate(_BLOCK_TYPES)}
+
+
+def default_cache_path() -> str:
+    """Caminho padrão do cache no perfil do usuário."""
+    base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    return os.path.join(base, 'SQLCompareApp', 'diff_cache.sqlite')
+
+
+class DiffCache:
+    """
+    Cache persistente (SQLite) dos blocos de diferença já calculados.
+
+    A chave combina o hash dos dois textos, o algoritmo, a detecção de blocos
+    movidos e as opções de ignore, então um par já visto em outra execução
+    não precisa ser comparado de novo. Os blocos são gravados de forma
+    compacta (5 inteiros por bloco) e as estatísticas são derivadas deles.
+    Quando o total passa de `max_bytes`, as entradas usadas há mais tempo
+    são removidas.
+
+    Erros do SQLite nunca interrompem a comparação: o cache apenas deixa de
+    responder. Cada processo abre sua própria conexão.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DIFF_CACHE_MAX_BYTES):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._connection_pid = None
+        self._writes = 0
+        self._disabled = False
+
+    @staticmethod
+    def make_key(text1: str, text2: str, algorithm: str, detect_moved_blocks: bool,
+                 ignore_signature: tuple) -> str:
+        """Monta a chave do par a partir do conteúdo e das opções de comparação."""
+        digest = hashlib.sha256()
+        for part in (hashlib.sha256(text1.encode('utf-8', 'surrogatepass')).hexdigest(),
+                     hashlib.sha256(text2.encode('utf-8', 'surrogatepass')).hexdigest(),
+                     algorithm, repr(detect_moved_blocks), repr(ignore_signature),
+                     str(DIFF_CACHE_VERSION)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[Tuple[str, int, int, int, int]]]:
+        """Retorna os blocos (tipo, i1, i2, j1, j2) gravados para a chave, ou None."""
+        connection = self._connect()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute(
+                "SELECT blocks FROM diff_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE diff_cache SET last_used = ? WHERE cache_key = ?", (time.time(), key)
+            )
+        except sqlite3.Error:
+            self._disable()
+            return None
+
+        values = array('q')
+        values.frombytes(row[0])
+        return [(_BLOCK_TYPES[values[k]],) + tuple(values[k + 1:k + 5])
+                for k in range(0, len(values), 5)]
+
+    def put(self, key: str, blocks: List[Tuple[str, int, int, int, int]]):
+        """Grava os blocos calculados para a chave."""
+        connection = self._connect()
+        if connection is None:
+            return
+        values = array('q')
+        for block_type, i1, i2, j1, j2 in blocks:
+            values.extend((_BLOCK_CODES[block_type], i1, i2, j1, j2))
+        payload = values.tobytes()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO diff_cache (cache_key, blocks, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload) + len(key), time.time())
+            )
+            self._writes += 1
+            if self._writes % DIFF_CACHE_EVICT_EVERY == 1:
+                self._evict()
+        except sqlite3.Error:
+            self._disable()
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        connection = self._connect()
+        if connection is None:
+            return
+        try:
+            connection.execute("DELETE FROM diff_cache")
+        except sqlite3.Error:
+            self._disable()
+
+    def close(self):
+        if self._connection is not None and self._connection_pid == os.getpid():
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+        self._connection = None
+        self._connection_pid = None
+
+    def _connect(self):
+        """Abre (uma vez por processo) a conexão com o arquivo do cache."""
+        if self._disabled:
+            return None
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # isolation_level=None: cada comando é confirmado na hora, para não
+            # segurar o lock de escrita enquanto outros processos usam o cache
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS diff_cache ("
+                "cache_key TEXT PRIMARY KEY, blocks BLOB NOT NULL, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_diff_cache_last_used ON diff_cache (last_used)"
+            )
+        except (OSError, sqlite3.Error):
+            self._disable()
+            return None
+
+        self._connection = connection
+        self._connection_pid = os.getpid()
+        return connection
+
+    def _evict(self):
+        """Remove as entradas menos usadas até o total caber em max_bytes."""
+        connection = self._connection
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM diff_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        cutoff = None
+        freed = 0
+        for size, last_used in connection.execute(
+                "SELECT size, last_used FROM diff_cache ORDER BY last_used"):
+            freed += size
+            cutoff = last_used
+            if freed >= excess:
+                break
+        if cutoff is not None:
+            connection.execute("DELETE FROM diff_cache WHERE last_used <= ?", (cutoff,))
+
+    def _disable(self):
+        self._disabled = True
+        self.close()
@@ -0,0 +1,532 @@
+from array import array
+from math import isqrt
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Tipos auxiliares: (inicio_a, inicio_b, tamanho) e opcodes no formato do difflib
+Match = Tuple[int, int, int]
+Opcode = Tuple[str, int, int, int, int]
+
+# Linhas com mais ocorrências que isso não servem de âncora no algoritmo histogram
+HISTOGRAM_MAX_CHAIN = 64
+# Custo mínimo (passos de edição) antes de o Myers abandonar a busca exata, como
+# no xdiff; vale para o DEFAULT (minimal=False)
+MYERS_MIN_COST = 256
+# Menor "snake" (linhas iguais seguidas) aceita como ponto de divisão quando o
+# custo passa do limite (XDL_SNAKE_CNT no xdiff)
+MYERS_SNAKE_MIN = 20
+# Limite de custo do diff mínimo (minimal=True): acima dele a região é entregue
+# ao histogram, evitando o pior caso O(N*D) em textos quase sem linhas em comum
+MYERS_MINIMAL_MAX_COST = 1024
+
+
+def intern_lines(lines1: Sequence[str], lines2: Sequence[str]) -> Tuple[array, array]:
+    """
+    Converte as linhas dos dois textos em IDs inteiros compartilhados.
+    Linhas iguais recebem o mesmo ID, então os algoritmos comparam inteiros
+    em vez de strings.
+    """
+    ids: Dict[str, int] = {}
+    setdefault = ids.setdefault
+    seq1 = array('l', [setdefault(line, len(ids)) for line in lines1])
+    seq2 = array('l', [setdefault(line, len(ids)) for line in lines2])
+    return seq1, seq2
+
+
+def _common_bounds(a: Sequence[int], b: Sequence[int],
+                   alo: int, ahi: int, blo: int, bhi: int) -> Tuple[int, int]:
+    """Retorna o tamanho do prefixo e do sufixo comuns do intervalo."""
+    prefix = 0
+    while alo + prefix < ahi and blo + prefix < bhi and a[alo + prefix] == b[blo + prefix]:
+        prefix += 1
+
+    suffix = 0
+    while (ahi - suffix > alo + prefix and bhi - suffix > blo + prefix
+           and a[ahi - suffix - 1] == b[bhi - suffix - 1]):
+        suffix += 1
+
+    return prefix, suffix
+
+
+def _middle_snake(a: Sequence[int], b: Sequence[int],
+                  alo: int, ahi: int, blo: int, bhi: int,
+                  minimal: bool = False) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Encontra a "middle snake" do algoritmo de Myers (busca bidirecional).
+    Retorna (x0, y0, x1, y1) relativos a (alo, blo), ou None se o custo
+    passar do limite sem um ponto de divisão confiável.
+
+    Sem `minimal`, assim como o xdiff do git, quando o custo passa de
+    max(MYERS_MIN_COST, sqrt(N+M)) a busca divide na snake de pelo menos
+    MYERS_SNAKE_MIN linhas que mais avançou; se não houver nenhuma, desiste.
+    Com `minimal`, o limite é MYERS_MINIMAL_MAX_COST e não há heurística.
+    """
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    max_d = (n + m + 1) // 2
+    if minimal:
+        max_cost = MYERS_MINIMAL_MAX_COST
+    else:
+        max_cost = max(MYERS_MIN_COST, isqrt(n + m))
+    offset = max_d + 1
+    vf = [0] * (2 * max_d + 3)
+    vb = [0] * (2 * max_d + 3)
+    # Tamanho da snake que terminou em cada diagonal no último passo
+    sf = [0] * (2 * max_d + 3)
+    sb = [0] * (2 * max_d + 3)
+
+    for d in range(max_d + 1):
+        # Busca para frente
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vf[offset + k - 1] < vf[offset + k + 1]):
+                x = vf[offset + k + 1]
+            else:
+                x = vf[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            vf[offset + k] = x
+            sf[offset + k] = x - x0
+
+            kb = delta - k
+            if odd and -(d - 1) <= kb <= d - 1 and x + vb[offset + kb] >= n:
+                return x0, y0, x, y
+
+        # Busca para trás (coordenadas invertidas)
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vb[offset + k - 1] < vb[offset + k + 1]):
+                x = vb[offset + k + 1]
+            else:
+                x = vb[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            vb[offset + k] = x
+            sb[offset + k] = x - x0
+
+            kf = delta - k
+            if not odd and -d <= kf <= d and x + vf[offset + kf] >= n:
+                return n - x, m - y, n - x0, m - y0
+
+        if d >= max_cost:
+            if minimal:
+                return None
+            # Só divide no fim de uma snake longa (parte de um alinhamento real)
+            best = None
+            best_reach = -1
+            for k in range(-d, d + 1, 2):
+                size = sf[offset + k]
+                x = vf[offset + k]
+                if size >= MYERS_SNAKE_MIN and 2 * x - k > best_reach:
+                    best_reach = 2 * x - k
+                    best = (x - size, x - k - size, x, x - k)
+            for k in range(-d, d + 1, 2):
+                size = sb[offset + k]
+                x = vb[offset + k]
+                if size >= MYERS_SNAKE_MIN and 2 * x - k > best_reach:
+                    best_reach = 2 * x - k
+                    best = (n - x, m - x + k, n - x + size, m - x + k + size)
+            return best
+
+    # Inalcançável para entradas válidas
+    return 0, 0, 0, 0
+
+
+def _myers_region(a: Sequence[int], b: Sequence[int],
+                  alo: int, ahi: int, blo: int, bhi: int, matches: List[Match],
+                  minimal: bool = False, fallback=None):
+    """
+    Myers O(ND) em espaço linear (dividir e conquistar pela middle snake).
+
+    Sub-regiões em que a busca desiste (ver _middle_snake) são entregues a
+    `fallback(a, b, alo, ahi, blo, bhi, matches)`; sem fallback, ficam sem
+    correspondências (viram uma substituição).
+    """
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        prefix, suffix = _common_bounds(a, b, alo, ahi, blo, bhi)
+        if prefix:
+            matches.append((alo, blo, prefix))
+        if suffix:
+            matches.append((ahi - suffix, bhi - suffix, suffix))
+        alo += prefix
+        blo += prefix
+        ahi -= suffix
+        bhi -= suffix
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        snake = _middle_snake(a, b, alo, ahi, blo, bhi, minimal)
+        if snake is None:
+            if fallback is not None:
+                fallback(a, b, alo, ahi, blo, bhi, matches)
+            continue
+
+        x0, y0, x1, y1 = snake
+        if x1 > x0:
+            matches.append((alo + x0, blo + y0, x1 - x0))
+        stack.append((alo, alo + x0, blo, blo + y0))
+        stack.append((alo + x1, ahi, blo + y1, bhi))
+
+
+def _finalize_matches(matches: List[Match]) -> List[Match]:
+    """Ordena e funde blocos de correspondência adjacentes."""
+    matches.sort()
+    merged: List[Match] = []
+    for i, j, size in matches:
+        if merged:
+            pi, pj, psize = merged[-1]
+            if pi + psize == i and pj + psize == j:
+                merged[-1] = (pi, pj, psize + size)
+                continue
+        merged.append((i, j, size))
+    return merged
+
+
+def myers_matches(a: Sequence[int], b: Sequence[int], minimal: bool = False) -> List[Match]:
+    """
+    Blocos de correspondência pelo algoritmo de Myers.
+
+    Com `minimal=True` o resultado é o diff mínimo (LCS exata), como o
+    `--minimal` do git, enquanto o custo de cada região couber em
+    MYERS_MINIMAL_MAX_COST; sem ele, a busca é limitada por MYERS_MIN_COST em
+    trechos muito divergentes (ver _middle_snake). Nos dois casos, as regiões
+    em que a busca desiste são alinhadas pelo histogram.
+
+    Assim como o xdiff do git, linhas que só existem em um dos lados são
+    descartadas antes da busca, já que nunca fazem parte da LCS.
+    """
+    in_a = set(a)
+    in_b = set(b)
+    index_a = array('l', [i for i, x in enumerate(a) if x in in_b])
+    index_b = array('l', [j for j, x in enumerate(b) if x in in_a])
+    fa = array('l', [a[i] for i in index_a])
+    fb = array('l', [b[j] for j in index_b])
+
+    filtered: List[Match] = []
+    _myers_region(fa, fb, 0, len(fa), 0, len(fb), filtered, minimal, _histogram_region)
+
+    # Remapeia para os índices originais, quebrando onde houver linhas descartadas
+    matches: List[Match] = []
+    for fi, fj, size in filtered:
+        for k in range(size):
+            matches.append((index_a[fi + k], index_b[fj + k], 1))
+    return _finalize_matches(matches)
+
+
+def _histogram_region(a: Sequence[int], b: Sequence[int],
+                      alo: int, ahi: int, blo: int, bhi: int, matches: List[Match]):
+    """
+    Algoritmo histogram sobre [alo, ahi) x [blo, bhi).
+    Usa como âncora as linhas com menos ocorrências e recorre nas laterais;
+    regiões sem âncora utilizável caem no Myers (sem novo fallback).
+    """
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        prefix, suffix = _common_bounds(a, b, alo, ahi, blo, bhi)
+        if prefix:
+            matches.append((alo, blo, prefix))
+        if suffix:
+            matches.append((ahi - suffix, bhi - suffix, suffix))
+        alo += prefix
+        blo += prefix
+        ahi -= suffix
+        bhi -= suffix
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        occurrences: Dict[int, List[int]] = {}
+        for i in range(alo, ahi):
+            occurrences.setdefault(a[i], []).append(i)
+
+        best = None
+        best_count = HISTOGRAM_MAX_CHAIN + 1
+        j = blo
+        while j < bhi:
+            positions = occurrences.get(b[j])
+            if positions is None or len(positions) > best_count:
+                j += 1
+                continue
+
+            count = len(positions)
+            next_j = j + 1
+            for i in positions:
+                start_a, start_b = i, j
+                while start_a > alo and start_b > blo and a[start_a - 1] == b[start_b - 1]:
+                    start_a -= 1
+                    start_b -= 1
+                end_a, end_b = i + 1, j + 1
+                while end_a < ahi and end_b < bhi and a[end_a] == b[end_b]:
+                    end_a += 1
+                    end_b += 1
+
+                size = end_a - start_a
+                if best is None or count < best_count or (count == best_count and size > best[2]):
+                    best = (start_a, start_b, size)
+                    best_count = count
+                next_j = max(next_j, end_b)
+            j = next_j
+
+        if best is None:
+            _myers_region(a, b, alo, ahi, blo, bhi, matches)
+            continue
+
+        start_a, start_b, size = best
+        matches.append(best)
+        stack.append((alo, start_a, blo, start_b))
+        stack.append((start_a + size, ahi, start_b + size, bhi))
+
+
+def histogram_matches(a: Sequence[int], b: Sequence[int]) -> List[Match]:
+    """
+    Blocos de correspondência pelo algoritmo histogram (semelhante ao do git).
+    Usa como âncora as linhas com menos ocorrências e recorre nas laterais;
+    regiões sem âncora utilizável caem no Myers.
+    """
+    matches: List[Match] = []
+    _histogram_region(a, b, 0, len(a), 0, len(b), matches)
+    return _finalize_matches(matches)
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Maior subsequência crescente em b (pares já ordenados por a), via patience sorting."""
+    from bisect import bisect_left
+
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(pairs)
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(idx)
+        else:
+            tails[pos] = j
+            tail_index[pos] = idx
+        previous[idx] = tail_index[pos - 1] if pos else -1
+
+    result = []
+    idx = tail_index[-1] if tail_index else -1
+    while idx != -1:
+        result.append(pairs[idx])
+        idx = previous[idx]
+    result.reverse()
+    return result
+
+
+def patience_matches(a: Sequence[int], b: Sequence[int]) -> List[Match]:
+    """
+    Blocos de correspondência pelo algoritmo patience.
+    Alinha primeiro as linhas únicas em ambos os lados (LIS) e recorre entre
+    as âncoras; regiões sem linhas únicas caem no Myers (e, se ele desistir,
+    no histogram).
+    """
+    matches: List[Match] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        prefix, suffix = _common_bounds(a, b, alo, ahi, blo, bhi)
+        if prefix:
+            matches.append((alo, blo, prefix))
+        if suffix:
+            matches.append((ahi - suffix, bhi - suffix, suffix))
+        alo += prefix
+        blo += prefix
+        ahi -= suffix
+        bhi -= suffix
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        # Posição da linha em cada lado, ou -1 quando repetida
+        unique_a: Dict[int, int] = {}
+        for i in range(alo, ahi):
+            unique_a[a[i]] = -1 if a[i] in unique_a else i
+        unique_b: Dict[int, int] = {}
+        for j in range(blo, bhi):
+            unique_b[b[j]] = -1 if b[j] in unique_b else j
+
+        pairs = [
+            (i, unique_b[x]) for x, i in unique_a.items()
+            if i != -1 and unique_b.get(x, -1) != -1
+        ]
+        if not pairs:
+            _myers_region(a, b, alo, ahi, blo, bhi, matches, fallback=_histogram_region)
+            continue
+
+        pairs.sort()
+        anchors = _longest_increasing(pairs)
+
+        prev_a, prev_b = alo, blo
+        for i, j in anchors:
+            matches.append((i, j, 1))
+            stack.append((prev_a, i, prev_b, j))
+            prev_a, prev_b = i + 1, j + 1
+        stack.append((prev_a, ahi, prev_b, bhi))
+
+    return _finalize_matches(matches)
+
+
+def opcodes_from_matches(matches: List[Match], len_a: int, len_b: int) -> List[Opcode]:
+    """Converte blocos de correspondência em opcodes no formato de SequenceMatcher.get_opcodes()."""
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for ai, bj, size in matches + [(len_a, len_b, 0)]:
+        if i < ai and j < bj:
+            opcodes.append(('replace', i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(('delete', i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(('insert', i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(('equal', ai, i, bj, j))
+    return opcodes
+
+
+# Base e módulo do hash polinomial usado na detecção de blocos movidos
+_ROLLING_BASE = 1_000_003
+_ROLLING_MOD = (1 << 61) - 1
+# Candidatos verificados por janela (limita o custo com trechos muito repetidos)
+MOVED_MAX_CANDIDATES = 16
+
+
+def _rolling_hashes(seq: Sequence[int], start: int, end: int, window: int):
+    """Gera (posição, hash) de cada janela de `window` linhas dentro de [start, end)."""
+    if end - start < window:
+        return
+    power = pow(_ROLLING_BASE, window - 1, _ROLLING_MOD)
+    h = 0
+    for k in range(start, start + window):
+        h = (h * _ROLLING_BASE + seq[k] + 1) % _ROLLING_MOD
+    yield start, h
+    for pos in range(start + 1, end - window + 1):
+        h = ((h - (seq[pos - 1] + 1) * power) * _ROLLING_BASE + seq[pos + window - 1] + 1) % _ROLLING_MOD
+        yield pos, h
+
+
+def find_moved_runs(a: Sequence[int], deleted_runs: List[Tuple[int, int]],
+                    b: Sequence[int], inserted_runs: List[Tuple[int, int]],
+                    min_lines: int, trivial_ids=frozenset()) -> List[Match]:
+    """
+    Encontra trechos removidos em `a` que reaparecem, idênticos, como trechos
+    inseridos em `b`.
+
+    As janelas de `min_lines` linhas dos trechos inseridos são indexadas por
+    hash (rolling hash), então cada janela removida é localizada em tempo
+    constante e estendida enquanto as linhas coincidirem. Janelas formadas só
+    por linhas triviais (`trivial_ids`, ex.: linhas em branco) são ignoradas.
+
+    Returns:
+        list: (inicio_a, inicio_b, tamanho) de cada trecho movido
+    """
+    index: Dict[int, List[Tuple[int, int]]] = {}
+    for start, end in inserted_runs:
+        for pos, h in _rolling_hashes(b, start, end, min_lines):
+            index.setdefault(h, []).append((pos, end))
+
+    used_b = bytearray(len(b))
+    moves: List[Match] = []
+    for start, end in deleted_runs:
+        hashes = dict(_rolling_hashes(a, start, end, min_lines))
+        i = start
+        while i + min_lines <= end:
+            best = None
+            window = a[i:i + min_lines]
+            if not all(x in trivial_ids for x in window):
+                for j, run_end in index.get(hashes[i], ())[:MOVED_MAX_CANDIDATES]:
+                    if any(used_b[j:j + min_lines]) or b[j:j + min_lines] != window:
+                        continue
+                    size = min_lines
+                    while (i + size < end and j + size < run_end and not used_b[j + size]
+                           and a[i + size] == b[j + size]):
+                        size += 1
+                    if best is None or size > best[2]:
+                        best = (i, j, size)
+
+            if best is None:
+                i += 1
+                continue
+
+            moves.append(best)
+            _, j, size = best
+            used_b[j:j + size] = b'\x01' * size
+            i += size
+
+    return moves
+
+
+# Tokens de uma linha: palavras, espaços e pontuação isolada
+_TOKEN_RE = re.compile(r'\w+|\s+|[^\w\s]')
+# Acima desse número de tokens em um dos lados, o diff intra-linha só marca o
+# trecho entre o prefixo e o sufixo comuns (custo linear)
+INTRALINE_MAX_TOKENS = 400
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if start >= end:
+            continue
+        if merged and merged[-1][1] >= start:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def intraline_changes(left: str, right: str,
+                      max_tokens: int = INTRALINE_MAX_TOKENS) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """
+    Diff por palavras entre duas linhas substituídas.
+
+    Returns:
+        tuple: intervalos (coluna inicial, coluna final) alterados em cada lado
+    """
+    # Prefixo e sufixo comuns em caracteres (sempre barato)
+    limit = min(len(left), len(right))
+    prefix = 0
+    while prefix < limit and left[prefix] == right[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and left[-1 - suffix] == right[-1 - suffix]:
+        suffix += 1
+
+    left_mid = left[prefix:len(left) - suffix]
+    right_mid = right[prefix:len(right) - suffix]
+    tokens1 = _TOKEN_RE.findall(left_mid)
+    tokens2 = _TOKEN_RE.findall(right_mid)
+
+    if not tokens1 or not tokens2 or len(tokens1) > max_tokens or len(tokens2) > max_tokens:
+        return (_merge_ranges([(prefix, len(left) - suffix)]),
+                _merge_ranges([(prefix, len(right) - suffix)]))
+
+    ids: Dict[str, int] = {}
+    seq1 = array('l', [ids.setdefault(t, len(ids)) for t in tokens1])
+    seq2 = array('l', [ids.setdefault(t, len(ids)) for t in tokens2])
+    offsets1 = [prefix]
+    for token in tokens1:
+        offsets1.append(offsets1[-1] + len(token))
+    offsets2 = [prefix]
+    for token in tokens2:
+        offsets2.append(offsets2[-1] + len(token))
+
+    left_ranges = []
+    right_ranges = []
+    for tag, i1, i2, j1, j2 in opcodes_from_matches(myers_matches(seq1, seq2), len(seq1), len(seq2)):
+        if tag == 'equal':
+            continue
+        left_ranges.append((offsets1[i1], offsets1[i2]))
+        right_ranges.append((offsets2[j1], offsets2[j2]))
+
+    return _merge_ranges(left_ranges), _merge_ranges(right_ranges)
@@ -0,0 +1,164 @@
+import html
+import shutil
+import tempfile
+from typing import Iterable, Optional, Tuple
+
+from app.core.comparison_result import ComparisonEntry, ACTION_ALTER
+from app.core.winmerge_comparator import WinMergeLikeComparator
+
+# Linhas iguais mantidas ao redor de cada diferença; o restante é recolhido
+REPORT_CONTEXT_LINES = 3
+# Tamanho do buffer (bytes) usado na escrita do relatório em disco
+REPORT_WRITE_BUFFER = 1 << 20
+
+_REPORT_STYLE = """
+    body { font-family: 'Courier New', monospace; font-size: 12px; }
+    h2, h3 { font-family: Arial, sans-serif; }
+    table { border-collapse: collapse; width: 100%; }
+    .index td, .index th { padding: 2px 8px; border-bottom: 1px solid #eee; text-align: left; }
+    .diff { table-layout: fixed; margin-bottom: 24px; border: 1px solid #ccc; }
+    .diff td { padding: 1px 5px; white-space: pre-wrap; word-wrap: break-word; vertical-align: top; }
+    .diff td.ln { width: 48px; color: #999; text-align: right; background-color: #f0f0f0; }
+    .equal { background-color: white; }
+    .modified { background-color: #ffffcc; }
+    .added { background-color: #ccffcc; }
+    .deleted { background-color: #ffcccc; }
+    .moved { background-color: #e0e8ff; }
+    .empty { background-color: #f5f5f5; }
+    .skip td { background-color: #f0f0f0; color: #666; text-align: center; font-style: italic; }
+"""
+
+
+class HtmlReportWriter:
+    """
+    Gera um único relatório HTML para uma execução inteira de comparação.
+
+    O relatório tem um índice com os objetos alterados seguido de uma seção
+    lado a lado para cada um, com os trechos iguais recolhidos. Os pares são
+    consumidos um a um e cada seção é escrita em disco assim que fica pronta,
+    então a memória usada não cresce com o número de objetos. Só os blocos
+    do diff são calculados (ou lidos do DiffCache do comparador), sem gerar
+    a saída formatada.
+    """
+
+    def __init__(self, comparator: Optional[WinMergeLikeComparator] = None,
+                 context: int = REPORT_CONTEXT_LINES,
+                 source_label: str = "Source", target_label: str = "Target"):
+        self.comparator = comparator or WinMergeLikeComparator()
+        self.context = context
+        self.source_label = source_label
+        self.target_label = target_label
+
+    def write(self, path: str, pairs: Iterable[Tuple[str, str, str]],
+              title: str = "Comparison Report", object_kind: str = "Object") -> dict:
+        """
+        Compara os pares (nome, texto1, texto2) e grava o relatório em `path`.
+        `object_kind` é o título da coluna de nomes no índice (ex.: 'Procedure').
+
+        Returns:
+            dict: totais com 'compared', 'different' e 'identical'
+        """
+        items = ((name, None, text1, text2, None) for name, text1, text2 in pairs)
+        return self._write(path, items, title, object_kind)
+
+    def write_entries(self, path: str, entries: Iterable[ComparisonEntry],
+                      title: str = "Comparison Report", object_kind: str = "Object") -> dict:
+        """
+        Grava o relatório a partir dos objetos 'Alter' de uma comparação já
+        feita. Os corpos precisam ser os textos originais; objetos com
+        diff_blocks reaproveitam esses blocos em vez de comparar de novo.
+
+        Returns:
+            dict: totais com 'compared', 'different' e 'identical'
+        """
+        items = (
+            (entry.object_name, entry.object_type, entry.source_body or "",
+             entry.target_body or "", entry.diff_blocks)
+            for entry in entries if entry.action == ACTION_ALTER
+        )
+        return self._write(path, items, title, object_kind)
+
+    def _write(self, path: str, items, title: str, object_kind: str) -> dict:
+        totals = {'compared': 0, 'different': 0, 'identical': 0}
+        index_rows = []
+        with_types = False
+
+        # As seções vão para um arquivo temporário porque o índice, que vem
+        # antes delas no HTML, só fica completo no final
+        with tempfile.TemporaryFile('w+', encoding='utf-8', newline='\n') as sections:
+            for name, object_type, text1, text2, blocks in items:
+                totals['compared'] += 1
+                if blocks is None:
+                    self.comparator.compare_blocks(text1, text2)
+                else:
+                    self.comparator.load_blocks(text1, text2, blocks)
+                if not self.comparator.has_differences():
+                    totals['identical'] += 1
+                    continue
+
+                totals['different'] += 1
+                with_types = with_types or object_type is not None
+                anchor = f"obj-{totals['different']}"
+                stats = self.comparator.get_statistics()
+                index_rows.append((anchor, name, object_type, stats))
+                self._write_section(sections, anchor, name, stats)
+
+            with open(path, 'w', encoding='utf-8', newline='\n',
+                      buffering=REPORT_WRITE_BUFFER) as output:
+                self._write_header(output, title, totals)
+                type_header = '<th>Type</th>' if with_types else ''
+                output.write(f'<table class="index"><tr><th>{html.escape(object_kind)}</th>'
+                             f'{type_header}<th>Modified</th><th>Added</th><th>Deleted</th>'
+                             '<th>Moved</th></tr>\n')
+                output.writelines(self._index_row(*row, with_types=with_types) for row in index_rows)
+                output.write('</table>\n')
+                sections.seek(0)
+                shutil.copyfileobj(sections, output)
+                output.write('</body>\n</html>\n')
+
+        return totals
+
+    def _index_row(self, anchor: str, name: str, object_type: Optional[str], stats: dict,
+                   with_types: bool = False) -> str:
+        type_cell = f'<td>{html.escape(object_type or "")}</td>' if with_types else ''
+        return (f'<tr><td><a href="#{anchor}">{html.escape(name)}</a></td>{type_cell}'
+                f"<td>{stats['modified_lines']}</td><td>{stats['added_lines']}</td>"
+                f"<td>{stats['deleted_lines']}</td><td>{stats['moved_lines']}</td></tr>\n")
+
+    def _write_header(self, output, title: str, totals: dict):
+        output.write(f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+                     f'<title>{html.escape(title)}</title>\n'
+                     f'<style>{_REPORT_STYLE}</style>\n</head>\n<body>\n'
+                     f'<h2>{html.escape(title)}</h2>\n'
+                     f"<p>{totals['compared']} compared, {totals['different']} with differences, "
+                     f"{totals['identical']} identical.</p>\n")
+
+    def _write_section(self, output, anchor: str, name: str, stats: dict):
+        """Escreve a visão lado a lado da última comparação do comparador."""
+        output.write(f'<h3 id="{anchor}">{html.escape(name)}</h3>\n'
+                     f"<p>Similarity: {stats['similarity_ratio']:.1%}</p>\n"
+                     f'<table class="diff"><colgroup><col style="width:48px"><col>'
+                     f'<col style="width:48px"><col></colgroup>\n'
+                     f'<tr><th></th><th>{html.escape(self.source_label)}</th>'
+                     f'<th></th><th>{html.escape(self.target_label)}</th></tr>\n')
+
+        rows = []
+        for row in self.comparator.iter_side_by_side_rows(self.context):
+            if row[0] == 'skip':
+                rows.append(f'<tr class="skip"><td colspan="4">... {row[1]} identical lines ...</td></tr>\n')
+                continue
+
+            css_class, left_number, left_text, right_number, right_text = row
+            rows.append(f'<tr class="{css_class}">{self._cells(left_number, left_text)}'
+                        f'{self._cells(right_number, right_text)}</tr>\n')
+            if len(rows) >= 1000:
+                output.writelines(rows)
+                rows.clear()
+
+        rows.append('</table>\n')
+        output.writelines(rows)
+
+    def _cells(self, number: Optional[int], text: Optional[str]) -> str:
+        if number is None:
+            return '<td class="ln empty"></td><td class="empty"></td>'
+        return f'<td class="ln">{number}</td><td>{html.escape(text, quote=False)}</td>'
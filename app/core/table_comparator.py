@@ -0,0 +1,221 @@
+from collections import namedtuple
+from typing import Any, Dict, List, Optional
+
+# Tipos cujo tamanho faz parte da declaração (nvarchar/nchar guardam 2 bytes por caractere)
+_SIZED_TYPES = {'varchar', 'char', 'varbinary', 'binary', 'nvarchar', 'nchar'}
+_UNICODE_TYPES = {'nvarchar', 'nchar'}
+_PRECISION_TYPES = {'decimal', 'numeric'}
+_SCALE_TYPES = {'datetime2', 'time', 'datetimeoffset'}
+
+# Uma diferença estrutural: kind = 'column' | 'index' | 'foreign_key' | 'check',
+# change = 'added' (só no source) | 'dropped' (só no target) | 'altered'
+TableChange = namedtuple("TableChange", "kind change item_name source_definition target_definition")
+
+# Resultado por tabela: status = 'missing' (não existe no target) | 'altered'.
+# source_body/target_body usam os mesmos marcadores da saída do WinMergeLikeComparator
+TableComparison = namedtuple(
+    "TableComparison",
+    "table_name status source_modified target_modified changes source_body target_body"
+)
+
+
+def _column_type(column) -> str:
+    type_name = column.type_name
+    if type_name in _SIZED_TYPES:
+        if column.max_length == -1:
+            return f"{type_name}(max)"
+        length = column.max_length // 2 if type_name in _UNICODE_TYPES else column.max_length
+        return f"{type_name}({length})"
+    if type_name in _PRECISION_TYPES:
+        return f"{type_name}({column.precision}, {column.scale})"
+    if type_name in _SCALE_TYPES:
+        return f"{type_name}({column.scale})"
+    return type_name
+
+
+def describe_column(column) -> str:
+    """Descrição de uma coluna no estilo DDL (usada na exibição e na comparação)."""
+    if column.computed_definition is not None:
+        return f"COLUMN [{column.column_name}] AS {column.computed_definition}"
+    parts = [f"COLUMN [{column.column_name}] {_column_type(column)}"]
+    if column.collation_name:
+        parts.append(f"COLLATE {column.collation_name}")
+    if column.is_identity:
+        parts.append("IDENTITY")
+    parts.append("NULL" if column.is_nullable else "NOT NULL")
+    if column.default_definition is not None:
+        parts.append(f"DEFAULT {column.default_definition}")
+    return " ".join(parts)
+
+
+def describe_index(index) -> str:
+    keys = ", ".join(f"[{name}] {'DESC' if descending else 'ASC'}" for name, descending in index.key_columns)
+    if index.is_primary_key:
+        text = f"PRIMARY KEY {index.index_type} ({keys})"
+    elif index.is_unique_constraint:
+        text = f"UNIQUE {index.index_type} ({keys})"
+    else:
+        unique = "UNIQUE " if index.is_unique else ""
+        text = f"{unique}{index.index_type} INDEX ({keys})"
+    if index.included_columns:
+        text += " INCLUDE (" + ", ".join(f"[{name}]" for name in index.included_columns) + ")"
+    if index.filter_definition:
+        text += f" WHERE {index.filter_definition}"
+    return text if index.is_system_named else f"[{index.index_name}] {text}"
+
+
+def describe_foreign_key(foreign_key) -> str:
+    columns = ", ".join(f"[{name}]" for name in foreign_key.columns)
+    referenced = ", ".join(f"[{name}]" for name in foreign_key.referenced_columns)
+    text = (f"FOREIGN KEY ({columns}) REFERENCES {foreign_key.referenced_table} ({referenced})"
+            f" ON DELETE {foreign_key.delete_action} ON UPDATE {foreign_key.update_action}")
+    if foreign_key.is_disabled:
+        text += " DISABLED"
+    return text if foreign_key.is_system_named else f"[{foreign_key.constraint_name}] {text}"
+
+
+def describe_check(check) -> str:
+    text = f"CHECK {check.definition}"
+    if check.is_disabled:
+        text += " DISABLED"
+    return text if check.is_system_named else f"[{check.constraint_name}] {text}"
+
+
+def _index_key(index):
+    # Nomes gerados pelo SQL Server (PK__Tabela__3213E83F...) mudam entre bancos:
+    # nesses casos o item é casado pela estrutura e não pelo nome
+    if index.is_system_named:
+        if index.is_primary_key:
+            return ('PRIMARY KEY',)
+        return ('UNIQUE', index.key_columns)
+    return index.index_name
+
+
+def _foreign_key_key(foreign_key):
+    if foreign_key.is_system_named:
+        return ('FOREIGN KEY', foreign_key.columns, foreign_key.referenced_table)
+    return foreign_key.constraint_name
+
+
+def _check_key(check):
+    if check.is_system_named:
+        return ('CHECK', check.definition)
+    return check.constraint_name
+
+
+# (tipo, atributo do esquema, chave de casamento, descrição, nome exibido)
+_ITEM_KINDS = (
+    ('column', 'columns', lambda c: c.column_name, describe_column, lambda c: c.column_name),
+    ('index', 'indexes', _index_key, describe_index, lambda i: i.index_name),
+    ('foreign_key', 'foreign_keys', _foreign_key_key, describe_foreign_key, lambda f: f.constraint_name),
+    ('check', 'check_constraints', _check_key, describe_check, lambda c: c.constraint_name),
+)
+
+
+class TableSchemaComparator:
+    """
+    Compara a estrutura das tabelas de dois bancos de forma estrutural.
+
+    Recebe os esquemas lidos em lote (colunas, índices, chaves estrangeiras e
+    checks de todas as tabelas; ver DatabaseConnectionManager.get_tables_schema),
+    monta índices em memória por tabela e nome do item e compara item a item,
+    sem gerar DDL nem rodar o diff de texto. Itens com nome gerado pelo sistema
+    são casados pela estrutura. Tabelas que existem apenas no target são ignoradas,
+    como os demais objetos.
+    """
+
+    def _index_schema(self, schema) -> Dict[str, Dict[str, Dict[Any, Any]]]:
+        """tabela -> tipo de item -> chave -> registro"""
+        indexed: Dict[str, Dict[str, Dict[Any, Any]]] = {}
+        for kind, attribute, key, _, _ in _ITEM_KINDS:
+            for item in getattr(schema, attribute):
+                indexed.setdefault(item.table_name, {}).setdefault(kind, {})[key(item)] = item
+        return indexed
+
+    def compare(self, source, target) -> List[TableComparison]:
+        """
+        Compara os esquemas de tabelas de source e target.
+
+        Returns:
+            list: um TableComparison por tabela ausente ou alterada no target,
+                  ordenado pelo nome da tabela
+        """
+        source_items = self._index_schema(source)
+        target_items = self._index_schema(target)
+        target_tables = {table.table_name: table for table in target.tables}
+
+        results = []
+        for table in sorted(source.tables, key=lambda t: t.table_name):
+            target_table = target_tables.get(table.table_name)
+            source_table_items = source_items.get(table.table_name, {})
+
+            if target_table is None:
+                changes = [
+                    TableChange(kind, 'added', name, definition, None)
+                    for kind, _, name, definition, _ in self._iter_items(source_table_items, {})
+                ]
+                results.append(TableComparison(
+                    table.table_name, 'missing', table.last_modified_date, None, changes,
+                    "\n".join(change.source_definition for change in changes), None
+                ))
+                continue
+
+            comparison = self._compare_table(
+                table, target_table, source_table_items, target_items.get(table.table_name, {})
+            )
+            if comparison is not None:
+                results.append(comparison)
+
+        return results
+
+    def _iter_items(self, source_items, target_items):
+        """
+        Percorre os itens das duas tabelas, na ordem de exibição:
+        (tipo, chave, nome, definição source, definição target).
+        """
+        for kind, _, _, describe, name_of in _ITEM_KINDS:
+            source_kind = source_items.get(kind, {})
+            target_kind = target_items.get(kind, {})
+            keys = list(source_kind)
+            if kind == 'column':
+                keys.sort(key=lambda k: source_kind[k].column_id)
+            keys.extend(k for k in target_kind if k not in source_kind)
+
+            for key in keys:
+                source_item = source_kind.get(key)
+                target_item = target_kind.get(key)
+                yield (
+                    kind, key, name_of(source_item or target_item),
+                    describe(source_item) if source_item is not None else None,
+                    describe(target_item) if target_item is not None else None
+                )
+
+    def _compare_table(self, source_table, target_table, source_items,
+                       target_items) -> Optional[TableComparison]:
+        changes = []
+        source_lines = []
+        target_lines = []
+        for kind, _, name, source_definition, target_definition in self._iter_items(source_items, target_items):
+            if source_definition == target_definition:
+                source_lines.append(f"  {source_definition}")
+                target_lines.append(f"  {target_definition}")
+            elif target_definition is None:
+                changes.append(TableChange(kind, 'added', name, source_definition, None))
+                source_lines.append(f"- {source_definition}")
+                target_lines.append("")
+            elif source_definition is None:
+                changes.append(TableChange(kind, 'dropped', name, None, target_definition))
+                source_lines.append("")
+                target_lines.append(f"+ {target_definition}")
+            else:
+                changes.append(TableChange(kind, 'altered', name, source_definition, target_definition))
+                source_lines.append(f"~ {source_definition}")
+                target_lines.append(f"~ {target_definition}")
+
+        if not changes:
+            return None
+        return TableComparison(
+            source_table.table_name, 'altered',
+            source_table.last_modified_date, target_table.last_modified_date,
+            changes, "\n".join(source_lines), "\n".join(target_lines)
+        )
@@ -1,19 +1,41 @@
 import difflib
+from collections.abc import Sequence
 from typing import Optional, Tuple, List, Dict, Any, Union
 from enum import Enum
+from functools import lru_cache, partial
 import re
+from bisect import bisect_right
+from app.core.diff_engines import (
+    intern_lines, myers_matches, histogram_matches, patience_matches, opcodes_from_matches,
+    find_moved_runs
+)
+from app.core.diff_cache import DiffCache
+
+# Quantidade máxima de linhas distintas memorizadas pela normalização
+NORMALIZE_CACHE_SIZE = 65536
+# Menor trecho (em linhas) considerado como bloco movido
+MOVED_BLOCK_MIN_LINES = 3
 
 
 class DiffAlgorithm(Enum):
     """Algoritmos de comparação disponíveis."""
     DEFAULT = "default"
-    MINIMAL = "minimal"  # Similar ao algoritmo Myers
+    MINIMAL = "minimal"  # Algoritmo de Myers O(ND) (diff mínimo)
+    HISTOGRAM = "histogram"  # Âncoras nas linhas menos frequentes (como o git)
+    PATIENCE = "patience"  # Âncoras nas linhas únicas em ambos os lados
     NONE = "none"       # Comparação linha por linha sem alinhamento
     QUICK = "quick"     # Comparação rápida
 
 
 class IgnoreOptions:
-    """Opções para ignorar diferenças durante a comparação."""
+    """
+    Opções para ignorar diferenças durante a comparação.
+
+    As opções são compiladas uma única vez (regex combinada + função de
+    normalização) e o resultado por linha é memorizado em um cache LRU, já que
+    linhas como 'BEGIN', 'END' e 'SET NOCOUNT ON;' se repetem em todas as
+    procedures. A compilação é refeita automaticamente se as opções mudarem.
+    """
     
     def __init__(self):
         self.ignore_whitespace = False
@@ -21,48 +43,164 @@ class IgnoreOptions:
         self.ignore_blank_lines = False
         self.ignore_line_endings = False
         self.ignore_regex_patterns: List[str] = []
+        self._compiled = None
+        self._compiled_signature = None
+
+    def _signature(self) -> tuple:
+        return (self.ignore_whitespace, self.ignore_case, self.ignore_blank_lines,
+                self.ignore_line_endings, tuple(self.ignore_regex_patterns))
+
+    def _compile(self):
+        """Retorna (should_ignore, normalize, preprocess) para as opções atuais."""
+        signature = self._signature()
+        if signature != self._compiled_signature:
+            self._compiled = self._build_pipeline(*signature)
+            self._compiled_signature = signature
+        return self._compiled
+
+    @staticmethod
+    def _build_pipeline(ignore_whitespace, ignore_case, ignore_blank_lines,
+                        ignore_line_endings, patterns):
+        match_any = None
+        if patterns:
+            compiled = [re.compile(p) for p in patterns]
+            match_any = lambda line: any(c.match(line) for c in compiled)
+            # Combinar renumera os grupos e quebraria referências como \1:
+            # só padrões sem grupos de captura viram uma regex única
+            if all(c.groups == 0 for c in compiled):
+                try:
+                    match_any = re.compile('|'.join(f'(?:{p})' for p in patterns)).match
+                except re.error:
+                    # Padrões que não podem ser combinados (ex.: flags globais) são testados um a um
+                    pass
+
+        def should_ignore(line: str) -> bool:
+            if ignore_blank_lines and not line.strip():
+                return True
+            return match_any is not None and bool(match_any(line))
+
+        def normalize(line: str) -> str:
+            if ignore_line_endings:
+                line = line.rstrip('\r\n')
+            if ignore_whitespace:
+                line = ' '.join(line.split())
+            if ignore_case:
+                line = line.lower()
+            return line
+
+        @lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+        def preprocess(line: str) -> Optional[str]:
+            if should_ignore(line):
+                return None
+            return normalize(line)
+
+        return should_ignore, normalize, preprocess
         
     def should_ignore_line(self, line: str) -> bool:
         """Verifica se uma linha deve ser ignorada baseada nas opções."""
-        if self.ignore_blank_lines and not line.strip():
-            return True
-            
-        for pattern in self.ignore_regex_patterns:
-            if re.match(pattern, line):
-                return True
-                
-        return False
+        return self._compile()[0](line)
     
     def normalize_line(self, line: str) -> str:
         """Normaliza uma linha baseada nas opções de ignore."""
-        normalized = line
-        
-        if self.ignore_line_endings:
-            normalized = normalized.rstrip('\r\n')
-            
-        if self.ignore_whitespace:
-            normalized = ' '.join(normalized.split())
-            
-        if self.ignore_case:
-            normalized = normalized.lower()
-            
-        return normalized
+        return self._compile()[1](line)
+
+    def preprocess_line(self, line: str) -> Optional[str]:
+        """
+        Retorna a linha normalizada, ou None se ela deve ser ignorada.
+        Resultado memorizado por conteúdo da linha.
+        """
+        return self._compile()[2](line)
+
+    def get_preprocessor(self):
+        """Retorna a função memorizada usada por preprocess_line (para laços)."""
+        return self._compile()[2]
+
+
+class LineView(Sequence):
+    """
+    Visão somente leitura de um intervalo de linhas, sem copiá-las.
+    Referencia a lista de linhas compartilhada por todos os blocos de uma comparação.
+    """
+    __slots__ = ('_lines', '_start', '_end')
+
+    def __init__(self, lines: List[str], start: int, end: int):
+        self._lines = lines
+        self._start = start
+        self._end = max(start, end)
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._lines[i] for i in range(self._start, self._end)[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("LineView index out of range")
+        return self._lines[self._start + index]
+
+    def __iter__(self):
+        lines = self._lines
+        for i in range(self._start, self._end):
+            yield lines[i]
+
+    def __eq__(self, other):
+        # Igual a qualquer sequência (lista, tupla, outra visão) com as mesmas linhas
+        if isinstance(other, (str, bytes)) or not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LineView({list(self)!r})"
 
 
 class DiffBlock:
-    """Representa um bloco de diferença encontrado."""
-    
-    def __init__(self, block_type: str, left_start: int, left_end: int, 
-                 right_start: int, right_end: int, 
-                 left_lines: List[str] = None, right_lines: List[str] = None):
-        self.type = block_type  # 'equal', 'replace', 'delete', 'insert'
+    """
+    Representa um bloco de diferença encontrado.
+
+    Guarda apenas os intervalos; as linhas são obtidas sob demanda a partir
+    das listas compartilhadas (left_source/right_source).
+    """
+    __slots__ = ('type', 'left_start', 'left_end', 'right_start', 'right_end',
+                 'left_source', 'right_source')
+
+    def __init__(self, block_type: str, left_start: int, left_end: int,
+                 right_start: int, right_end: int,
+                 left_source: List[str] = (), right_source: List[str] = ()):
+        self.type = block_type  # 'equal', 'replace', 'delete', 'insert', 'move_from', 'move_to'
         self.left_start = left_start
         self.left_end = left_end
         self.right_start = right_start
         self.right_end = right_end
-        self.left_lines = left_lines or []
-        self.right_lines = right_lines or []
-        
+        self.left_source = left_source
+        self.right_source = right_source
+
+    @property
+    def left_lines(self) -> LineView:
+        """Linhas do lado esquerdo (visão sem cópia)."""
+        return LineView(self.left_source, self.left_start, self.left_end)
+
+    @property
+    def right_lines(self) -> LineView:
+        """Linhas do lado direito (visão sem cópia)."""
+        return LineView(self.right_source, self.right_start, self.right_end)
+
+    @property
+    def is_moved(self) -> bool:
+        """Indica se o bloco é um trecho movido ('move_from' ou 'move_to')."""
+        return self.type in ('move_from', 'move_to')
+
+    @property
+    def left_count(self) -> int:
+        return self.left_end - self.left_start
+
+    @property
+    def right_count(self) -> int:
+        return self.right_end - self.right_start
+
     def __repr__(self):
         return f"DiffBlock({self.type}, L{self.left_start}-{self.left_end}, R{self.right_start}-{self.right_end})"
 
@@ -79,11 +217,18 @@ class WinMergeLikeComparator:
     - Visualização lado a lado
     """
     
-    def __init__(self, algorithm: DiffAlgorithm = DiffAlgorithm.DEFAULT):
+    def __init__(self, algorithm: DiffAlgorithm = DiffAlgorithm.DEFAULT,
+                 detect_moved_blocks: bool = True, cache: Optional[DiffCache] = None):
         self.algorithm = algorithm
+        self.detect_moved_blocks = detect_moved_blocks
+        self.cache = cache
         self.ignore_options = IgnoreOptions()
         self.diff_blocks: List[DiffBlock] = []
         self.similarity_ratio = 0.0
+        self._exact_similarity_ratio: Optional[float] = None
+        self._processed_lines: Tuple[List[str], List[str]] = ([], [])
+        self._original_lines: Tuple[List[str], List[str]] = ([], [])
+        self._line_mappings: Tuple[Sequence, Sequence] = (range(0), range(0))
         
     def set_ignore_options(self, **options):
         """Configura opções para ignorar diferenças."""
@@ -98,75 +243,100 @@ class WinMergeLikeComparator:
         """
         processed_lines = []
         line_mapping = []
+        preprocess = self.ignore_options.get_preprocessor()
         
         for i, line in enumerate(lines):
-            if not self.ignore_options.should_ignore_line(line):
-                normalized = self.ignore_options.normalize_line(line)
+            normalized = preprocess(line)
+            if normalized is not None:
                 processed_lines.append(normalized)
                 line_mapping.append(i)
                 
         return processed_lines, line_mapping
     
-    def _myers_like_diff(self, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
-        """
-        Implementa um algoritmo similar ao algoritmo de Myers usado pelo WinMerge.
-        Baseado na Longest Common Subsequence (LCS) para melhor alinhamento.
-        """
-        # Usar SequenceMatcher com heurística para melhor performance
-        matcher = difflib.SequenceMatcher(
-            isjunk=None, 
-            a=lines1, 
-            b=lines2,
-            autojunk=False
-        )
-        
+    def _blocks_from_opcodes(self, opcodes, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
+        """Converte opcodes (tag, i1, i2, j1, j2) em blocos de diferença."""
         blocks = []
-        opcodes = matcher.get_opcodes()
-        
         for tag, i1, i2, j1, j2 in opcodes:
-            left_lines = lines1[i1:i2] if i1 < i2 else []
-            right_lines = lines2[j1:j2] if j1 < j2 else []
-            
             block = DiffBlock(
                 block_type=tag,
                 left_start=i1,
                 left_end=i2,
                 right_start=j1,
                 right_end=j2,
-                left_lines=left_lines,
-                right_lines=right_lines
+                left_source=lines1,
+                right_source=lines2
             )
             blocks.append(block)
-            
         return blocks
+
+    def _engine_diff(self, lines1: List[str], lines2: List[str], matcher) -> List[DiffBlock]:
+        """
+        Executa um dos algoritmos nativos sobre as linhas convertidas em IDs inteiros.
+        """
+        seq1, seq2 = intern_lines(lines1, lines2)
+        matches = matcher(seq1, seq2)
+        opcodes = opcodes_from_matches(matches, len(seq1), len(seq2))
+        return self._blocks_from_opcodes(opcodes, lines1, lines2)
+
+    def _myers_diff(self, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
+        """
+        Algoritmo de Myers O(ND), o mesmo usado por padrão pelo WinMerge.
+        Produz o menor número de inserções/remoções; regiões cujo custo passa
+        de MYERS_MINIMAL_MAX_COST (ex.: um texto contra sua versão invertida)
+        são alinhadas pelo histogram para não travar a comparação.
+        """
+        return self._engine_diff(lines1, lines2, partial(myers_matches, minimal=True))
+
+    def _default_diff(self, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
+        """
+        Myers com o custo limitado como no xdiff: mínimo na maioria dos casos;
+        em textos muito divergentes divide em snakes longas ou recorre ao
+        histogram, sem explodir o tempo.
+        """
+        return self._engine_diff(lines1, lines2, myers_matches)
+
+    def _histogram_diff(self, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
+        """
+        Algoritmo histogram: alinha primeiro as linhas mais raras, o que evita
+        alinhamentos estranhos em linhas repetidas (END, GO, linhas em branco).
+        """
+        return self._engine_diff(lines1, lines2, histogram_matches)
+
+    def _patience_diff(self, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
+        """
+        Algoritmo patience: alinha primeiro as linhas únicas em ambos os textos.
+        """
+        return self._engine_diff(lines1, lines2, patience_matches)
     
     def _none_algorithm_diff(self, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
         """
         Algoritmo 'none' - comparação linha por linha sem alinhamento automático.
         Similar à opção 'none' do WinMerge.
+        Linhas consecutivas do mesmo tipo são agrupadas em um único bloco.
         """
         blocks = []
-        max_lines = max(len(lines1), len(lines2))
-        
-        for i in range(max_lines):
-            line1 = lines1[i] if i < len(lines1) else None
-            line2 = lines2[i] if i < len(lines2) else None
-            
-            if line1 is None:
-                # Inserção
-                block = DiffBlock('insert', i, i, i, i+1, [], [line2])
-            elif line2 is None:
-                # Deleção
-                block = DiffBlock('delete', i, i+1, i, i, [line1], [])
-            elif line1 == line2:
-                # Igual
-                block = DiffBlock('equal', i, i+1, i, i+1, [line1], [line2])
-            else:
-                # Substituição
-                block = DiffBlock('replace', i, i+1, i, i+1, [line1], [line2])
-                
-            blocks.append(block)
-            
+        len1 = len(lines1)
+        len2 = len(lines2)
+        common = min(len1, len2)
+
+        i = 0
+        while i < common:
+            # Igual ou substituição, estendido enquanto o tipo se mantiver
+            is_equal = lines1[i] == lines2[i]
+            j = i + 1
+            while j < common and (lines1[j] == lines2[j]) == is_equal:
+                j += 1
+            blocks.append(DiffBlock('equal' if is_equal else 'replace',
+                                    i, j, i, j, lines1, lines2))
+            i = j
+
+        if len1 > common:
+            # Deleção
+            blocks.append(DiffBlock('delete', common, len1, len2, len2, lines1, lines2))
+        elif len2 > common:
+            # Inserção
+            blocks.append(DiffBlock('insert', len1, len1, common, len2, lines1, lines2))
+
         return blocks
     
     def _quick_diff(self, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
@@ -185,29 +355,121 @@ class WinMergeLikeComparator:
             autojunk=True
         )
         
-        blocks = []
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            block = DiffBlock(
-                block_type=tag,
-                left_start=i1,
-                left_end=i2,
-                right_start=j1,
-                right_end=j2,
-                left_lines=lines1[i1:i2],
-                right_lines=lines2[j1:j2]
-            )
-            blocks.append(block)
-            
-        return blocks
+        return self._blocks_from_opcodes(matcher.get_opcodes(), lines1, lines2)
     
+    @staticmethod
+    def _split_range(start: int, end: int, moved: List[Tuple[int, int]],
+                     moved_starts: List[int]) -> List[Tuple[int, int, bool]]:
+        """Divide [start, end) em trechos (inicio, fim, movido) conforme os intervalos movidos."""
+        pieces = []
+        pos = start
+        k = max(bisect_right(moved_starts, start) - 1, 0)
+        while pos < end:
+            if k < len(moved) and moved[k][1] <= pos:
+                k += 1
+                continue
+            if k < len(moved) and moved[k][0] <= pos:
+                piece_end = min(moved[k][1], end)
+                pieces.append((pos, piece_end, True))
+            else:
+                piece_end = min(moved[k][0], end) if k < len(moved) else end
+                pieces.append((pos, piece_end, False))
+            pos = piece_end
+        return pieces
+
+    @staticmethod
+    def _split_block(left_pieces: List[Tuple[int, int, bool]], right_pieces: List[Tuple[int, int, bool]],
+                     left_pos: int, right_pos: int, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
+        """
+        Remonta um bloco com trechos movidos: os trechos movidos viram
+        'move_from'/'move_to' e os restos não movidos dos dois lados, entre os
+        mesmos movimentos, continuam pareados como 'replace' (ou 'delete'/'insert'
+        quando só um lado sobra), mantendo o alinhamento e o destaque intra-linha.
+        """
+        result = []
+        i = j = 0
+        while i < len(left_pieces) or j < len(right_pieces):
+            if i < len(left_pieces) and left_pieces[i][2]:
+                start, end, _ = left_pieces[i]
+                result.append(DiffBlock('move_from', start, end, right_pos, right_pos, lines1, lines2))
+                left_pos = end
+                i += 1
+            elif j < len(right_pieces) and right_pieces[j][2]:
+                start, end, _ = right_pieces[j]
+                result.append(DiffBlock('move_to', left_pos, left_pos, start, end, lines1, lines2))
+                right_pos = end
+                j += 1
+            elif i < len(left_pieces) and j < len(right_pieces):
+                left_start, left_end, _ = left_pieces[i]
+                right_start, right_end, _ = right_pieces[j]
+                result.append(DiffBlock('replace', left_start, left_end, right_start, right_end,
+                                        lines1, lines2))
+                left_pos, right_pos = left_end, right_end
+                i += 1
+                j += 1
+            elif i < len(left_pieces):
+                start, end, _ = left_pieces[i]
+                result.append(DiffBlock('delete', start, end, right_pos, right_pos, lines1, lines2))
+                left_pos = end
+                i += 1
+            else:
+                start, end, _ = right_pieces[j]
+                result.append(DiffBlock('insert', left_pos, left_pos, start, end, lines1, lines2))
+                right_pos = end
+                j += 1
+        return result
+
     def _detect_moved_blocks(self, blocks: List[DiffBlock]) -> List[DiffBlock]:
         """
         Detecta blocos de texto que foram movidos (similar ao WinMerge).
-        Esta é uma implementação simplificada da detecção de blocos movidos.
+
+        Trechos removidos que reaparecem idênticos como inseridos (com ao menos
+        MOVED_BLOCK_MIN_LINES linhas) viram blocos 'move_from' (lado esquerdo) e
+        'move_to' (lado direito). A busca usa um índice de hashes das janelas
+        inseridas, sem comparar blocos dois a dois.
         """
-        # TODO: Implementar detecção de blocos movidos mais sofisticada
-        # Por agora, retorna os blocos originais
-        return blocks
+        if not self.detect_moved_blocks or not blocks:
+            return blocks
+
+        deleted_runs = [(b.left_start, b.left_end) for b in blocks
+                        if b.type in ('delete', 'replace') and b.left_count]
+        inserted_runs = [(b.right_start, b.right_end) for b in blocks
+                         if b.type in ('insert', 'replace') and b.right_count]
+        if not deleted_runs or not inserted_runs:
+            return blocks
+
+        lines1 = blocks[0].left_source
+        lines2 = blocks[0].right_source
+        ids1, ids2 = intern_lines(lines1, lines2)
+        trivial_ids = {ids1[i] for i, line in enumerate(lines1) if not line.strip()}
+        trivial_ids.update(ids2[j] for j, line in enumerate(lines2) if not line.strip())
+
+        moves = find_moved_runs(ids1, deleted_runs, ids2, inserted_runs,
+                                MOVED_BLOCK_MIN_LINES, trivial_ids)
+        if not moves:
+            return blocks
+
+        moved_left = sorted((i, i + size) for i, _, size in moves)
+        moved_right = sorted((j, j + size) for _, j, size in moves)
+        left_starts = [start for start, _ in moved_left]
+        right_starts = [start for start, _ in moved_right]
+
+        result = []
+        for block in blocks:
+            if block.type == 'equal':
+                result.append(block)
+                continue
+
+            left_pieces = self._split_range(block.left_start, block.left_end, moved_left, left_starts)
+            right_pieces = self._split_range(block.right_start, block.right_end, moved_right, right_starts)
+            if not any(moved for _, _, moved in left_pieces + right_pieces):
+                result.append(block)
+                continue
+
+            result.extend(self._split_block(left_pieces, right_pieces,
+                                            block.left_start, block.right_start, lines1, lines2))
+
+        return result
     
     def compare(self, text1: str, text2: str) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -221,6 +483,58 @@ class WinMergeLikeComparator:
             tuple: (formatted_text1, formatted_text2) com marcadores de diferença,
                    ou (None, None) se não houver diferenças
         """
+        self._compute_blocks(text1, text2)
+        
+        # Verificar se há diferenças
+        if not self.has_differences():
+            return None, None
+        
+        # Gerar saída formatada
+        return self._format_output(*self._original_lines)
+
+    def compare_blocks(self, text1: str, text2: str) -> List[Tuple[str, int, int, int, int]]:
+        """
+        Compara dois textos sem formatar a saída.
+
+        Returns:
+            list: blocos compactos (tipo, i1, i2, j1, j2), que podem ser
+                  formatados depois com format_blocks
+        """
+        self._compute_blocks(text1, text2)
+        return self._compact_blocks()
+
+    def format_blocks(self, text1: str, text2: str,
+                      blocks: List[Tuple[str, int, int, int, int]]) -> Tuple[str, str]:
+        """
+        Gera a saída formatada (como compare) a partir dos blocos compactos de
+        uma comparação anterior, sem comparar de novo. O comparador precisa
+        ter as mesmas opções de ignore usadas para calcular os blocos.
+        """
+        self.load_blocks(text1, text2, blocks)
+        return self._format_output(*self._original_lines)
+
+    def load_blocks(self, text1: str, text2: str,
+                    blocks: List[Tuple[str, int, int, int, int]]):
+        """
+        Restaura o estado de uma comparação anterior a partir dos blocos
+        compactos, sem comparar de novo (estatísticas, diff unificado e visão
+        lado a lado passam a usar esses blocos).
+        """
+        self._compute_blocks(text1, text2, blocks)
+
+    def _compact_blocks(self) -> List[Tuple[str, int, int, int, int]]:
+        return [
+            (block.type, block.left_start, block.left_end, block.right_start, block.right_end)
+            for block in self.diff_blocks
+        ]
+
+    def _compute_blocks(self, text1: str, text2: str,
+                        known_blocks: Optional[List[Tuple[str, int, int, int, int]]] = None):
+        """
+        Calcula os blocos de diferença (sem formatar a saída) e guarda as
+        linhas originais e o mapeamento linha processada -> linha original.
+        Com `known_blocks`, os blocos informados são usados no lugar do diff.
+        """
         if not isinstance(text1, str) or not isinstance(text2, str):
             raise TypeError("Ambos os argumentos devem ser strings")
         
@@ -236,33 +550,58 @@ class WinMergeLikeComparator:
             processed_lines2, mapping2 = self._preprocess_lines(lines2)
         else:
             processed_lines1, processed_lines2 = lines1, lines2
-            mapping1 = list(range(len(lines1)))
-            mapping2 = list(range(len(lines2)))
+            mapping1 = range(len(lines1))
+            mapping2 = range(len(lines2))
+        
+        # Blocos já calculados em uma execução anterior
+        cache_key = None
+        cached_blocks = known_blocks
+        if cached_blocks is None and self.cache is not None:
+            cache_key = self.cache.make_key(
+                text1, text2, self.algorithm.value, self.detect_moved_blocks,
+                self.ignore_options._signature()
+            )
+            cached_blocks = self.cache.get(cache_key)
+        
+        if cached_blocks is not None:
+            self.diff_blocks = [
+                DiffBlock(block_type, i1, i2, j1, j2, processed_lines1, processed_lines2)
+                for block_type, i1, i2, j1, j2 in cached_blocks
+            ]
+        else:
+            self.diff_blocks = self._diff_with_algorithm(processed_lines1, processed_lines2)
+            if self.cache is not None:
+                self.cache.put(cache_key, self._compact_blocks())
         
+        # Calcular similaridade a partir dos blocos já encontrados; a taxa
+        # exata só é calculada sob demanda em get_similarity_ratio
+        self.similarity_ratio = self._ratio_from_blocks(
+            len(processed_lines1), len(processed_lines2)
+        )
+        self._exact_similarity_ratio = None
+        self._processed_lines = (processed_lines1, processed_lines2)
+        self._original_lines = (lines1, lines2)
+        self._line_mappings = (mapping1, mapping2)
+    
+    def _diff_with_algorithm(self, lines1: List[str], lines2: List[str]) -> List[DiffBlock]:
+        """Executa o algoritmo selecionado e a detecção de blocos movidos."""
         # Escolher algoritmo
         if self.algorithm == DiffAlgorithm.MINIMAL:
-            self.diff_blocks = self._myers_like_diff(processed_lines1, processed_lines2)
+            blocks = self._myers_diff(lines1, lines2)
+        elif self.algorithm == DiffAlgorithm.HISTOGRAM:
+            blocks = self._histogram_diff(lines1, lines2)
+        elif self.algorithm == DiffAlgorithm.PATIENCE:
+            blocks = self._patience_diff(lines1, lines2)
         elif self.algorithm == DiffAlgorithm.NONE:
-            self.diff_blocks = self._none_algorithm_diff(processed_lines1, processed_lines2)
+            blocks = self._none_algorithm_diff(lines1, lines2)
         elif self.algorithm == DiffAlgorithm.QUICK:
-            self.diff_blocks = self._quick_diff(processed_lines1, processed_lines2)
+            blocks = self._quick_diff(lines1, lines2)
         else:  # DEFAULT
-            self.diff_blocks = self._myers_like_diff(processed_lines1, processed_lines2)
+            blocks = self._default_diff(lines1, lines2)
         
         # Detectar blocos movidos
-        self.diff_blocks = self._detect_moved_blocks(self.diff_blocks)
-        
-        # Calcular similaridade
-        matcher = difflib.SequenceMatcher(None, processed_lines1, processed_lines2)
-        self.similarity_ratio = matcher.ratio()
-        
-        # Verificar se há diferenças
-        if not self.has_differences():
-            return None, None
-        
-        # Gerar saída formatada
-        return self._format_output(lines1, lines2)
-    
+        return self._detect_moved_blocks(blocks)
+
     def _format_output(self, original_lines1: List[str], 
                       original_lines2: List[str]) -> Tuple[str, str]:
         """
@@ -286,7 +625,7 @@ class WinMergeLikeComparator:
                     result2.append(f"~ {line}")
                     
                 # Balancear se necessário
-                len_diff = len(block.left_lines) - len(block.right_lines)
+                len_diff = block.left_count - block.right_count
                 if len_diff > 0:
                     result2.extend([""] * len_diff)
                 elif len_diff < 0:
@@ -301,6 +640,18 @@ class WinMergeLikeComparator:
                 for line in block.right_lines:
                     result1.append("")
                     result2.append(f"+ {line}")
+
+            elif block.type == "move_from":
+                # Linhas movidas para outra posição no texto da direita
+                for line in block.left_lines:
+                    result1.append(f"* {line}")
+                    result2.append("")
+
+            elif block.type == "move_to":
+                # Linhas vindas de outra posição no texto da esquerda
+                for line in block.right_lines:
+                    result1.append("")
+                    result2.append(f"* {line}")
         
         return "\n".join(result1), "\n".join(result2)
     
@@ -308,9 +659,27 @@ class WinMergeLikeComparator:
         """Verifica se foram encontradas diferenças."""
         return any(block.type != 'equal' for block in self.diff_blocks)
     
+    def _ratio_from_blocks(self, total_lines1: int, total_lines2: int) -> float:
+        """Calcula a similaridade (2*M/T) a partir das linhas iguais nos blocos."""
+        total = total_lines1 + total_lines2
+        if not total:
+            return 1.0
+        matched = sum(
+            block.left_end - block.left_start
+            for block in self.diff_blocks if block.type == 'equal'
+        )
+        return 2.0 * matched / total
+
     def get_similarity_ratio(self) -> float:
-        """Retorna a taxa de similaridade entre os textos."""
-        return self.similarity_ratio
+        """
+        Retorna a taxa de similaridade exata entre os textos (SequenceMatcher.ratio).
+        É calculada apenas na primeira chamada após cada comparação.
+        """
+        if self._exact_similarity_ratio is None:
+            lines1, lines2 = self._processed_lines
+            matcher = difflib.SequenceMatcher(None, lines1, lines2)
+            self._exact_similarity_ratio = matcher.ratio()
+        return self._exact_similarity_ratio
     
     def get_diff_blocks(self) -> List[DiffBlock]:
         """Retorna a lista de blocos de diferença."""
@@ -328,6 +697,7 @@ class WinMergeLikeComparator:
             'added_lines': 0,
             'deleted_lines': 0,
             'modified_lines': 0,
+            'moved_lines': 0,
             'similarity_ratio': self.similarity_ratio,
             'algorithm_used': self.algorithm.value
         }
@@ -339,31 +709,167 @@ class WinMergeLikeComparator:
                 stats['different_blocks'] += 1
                 
             if block.type == 'insert':
-                stats['added_lines'] += len(block.right_lines)
+                stats['added_lines'] += block.right_count
             elif block.type == 'delete':
-                stats['deleted_lines'] += len(block.left_lines)
+                stats['deleted_lines'] += block.left_count
             elif block.type == 'replace':
-                stats['modified_lines'] += max(len(block.left_lines), len(block.right_lines))
+                stats['modified_lines'] += max(block.left_count, block.right_count)
+            elif block.type == 'move_from':
+                stats['moved_lines'] += block.left_count
         
         return stats
     
-    def generate_unified_diff(self, text1: str, text2: str, 
+    def generate_unified_diff(self, text1: Optional[str] = None, text2: Optional[str] = None,
                             filename1: str = "file1", filename2: str = "file2",
                             context: int = 3) -> str:
         """
         Gera diff no formato unificado (similar ao diff -u do Unix).
+
+        Se text1/text2 forem omitidos, usa os blocos da última comparação em
+        vez de comparar os textos novamente.
         """
-        lines1 = text1.splitlines(keepends=True)
-        lines2 = text2.splitlines(keepends=True)
-        
-        diff = difflib.unified_diff(
-            lines1, lines2,
-            fromfile=filename1,
-            tofile=filename2,
-            n=context
-        )
-        
-        return ''.join(diff)
+        if text1 is not None or text2 is not None:
+            self._compute_blocks(text1 or "", text2 or "")
+        return ''.join(self.iter_unified_diff(filename1, filename2, context))
+
+    def write_unified_diff(self, output, filename1: str = "file1", filename2: str = "file2",
+                           context: int = 3) -> int:
+        """
+        Escreve o diff unificado da última comparação em `output` (qualquer
+        objeto com write), um hunk por vez.
+
+        Returns:
+            int: quantidade de hunks escritos
+        """
+        hunks = 0
+        for chunk in self.iter_unified_diff(filename1, filename2, context):
+            output.write(chunk)
+            if chunk.startswith('@@'):
+                hunks += 1
+        return hunks
+
+    def iter_unified_diff(self, filename1: str = "file1", filename2: str = "file2",
+                          context: int = 3):
+        """
+        Gera o diff unificado da última comparação, hunk por hunk.
+
+        Os hunks são montados a partir de self.diff_blocks sobre as linhas
+        originais: as linhas ignoradas (em branco, padrões) do texto da
+        esquerda entram como contexto, então o patch aplica no texto original,
+        e as da direita só aparecem dentro de trechos inseridos. Com opções de
+        ignore, o lado '+' numera o texto da esquerda com as mudanças
+        aplicadas. Blocos movidos aparecem como remoção (-) e inserção (+).
+        """
+        lines1, lines2 = self._original_lines
+        codes = self._unified_opcodes()
+
+        started = False
+        for group in self._grouped_opcodes(codes, context):
+            if not started:
+                started = True
+                yield f'--- {filename1}\n+++ {filename2}\n'
+
+            first, last = group[0], group[-1]
+            range1 = self._format_unified_range(first[1], last[2])
+            range2 = self._format_unified_range(first[3], last[4])
+            hunk = [f'@@ -{range1} +{range2} @@\n']
+            for tag, i1, i2, j1, j2, source in group:
+                if tag == 'equal':
+                    hunk.extend(f' {lines1[i]}\n' for i in range(i1, i2))
+                    continue
+                if tag in ('replace', 'delete'):
+                    hunk.extend(f'-{lines1[i]}\n' for i in range(i1, i2))
+                if tag in ('replace', 'insert'):
+                    hunk.extend(f'+{lines2[source + k]}\n' for k in range(j2 - j1))
+            yield ''.join(hunk)
+
+    def _unified_opcodes(self) -> List[Tuple[str, int, int, int, int, int]]:
+        """
+        Converte os blocos em opcodes sobre as linhas originais; movidos viram
+        delete/insert.
+
+        Retorna (tag, i1, i2, j1, j2, origem): i1/i2 no texto original da
+        esquerda, j1/j2 no texto resultante do patch e `origem` a primeira
+        linha original da direita das linhas inseridas.
+        """
+        mapping1, mapping2 = self._line_mappings
+        total1 = len(self._original_lines[0])
+        codes = []
+        left = new = 0
+
+        def add(tag, i2, count2, source=0):
+            nonlocal left, new
+            if tag == 'equal' and codes and codes[-1][0] == 'equal':
+                # Linhas ignoradas entre trechos iguais continuam o mesmo trecho
+                _, i1, _, j1, _, _ = codes.pop()
+            else:
+                i1, j1 = left, new
+            codes.append((tag, i1, i2, j1, new + count2, source))
+            left, new = i2, new + count2
+
+        for block in self.diff_blocks:
+            tag = block.type
+            if tag == 'move_from':
+                tag = 'delete'
+            elif tag == 'move_to':
+                tag = 'insert'
+
+            if block.left_count:
+                span_start = mapping1[block.left_start]
+                span_end = mapping1[block.left_end - 1] + 1
+                if span_start > left:
+                    # Linhas ignoradas antes do bloco: contexto
+                    add('equal', span_start, span_start - left)
+            if tag == 'equal':
+                add('equal', span_end, span_end - left)
+                continue
+
+            count2 = source = 0
+            if block.right_count:
+                source = mapping2[block.right_start]
+                count2 = mapping2[block.right_end - 1] + 1 - source
+            add(tag, span_end if block.left_count else left, count2, source)
+
+        if total1 > left:
+            add('equal', total1, total1 - left)
+        return codes
+
+    @staticmethod
+    def _grouped_opcodes(codes: List[Tuple[str, int, int, int, int, int]], context: int):
+        """Agrupa os opcodes em hunks com `context` linhas de contexto (como difflib)."""
+        if not codes:
+            return
+        codes = list(codes)
+        if codes[0][0] == 'equal':
+            tag, i1, i2, j1, j2, source = codes[0]
+            codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2, source
+        if codes[-1][0] == 'equal':
+            tag, i1, i2, j1, j2, source = codes[-1]
+            codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context), source
+
+        group = []
+        for tag, i1, i2, j1, j2, source in codes:
+            if tag == 'equal' and i2 - i1 > 2 * context:
+                group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context), source))
+                yield group
+                group = []
+                i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+            group.append((tag, i1, i2, j1, j2, source))
+
+        if group and not (len(group) == 1 and group[0][0] == 'equal'):
+            yield group
+
+    @staticmethod
+    def _format_unified_range(start: int, stop: int) -> str:
+        """Formata o intervalo de um hunk (como difflib._format_range_unified)."""
+        beginning = start + 1
+        length = stop - start
+        if length == 1:
+            return str(beginning)
+        if not length:
+            # Intervalo vazio: aponta para a linha anterior
+            beginning -= 1
+        return f'{beginning},{length}'
     
     def generate_side_by_side_html(self, text1: str, text2: str,
                                   filename1: str = "Left", filename2: str = "Right") -> str:
@@ -386,7 +892,7 @@ class WinMergeLikeComparator:
         lines1 = formatted1.split('\n')
         lines2 = formatted2.split('\n')
         
-        html_content = f"""
+        parts = [f"""
         <html>
         <head>
             <title>File Comparison</title>
@@ -400,6 +906,7 @@ class WinMergeLikeComparator:
                 .modified {{ background-color: #ffffcc; }}
                 .added {{ background-color: #ccffcc; }}
                 .deleted {{ background-color: #ffcccc; }}
+                .moved {{ background-color: #e0e8ff; }}
                 .empty {{ background-color: #f5f5f5; color: #999; }}
             </style>
         </head>
@@ -408,32 +915,82 @@ class WinMergeLikeComparator:
             <div class="container">
                 <div class="column">
                     <div class="header">{filename1}</div>
-        """
+        """]
         
+        # Acumula em lista e junta no final (concatenar com += é quadrático)
         for line in lines1:
             css_class = self._get_line_css_class(line)
             display_line = line[2:] if len(line) > 2 else line  # Remove marker
-            html_content += f'<div class="line {css_class}">{self._escape_html(display_line)}</div>\n'
+            parts.append(f'<div class="line {css_class}">{self._escape_html(display_line)}</div>\n')
         
-        html_content += f"""
+        parts.append(f"""
                 </div>
                 <div class="column">
                     <div class="header">{filename2}</div>
-        """
+        """)
         
         for line in lines2:
             css_class = self._get_line_css_class(line)
             display_line = line[2:] if len(line) > 2 else line  # Remove marker
-            html_content += f'<div class="line {css_class}">{self._escape_html(display_line)}</div>\n'
+            parts.append(f'<div class="line {css_class}">{self._escape_html(display_line)}</div>\n')
         
-        html_content += """
+        parts.append("""
                 </div>
             </div>
         </body>
         </html>
-        """
+        """)
         
-        return html_content
+        return ''.join(parts)
+
+    def iter_side_by_side_rows(self, context: Optional[int] = None):
+        """
+        Percorre a última comparação como linhas de uma visão lado a lado.
+
+        Produz tuplas (css_class, left_number, left_text, right_number, right_text)
+        com a numeração (a partir de 1) e o texto das linhas originais; o lado
+        sem conteúdo vem como (None, None). Com `context`, trechos iguais maiores
+        que 2 * context são recolhidos em uma tupla ('skip', quantidade).
+        """
+        lines1, lines2 = self._original_lines
+        mapping1, mapping2 = self._line_mappings
+        css_classes = {'replace': 'modified', 'delete': 'deleted', 'insert': 'added',
+                       'move_from': 'moved', 'move_to': 'moved'}
+        last_index = len(self.diff_blocks) - 1
+
+        def left(i):
+            return mapping1[i] + 1, lines1[mapping1[i]]
+
+        def right(j):
+            return mapping2[j] + 1, lines2[mapping2[j]]
+
+        for index, block in enumerate(self.diff_blocks):
+            if block.type == 'equal':
+                count = block.left_count
+                head = tail = count
+                if context is not None:
+                    # Só o contexto vizinho a diferenças é exibido
+                    head = 0 if index == 0 else min(context, count)
+                    tail = 0 if index == last_index else min(context, count - head)
+                    if head + tail >= count - 1:
+                        head, tail = count, 0
+
+                for offset in range(head):
+                    yield ('equal',) + left(block.left_start + offset) + right(block.right_start + offset)
+                if head < count:
+                    if count - head - tail:
+                        yield ('skip', count - head - tail)
+                    for offset in range(count - tail, count):
+                        yield ('equal',) + left(block.left_start + offset) + right(block.right_start + offset)
+                continue
+
+            css_class = css_classes[block.type]
+            for offset in range(max(block.left_count, block.right_count)):
+                i = block.left_start + offset
+                j = block.right_start + offset
+                yield ((css_class,)
+                       + (left(i) if i < block.left_end else (None, None))
+                       + (right(j) if j < block.right_end else (None, None)))
     
     def _get_line_css_class(self, line: str) -> str:
         """Determina a classe CSS baseada no marcador da linha."""
@@ -449,6 +1006,8 @@ class WinMergeLikeComparator:
             return "added"
         elif marker == "- ":
             return "deleted"
+        elif marker == "* ":
+            return "moved"
         else:
             return "equal"
     
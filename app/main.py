@@ -1,9 +1,14 @@
 # main.py
+import multiprocessing
 import tkinter as tk
 from app.ui import MainScreen
+from app.utils import connection_pool
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos da comparação em executáveis empacotados
+    multiprocessing.freeze_support()
     # protect_folder_owner_only(DATA_DIR)
     root = tk.Tk()
     app = MainScreen(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    connection_pool.close_all()
\ No newline at end of file
@@ -199,11 +199,13 @@ class ConnectScreen:
                     authentication=authentication
                 )
                 db_conn.connect()
-                databases = db_conn.get_all_databases()
+                try:
+                    databases = db_conn.get_all_databases()
+                finally:
+                    db_conn.close()
                 self.connect_window.after(0, lambda: self.dropdown_database_name.config(
                     values=databases if databases else ["No databases found"]
                 ))
-                db_conn.close()
             except Exception as e:
                 print(f"Error fetching databases: {e}")
 
@@ -269,13 +271,15 @@ class ConnectScreen:
         }
         
         try:
-            dcm(
+            test_conn = dcm(
                 server=connection_data["server_name"],
                 username=connection_data["user_name"],
                 password=connection_data["password"],
                 authentication=connection_data["authentication"],
                 database=connection_data["database_name"]
-            ).connect()
+            )
+            test_conn.connect()
+            test_conn.close()
         except Exception as e:
             messagebox.showerror("Connection Error", f"Failed to connect to the database: {e}")
             return
@@ -300,13 +304,15 @@ class ConnectScreen:
                 }
 
         try:
-            dcm(
+            test_conn = dcm(
                 server=connection_data["server_name"],
                 username=connection_data["user_name"],
                 password=connection_data["password"],
                 authentication=connection_data["authentication"],
                 database=connection_data["database_name"]
-            ).connect()
+            )
+            test_conn.connect()
+            test_conn.close()
         except Exception as e:
             messagebox.showerror("Connection Error", f"Failed to connect to the database: {e}")
             return
@@ -1,7 +1,29 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 import tkinter as tk
-from tkinter import ttk, messagebox
-from app.utils import ScreenNavigationManager as snm, DatabaseConnectionManager as dcm
-from app.core import WinMergeLikeComparator as cps
+from tkinter import ttk, messagebox, filedialog
+from app.utils import ScreenNavigationManager as snm, DatabaseConnectionManager as dcm, SnapshotStore
+from app.core import (
+    WinMergeLikeComparator, BatchComparator, TableSchemaComparator, TableDataComparator,
+    merge_join, prefetch, intraline_changes, DiffCache, default_cache_path,
+    ComparisonResult, ComparisonEntry, ACTION_ALTER, ACTION_CREATE, HtmlReportWriter
+)
+from app.utils.database_connection_manager import BODY_FETCH_BATCH_SIZE, OBJECT_TYPES
+from app.ui.virtual_diff_view import VirtualDiffView
+
+# Linhas além da área visível que também recebem o destaque intra-linha
+INTRALINE_MARGIN = 20
+# Máximo de linhas divergentes exibidas por tabela na comparação de dados
+DATA_DIFF_DISPLAY_LIMIT = 1000
+# Colunas da TreeView de resultados
+TREE_COLUMNS = ("Object Name", "Object Type", "Action")
+# Linhas inseridas (ou removidas) na TreeView por etapa, devolvendo o controle à interface entre elas
+TREE_CHUNK_SIZE = 500
+# Intervalo entre as etapas de preenchimento da TreeView (ms)
+TREE_CHUNK_DELAY_MS = 10
 
 class MainScreen:
     def __init__(self, master):
@@ -16,10 +38,38 @@ class MainScreen:
         # Inicialização de variáveis de estado
         self.source_connection = None
         self.target_connection = None
-        self.source_procedure_schema = []
-        self.target_procedure_schema = []
-        self.diff_procedures = []
-        self.to_create_procedures = []
+        # Objetos divergentes/ausentes, indexados por (schema, nome, tipo). O diff
+        # é formatado só ao abrir o objeto, com as mesmas opções do BatchComparator
+        self.results = ComparisonResult(formatter=WinMergeLikeComparator().format_blocks)
+
+        # Linhas da TreeView: modelo em memória (ordenado aqui, não no widget)
+        # e preenchimento do widget em etapas
+        self._tree_rows = []
+        self._tree_pending = deque()
+        self._tree_stale_items = []
+        self._tree_fill_scheduled = False
+        self._tree_sort = None
+
+        # Hashes da execução anterior, por conexão, e resultado de cada par
+        # divergente (re-comparação incremental)
+        self.snapshot_store = SnapshotStore()
+
+        # Objetos reaproveitados da execução anterior cujos corpos estão sendo
+        # baixados ao abrir, e o objeto exibido no momento (nome, tipo)
+        self._loading_objects = set()
+        self._displayed_object = None
+
+        # Estado da comparação em segundo plano
+        self._compare_thread = None
+        self._cancel_event = None
+        self._progress_phase = None
+        self._progress_started_at = 0.0
+
+        # Diff intra-linha calculado sob demanda para as linhas visíveis:
+        # linha do modelo -> intervalos calculados, e linhas já marcadas na janela atual
+        self._intraline_cache = {}
+        self._intraline_done = set()
+        self._intraline_scheduled = False
 
         self._setup_ui()
         
@@ -37,7 +87,7 @@ class MainScreen:
         frame_top.pack_propagate(False)  # Mantém altura fixa
 
         # Botão Compare
-        btn_start_compare = tk.Button(
+        self.btn_start_compare = tk.Button(
             frame_top,
             text="Compare",
             bg="#F0F0F0",
@@ -45,7 +95,7 @@ class MainScreen:
             fg="#000000",
             command=self._on_compare_click
         )
-        btn_start_compare.place(relx=0.01, rely=0.1, relwidth=0.08, height=25)
+        self.btn_start_compare.place(relx=0.01, rely=0.1, relwidth=0.08, height=25)
 
         # Botão Filter
         self.btn_filter = tk.Button(
@@ -58,6 +108,53 @@ class MainScreen:
         )
         self.btn_filter.place(relx=0.095, rely=0.1, relwidth=0.05, height=25)
 
+        # Botão Cancel (habilitado apenas durante a comparação)
+        self.btn_cancel_compare = tk.Button(
+            frame_top,
+            text="Cancel",
+            bg="#F0F0F0",
+            font=("Inter", 10),
+            fg="#000000",
+            state="disabled",
+            command=self._on_cancel_compare_click
+        )
+        self.btn_cancel_compare.place(relx=0.15, rely=0.1, relwidth=0.06, height=25)
+
+        # Comparação de dados das tabelas (opcional, mais demorada)
+        self.compare_table_data = tk.BooleanVar(value=False)
+        self.chk_compare_data = tk.Checkbutton(
+            frame_top,
+            text="Compare data",
+            variable=self.compare_table_data,
+            bg="#FFFFFF",
+            font=("Inter", 10)
+        )
+        self.chk_compare_data.place(relx=0.215, rely=0.1, relwidth=0.09, height=25)
+
+        # Botão Export (relatório HTML dos objetos alterados)
+        self.btn_export_report = tk.Button(
+            frame_top,
+            text="Export",
+            bg="#F0F0F0",
+            font=("Inter", 10),
+            fg="#000000",
+            command=self._on_export_click
+        )
+        self.btn_export_report.place(relx=0.31, rely=0.1, relwidth=0.06, height=25)
+
+        # Barra de progresso e status da comparação
+        self.progress_bar = ttk.Progressbar(frame_top, orient="horizontal", mode="determinate")
+        self.progress_bar.place(relx=0.375, rely=0.1, relwidth=0.15, height=25)
+
+        self.lbl_progress = tk.Label(
+            frame_top,
+            text="",
+            bg="#FFFFFF",
+            font=("Inter", 9),
+            anchor="w"
+        )
+        self.lbl_progress.place(relx=0.53, rely=0.1, relwidth=0.46, height=25)
+
         # Botão Select Source
         self.btn_select_source = tk.Button(
             frame_top,
@@ -85,17 +182,16 @@ class MainScreen:
         frame_treeview = tk.Frame(self.root, bg="#FFFFFF")
         frame_treeview.pack(fill="both", expand=True, padx=5, pady=5)
 
-        columns = ("Object Name", "Object Type", "Action")
         self.treeview = ttk.Treeview(
             frame_treeview, 
-            columns=columns, 
+            columns=TREE_COLUMNS, 
             show="headings", 
             selectmode="browse"
         )
 
-        # Configuração das colunas
-        for col in columns:
-            self.treeview.heading(col, text=col)
+        # Configuração das colunas (clique no cabeçalho ordena/agrupa pela coluna)
+        for col in TREE_COLUMNS:
+            self.treeview.heading(col, text=col, command=lambda c=col: self._on_treeview_heading_click(c))
             self.treeview.column(col, anchor="center")
 
         # Scrollbar para a TreeView
@@ -167,6 +263,18 @@ class MainScreen:
         # Configuração das tags de colorização
         self._configure_text_tags()
 
+        # Só a parte visível do diff é inserida nos widgets; a visão também
+        # concentra a rolagem sincronizada dos painéis
+        self.diff_view = VirtualDiffView(
+            self.text_source_body,
+            self.line_numbers,
+            self.text_target_body,
+            self.v_scroll,
+            h_scroll=self.h_scroll,
+            on_render=self._on_diff_view_render,
+            on_scroll=self._schedule_intraline_highlight
+        )
+
     def _setup_scrollbars(self, frame_object_body, frame_source_scroll):
         """Configura as scrollbars e sincronização"""
         # Scrollbar vertical
@@ -201,15 +309,16 @@ class MainScreen:
 
     def _configure_text_tags(self):
         """Configura as tags de colorização para os widgets de texto"""
-        # Tags para o texto fonte
-        self.text_source_body.tag_config("--", background="#FFE4E1", foreground="#8B0000")  # Removido
-        self.text_source_body.tag_config("||", background="#FFF8DC", foreground="#8B4513")  # Modificado
-        self.text_source_body.tag_config("  ", background="white", foreground="black")       # Igual
+        # Mesmas tags nos dois lados (ver virtual_diff_view.MARKER_TAGS)
+        for widget in [self.text_source_body, self.text_target_body]:
+            widget.tag_config("deleted", background="#FFE4E1", foreground="#8B0000")   # Removido
+            widget.tag_config("added", background="#F0FFF0", foreground="#006400")     # Adicionado
+            widget.tag_config("modified", background="#FFF8DC", foreground="#8B4513")  # Modificado
+            widget.tag_config("moved", background="#E0E8FF", foreground="#00008B")     # Movido
 
-        # Tags para o texto alvo
-        self.text_target_body.tag_config("++", background="#F0FFF0", foreground="#006400")   # Adicionado
-        self.text_target_body.tag_config("||", background="#FFF8DC", foreground="#8B4513")   # Modificado
-        self.text_target_body.tag_config("  ", background="white", foreground="black")        # Igual
+        # Trechos alterados dentro de linhas substituídas (criadas por último: maior prioridade)
+        for widget in [self.text_source_body, self.text_target_body]:
+            widget.tag_config("intraline", background="#FFD966")
 
     def _bind_mouse_events(self):
         """Configura eventos de mouse wheel para sincronização"""
@@ -259,47 +368,35 @@ class MainScreen:
     # Métodos de callback para scrollbars
     def _on_vertical_scroll(self, *args):
         """Sincroniza scroll vertical entre todos os widgets"""
-        self.text_source_body.yview(*args)
-        self.text_target_body.yview(*args)
-        self.line_numbers.yview(*args)
+        self.diff_view.yview(*args)
 
     def _on_horizontal_scroll(self, *args):
         """Sincroniza scroll horizontal entre widgets de texto"""
-        self.text_source_body.xview(*args)
-        self.text_target_body.xview(*args)
+        self.diff_view.xview(*args)
 
     def _on_source_y_scroll(self, *args):
         """Callback para scroll vertical do texto fonte"""
-        self.v_scroll.set(*args)
-        self.text_target_body.yview_moveto(args[0])
-        self.line_numbers.yview_moveto(args[0])
+        self.diff_view.on_widget_scrolled(self.text_source_body, args[0])
 
     def _on_target_y_scroll(self, *args):
         """Callback para scroll vertical do texto alvo"""
-        self.v_scroll.set(*args)
-        self.text_source_body.yview_moveto(args[0])
-        self.line_numbers.yview_moveto(args[0])
+        self.diff_view.on_widget_scrolled(self.text_target_body, args[0])
 
     def _on_source_x_scroll(self, *args):
         """Callback para scroll horizontal do texto fonte"""
-        self.h_scroll.set(*args)
-        self.text_target_body.xview_moveto(args[0])
+        self.diff_view.on_widget_x_scrolled(self.text_source_body, *args)
 
     def _on_target_x_scroll(self, *args):
         """Callback para scroll horizontal do texto alvo"""
-        self.h_scroll.set(*args)
-        self.text_source_body.xview_moveto(args[0])
+        self.diff_view.on_widget_x_scrolled(self.text_target_body, *args)
 
     def _scroll_all_vertical(self, delta, what):
         """Rola todos os widgets verticalmente"""
-        self.text_source_body.yview_scroll(delta, what)
-        self.text_target_body.yview_scroll(delta, what)
-        self.line_numbers.yview_scroll(delta, what)
+        self.diff_view.scroll(delta, what)
 
     def _scroll_all_horizontal(self, delta, what):
         """Rola widgets de texto horizontalmente"""
-        self.text_source_body.xview_scroll(delta, what)
-        self.text_target_body.xview_scroll(delta, what)
+        self.diff_view.xview("scroll", delta, what)
 
     # Métodos de callback para botões
     def _on_filter_click(self):
@@ -352,10 +449,9 @@ class MainScreen:
                 database=connection_data['database_name']
             )
             
-            # Testa a conexão
-            test_conn = self.source_connection.connect()
-            if test_conn:
-                test_conn.close()
+            # Testa a conexão e a devolve ao pool para reuso na comparação
+            self.source_connection.connect()
+            self.source_connection.close()
                 
             self.btn_select_source.config(
                 text=f"{connection_data['server_name']}/{connection_data['database_name']}"
@@ -381,10 +477,9 @@ class MainScreen:
                 database=connection_data['database_name']
             )
             
-            # Testa a conexão
-            test_conn = self.target_connection.connect()
-            if test_conn:
-                test_conn.close()
+            # Testa a conexão e a devolve ao pool para reuso na comparação
+            self.target_connection.connect()
+            self.target_connection.close()
                 
             self.btn_select_target.config(
                 text=f"{connection_data['server_name']}/{connection_data['database_name']}"
@@ -397,36 +492,200 @@ class MainScreen:
             messagebox.showerror("Erro de Conexão", f"Erro ao conectar com target: {str(e)}")
 
     def _on_compare_click(self):
-        """Inicia a comparação entre source e target"""
+        """Inicia a comparação entre source e target em segundo plano"""
         if not self._validate_connections():
             return
 
-        try:
-            # Limpa dados anteriores
-            self._clear_previous_results()
-            
-            # Indica que a comparação está em andamento
-            self.root.config(cursor="wait")
-            self.root.update()
+        if self._compare_thread and self._compare_thread.is_alive():
+            return
 
-            # Conecta e obtém schemas
-            self._get_procedure_schemas()
-            
-            # Realiza a comparação
-            self._perform_comparison()
-            
-            # Popula a TreeView com os resultados
-            self._populate_treeview_with_differences()
-            
-            messagebox.showinfo("Sucesso", f"Comparação concluída!\n"
-                              f"Procedures alteradas: {len(self.diff_procedures)}\n"
-                              f"Procedures para criar: {len(self.to_create_procedures)}")
+        # Limpa dados anteriores
+        self._clear_previous_results()
+
+        # Indica que a comparação está em andamento
+        self._set_comparison_running(True)
+
+        # Opções lidas aqui: variáveis Tk só podem ser usadas na thread da interface
+        compare_data = self.compare_table_data.get()
+
+        self._cancel_event = threading.Event()
+        self._compare_thread = threading.Thread(
+            target=self._run_comparison,
+            args=(self._cancel_event, compare_data),
+            daemon=True
+        )
+        self._compare_thread.start()
+
+    def _on_cancel_compare_click(self):
+        """Solicita o cancelamento da comparação em andamento"""
+        if self._cancel_event:
+            self._cancel_event.set()
+            self.btn_cancel_compare.config(state="disabled")
+            self.lbl_progress.config(text="Cancelando...")
+
+    def _on_export_click(self):
+        """Grava um relatório HTML com os objetos programáveis alterados"""
+        if self._compare_thread and self._compare_thread.is_alive():
+            messagebox.showwarning("Atenção", "Aguarde o fim da comparação para exportar.")
+            return
 
+        program_types = set(OBJECT_TYPES.values())
+        entries = [
+            self.results.get_by_key(key) for key in self.results.keys_by_action(ACTION_ALTER)
+            if self.results.get_by_key(key).object_type in program_types
+        ]
+        if not entries:
+            messagebox.showinfo("Export", "Nenhum objeto alterado para exportar.")
+            return
+
+        path = filedialog.asksaveasfilename(
+            defaultextension=".html", filetypes=[("HTML", "*.html")],
+            initialfile="comparison_report.html"
+        )
+        if not path:
+            return
+
+        # Usa o mesmo controle da comparação para impedir execuções simultâneas
+        self._set_comparison_running(True)
+        self.btn_cancel_compare.config(state="disabled")
+        self._compare_thread = threading.Thread(
+            target=self._export_report, args=(path, entries), daemon=True
+        )
+        self._compare_thread.start()
+
+    def _iter_export_entries(self, entries):
+        """
+        Entrega os objetos a exportar com os corpos originais. Os reaproveitados
+        da execução anterior (sem corpo) são baixados em lotes, em conexões próprias.
+        """
+        deferred = []
+        for entry in entries:
+            if entry.source_body is None:
+                deferred.append(entry)
+            else:
+                yield entry
+
+        for start in range(0, len(deferred), BODY_FETCH_BATCH_SIZE):
+            batch = deferred[start:start + BODY_FETCH_BATCH_SIZE]
+            names = [entry.object_name for entry in batch]
+            bodies = []
+            for connection in (self.source_connection, self.target_connection):
+                reader = connection.clone()
+                reader.connect()
+                try:
+                    bodies.append({
+                        record.object_name: record.object_body or ""
+                        for record in reader.iter_objects_bodies(names)
+                    })
+                finally:
+                    reader.close()
+            for entry in batch:
+                yield entry._replace(source_body=bodies[0].get(entry.object_name, ""),
+                                     target_body=bodies[1].get(entry.object_name, ""))
+
+    def _export_report(self, path, entries):
+        """Gera o relatório HTML (thread de trabalho)"""
+        cache = DiffCache(default_cache_path())
+        try:
+            def with_progress(items):
+                for exported, entry in enumerate(items, start=1):
+                    yield entry
+                    self._post_progress("Exportando", exported, len(entries))
+
+            writer = HtmlReportWriter(
+                WinMergeLikeComparator(cache=cache),
+                source_label=f"{self.source_connection.server}/{self.source_connection.database}",
+                target_label=f"{self.target_connection.server}/{self.target_connection.database}"
+            )
+            writer.write_entries(path, with_progress(self._iter_export_entries(entries)))
+            self._post_to_ui(self._on_export_finished, path, None)
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro durante a comparação: {str(e)}")
-            print(f"Erro durante a comparação: {str(e)}")
+            print(f"Erro ao exportar o relatório: {str(e)}")
+            self._post_to_ui(self._on_export_finished, path, e)
         finally:
-            self.root.config(cursor="")
+            cache.close()
+
+    def _on_export_finished(self, path, error):
+        """Restaura a interface ao final da exportação (thread da interface)"""
+        self._set_comparison_running(False)
+        if error:
+            self.lbl_progress.config(text="Erro ao exportar")
+            messagebox.showerror("Erro", f"Erro ao exportar o relatório: {str(error)}")
+        else:
+            self.lbl_progress.config(text="Relatório exportado")
+            messagebox.showinfo("Export", f"Relatório salvo em:\n{path}")
+
+    def _run_comparison(self, cancel_event, compare_data):
+        """Busca os schemas e compara fora da thread da interface"""
+        try:
+            self._perform_comparison(cancel_event, compare_data)
+
+            self._post_to_ui(self._on_comparison_finished, cancel_event.is_set(), None)
+        except Exception as e:
+            print(f"Erro durante a comparação: {str(e)}")
+            self._post_to_ui(self._on_comparison_finished, False, e)
+
+    def _on_comparison_finished(self, cancelled, error):
+        """Restaura a interface ao final da comparação (thread da interface)"""
+        self._set_comparison_running(False)
+
+        if error:
+            self.lbl_progress.config(text="Erro durante a comparação")
+            messagebox.showerror("Erro", f"Erro durante a comparação: {str(error)}")
+        elif cancelled:
+            self.lbl_progress.config(text="Comparação cancelada")
+        else:
+            self.lbl_progress.config(text="Comparação concluída")
+            messagebox.showinfo("Sucesso", f"Comparação concluída!\n"
+                              f"Objetos alterados: {self.results.count(ACTION_ALTER)}\n"
+                              f"Objetos para criar: {self.results.count(ACTION_CREATE)}")
+
+    def _set_comparison_running(self, running):
+        """Habilita/desabilita os controles conforme o estado da comparação"""
+        self.root.config(cursor="watch" if running else "")
+        idle_state = "disabled" if running else "normal"
+        self.btn_start_compare.config(state=idle_state)
+        # A thread de trabalho usa as conexões: não podem ser trocadas durante a execução
+        self.btn_select_source.config(state=idle_state)
+        self.btn_select_target.config(state=idle_state)
+        self.btn_export_report.config(state=idle_state)
+        self.btn_cancel_compare.config(state="normal" if running else "disabled")
+        if running:
+            self._progress_phase = None
+            self.progress_bar.config(value=0, maximum=1)
+
+    def _post_to_ui(self, callback, *args):
+        """Agenda uma chamada na thread da interface a partir da thread de trabalho"""
+        try:
+            self.root.after(0, callback, *args)
+        except (RuntimeError, tk.TclError):
+            # Janela já foi fechada
+            pass
+
+    def _post_progress(self, phase, done, total=None, detail=""):
+        """Publica o progresso da etapa atual na interface (total None = desconhecido)"""
+        self._post_to_ui(self._update_progress, phase, done, total, detail)
+
+    def _update_progress(self, phase, done, total, detail):
+        """Atualiza barra de progresso, contagem e tempo estimado (thread da interface)"""
+        if phase != self._progress_phase:
+            self._progress_phase = phase
+            self._progress_started_at = time.monotonic()
+
+        if total is None:
+            self.lbl_progress.config(text=f"{phase}: {done}")
+            return
+
+        self.progress_bar.config(maximum=max(total, 1), value=done)
+
+        text = f"{phase}: {done}/{total}"
+        if detail:
+            text += f" ({detail})"
+        if 0 < done < total:
+            elapsed = time.monotonic() - self._progress_started_at
+            remaining = int(elapsed / done * (total - done))
+            text += f" - restante ~{remaining // 60:02d}:{remaining % 60:02d}"
+        self.lbl_progress.config(text=text)
 
     def _validate_connections(self):
         """Valida se as conexões estão configuradas"""
@@ -442,76 +701,395 @@ class MainScreen:
 
     def _clear_previous_results(self):
         """Limpa resultados de comparações anteriores"""
-        self.diff_procedures.clear()
-        self.to_create_procedures.clear()
-        self.treeview.delete(*self.treeview.get_children())
+        self.results.clear()
+        self._displayed_object = None
+        self._tree_rows = []
+        self._tree_sort = None
+        self._reset_treeview([])
         self._clear_text_widgets()
 
-    def _get_procedure_schemas(self):
-        """Obtém os schemas das procedures de ambas as conexões"""
-        # Conecta e obtém procedures do source
-        source_conn = self.source_connection.connect()
+    def _iter_fingerprints(self, connection, collected):
+        """
+        Conecta e percorre as impressões digitais (hash) dos objetos programáveis
+        (procedures, views, functions e triggers), em ordem de nome. Reaproveita
+        o snapshot da última execução: só os objetos novos ou alterados têm o
+        hash recalculado no servidor. Cada item também
+        é guardado em `collected` para gravar o novo snapshot.
+        Usa uma conexão própria do pool, liberada quando o fluxo é fechado.
+        """
+        snapshot = self.snapshot_store.load(connection.identity())
+        reader = connection.clone()
+        reader.connect()
         try:
-            self.source_procedure_schema = self.source_connection.get_procedures_schema()
+            for fingerprint in reader.iter_objects_fingerprints_since(snapshot):
+                collected.append(fingerprint)
+                yield fingerprint
         finally:
-            if source_conn:
-                source_conn.close()
-
-        # Conecta e obtém procedures do target
-        target_conn = self.target_connection.connect()
+            reader.close()
+
+    def _fetch_body_batch(self, connection, object_names):
+        """Obtém o corpo completo de um lote de objetos (a conexão fica aberta entre lotes)"""
+        connection.connect()
+        return list(connection.iter_objects_bodies(object_names))
+
+    def _classify_by_fingerprints(self, cancel_event):
+        """
+        Percorre os catálogos de source e target ao mesmo tempo (merge-join por
+        nome) e classifica os objetos apenas pelos hashes.
+
+        Returns:
+            tuple: (divergentes, ausentes no target), dicionários
+                   nome -> (tipo, data source, data target, hash source, hash target)
+                   e nome -> data source
+        """
+        mismatched = {}
+        missing = {}
+        source_fingerprints = []
+        target_fingerprints = []
+        source_stream = prefetch(self._iter_fingerprints(self.source_connection, source_fingerprints),
+                                 cancel_event=cancel_event)
+        target_stream = prefetch(self._iter_fingerprints(self.target_connection, target_fingerprints),
+                                 cancel_event=cancel_event)
         try:
-            self.target_procedure_schema = self.target_connection.get_procedures_schema()
+            joined = merge_join(source_stream, target_stream, key=attrgetter('object_name'))
+            for classified, (source_obj, target_obj) in enumerate(joined, start=1):
+                if cancel_event.is_set():
+                    break
+
+                if source_obj is None:
+                    # Existe apenas no target
+                    continue
+                if target_obj is None:
+                    missing[source_obj.object_name] = source_obj.last_modified_date
+                elif (source_obj.object_hash is None
+                      or source_obj.object_hash != target_obj.object_hash):
+                    mismatched[source_obj.object_name] = (
+                        source_obj.object_type,
+                        source_obj.last_modified_date,
+                        target_obj.last_modified_date,
+                        source_obj.object_hash,
+                        target_obj.object_hash
+                    )
+
+                if classified % BODY_FETCH_BATCH_SIZE == 0:
+                    self._post_progress("Lendo catálogos", classified)
         finally:
-            if target_conn:
-                target_conn.close()
-
-    def _perform_comparison(self):
-        """Realiza a comparação entre os schemas"""
-        comparer = cps()
-        target_procs_map = {p['procedure_name']: p for p in self.target_procedure_schema}
-
-        for source_proc in self.source_procedure_schema:
-            target_proc = target_procs_map.get(source_proc['procedure_name'])
-
-            if target_proc:
-                # Procedure existe em ambos - verifica se há diferenças
-                source_diff, target_diff = comparer.compare(
-                    text1=source_proc['procedure_body'],
-                    text2=target_proc['procedure_body']
+            # Espera as threads de leitura terminarem e liberarem suas conexões
+            source_stream.close()
+            target_stream.close()
+
+        # Catálogos lidos por completo: vira a base da próxima comparação
+        if not cancel_event.is_set():
+            for connection, fingerprints in ((self.source_connection, source_fingerprints),
+                                             (self.target_connection, target_fingerprints)):
+                self.snapshot_store.save(connection.identity(), fingerprints)
+
+        return mismatched, missing
+
+    def _iter_body_pairs(self, object_names, cancel_event, on_batch):
+        """
+        Baixa em lotes os corpos de source e target (em paralelo) e entrega os
+        pares (nome, corpo source, corpo target). Só um lote fica em memória.
+        """
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            for start in range(0, len(object_names), BODY_FETCH_BATCH_SIZE):
+                if cancel_event.is_set():
+                    return
+                batch = object_names[start:start + BODY_FETCH_BATCH_SIZE]
+                source_future = executor.submit(self._fetch_body_batch, self.source_connection, batch)
+                target_future = executor.submit(self._fetch_body_batch, self.target_connection, batch)
+
+                joined = merge_join(
+                    source_future.result(), target_future.result(),
+                    key=attrgetter('object_name')
                 )
+                for source_obj, target_obj in joined:
+                    if source_obj and target_obj:
+                        yield (
+                            source_obj.object_name,
+                            source_obj.object_body or "",
+                            target_obj.object_body or ""
+                        )
+                on_batch(start + len(batch))
+        finally:
+            executor.shutdown(wait=True)
+            self.source_connection.close()
+            self.target_connection.close()
+
+    def _perform_comparison(self, cancel_event, compare_data=False):
+        """
+        Realiza a comparação entre os schemas (thread de trabalho).
+        `compare_data` também compara os dados das tabelas.
+        """
+        # Classifica pelos hashes: idênticas são descartadas sem baixar o corpo
+        self._post_progress("Lendo catálogos", 0)
+        mismatched, missing = self._classify_by_fingerprints(cancel_event)
+        if cancel_event.is_set():
+            return
 
+        # Objetos que não existem no target: baixa o corpo apenas do source
+        missing_names = list(missing)
+        self.source_connection.connect()
+        create_bodies = self.source_connection.iter_objects_bodies(missing_names)
+        try:
+            for created, obj in enumerate(create_bodies, start=1):
+                if cancel_event.is_set():
+                    return
+                self._post_to_ui(self._add_result, ComparisonEntry(
+                    obj.object_name, obj.object_type, ACTION_CREATE,
+                    obj.last_modified_date or 'N/A', 'N/A', obj.object_body or "", None
+                ))
+                self._post_progress("Baixando objetos", created, len(missing_names))
+        finally:
+            create_bodies.close()
+            self.source_connection.close()
+
+        # Pares cujos dois hashes são os mesmos da execução anterior, feita com as
+        # mesmas opções de comparação, reaproveitam o resultado dela, sem baixar
+        # os corpos: os sem diferença real são descartados e os demais entram na
+        # lista com os corpos baixados ao abrir
+        comparer = BatchComparator(cache_path=default_cache_path(), format_output=False)
+        pair_key = (self.source_connection.identity(), self.target_connection.identity(),
+                    comparer.options_signature())
+        previous_results = self.snapshot_store.load_pair_results(*pair_key)
+        pair_results = []
+        mismatched_names = []
+        for name, (object_type, source_modified, target_modified,
+                   source_hash, target_hash) in mismatched.items():
+            previous = previous_results.get(name)
+            if (previous is None or source_hash is None or target_hash is None
+                    or previous[:2] != (source_hash, target_hash)):
+                mismatched_names.append(name)
+                continue
+            pair_results.append((name, source_hash, target_hash, previous[2]))
+            if previous[2]:
+                self._post_to_ui(self._add_result, ComparisonEntry(
+                    name, object_type, ACTION_ALTER,
+                    source_modified or 'N/A', target_modified or 'N/A', None, None
+                ))
+
+        # Compara as demais em paralelo, baixando os corpos sob demanda;
+        # cada resultado é exibido assim que fica pronto. Só os blocos do diff
+        # são calculados aqui: a saída formatada é gerada ao abrir o objeto
+        fetched = 0
+        diffed = 0
+        # Corpos dos pares ainda em comparação (nome -> (source, target))
+        in_flight = {}
+
+        def on_batch(count):
+            nonlocal fetched
+            fetched = count
+
+        def remember_bodies(pairs):
+            for name, source_body, target_body in pairs:
+                in_flight[name] = (source_body, target_body)
+                yield name, source_body, target_body
+
+        pairs = self._iter_body_pairs(mismatched_names, cancel_event, on_batch)
+        self._post_progress("Comparando", 0, len(mismatched_names))
+        try:
+            for result in comparer.iter_compare(remember_bodies(pairs), cancel_event):
+                diffed += 1
+                source_body, target_body = in_flight.pop(result['name'])
+                object_type, source_modified, target_modified, source_hash, target_hash = \
+                    mismatched[result['name']]
+                pair_results.append((result['name'], source_hash, target_hash, result['has_differences']))
                 # Só adiciona se houver diferenças reais
-                if comparer.has_differences():
-                    self.diff_procedures.append({
-                        'procedure_name': source_proc['procedure_name'],
-                        'source_body': source_diff,
-                        'target_body': target_diff,
-                        'source_modified': source_proc.get('last_modified_date', 'N/A'),
-                        'target_modified': target_proc.get('last_modified_date', 'N/A'),
-                        'source_proc': source_proc,
-                        'target_proc': target_proc
-                    })
+                if result['has_differences']:
+                    self._post_to_ui(self._add_result, ComparisonEntry(
+                        result['name'], object_type, ACTION_ALTER,
+                        source_modified or 'N/A', target_modified or 'N/A',
+                        source_body, target_body, result['blocks']
+                    ))
+                self._post_progress(
+                    "Comparando", diffed, len(mismatched_names), f"baixados {fetched}"
+                )
+        finally:
+            pairs.close()
+
+        if not cancel_event.is_set():
+            self.snapshot_store.save_pair_results(*pair_key, pair_results)
+            source_schema, target_schema = self._compare_tables()
+            if compare_data and not cancel_event.is_set():
+                self._compare_tables_data(source_schema, target_schema, cancel_event)
+
+    def _fetch_tables_schema(self, connection):
+        """Lê a estrutura de todas as tabelas de uma conexão (uma ida ao servidor)"""
+        connection.connect()
+        try:
+            return connection.get_tables_schema()
+        finally:
+            connection.close()
+
+    def _compare_tables(self):
+        """
+        Compara a estrutura das tabelas (colunas, índices e constraints) de forma
+        estrutural. Retorna os esquemas lidos, reaproveitados na comparação de dados.
+        """
+        self._post_progress("Comparando tabelas", 0)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            source_future = executor.submit(self._fetch_tables_schema, self.source_connection)
+            target_future = executor.submit(self._fetch_tables_schema, self.target_connection)
+            source_schema = source_future.result()
+            target_schema = target_future.result()
+
+        comparisons = TableSchemaComparator().compare(source_schema, target_schema)
+        for compared, table in enumerate(comparisons, start=1):
+            if table.status == 'missing':
+                self._post_to_ui(self._add_result, ComparisonEntry(
+                    table.table_name, "Table", ACTION_CREATE,
+                    table.source_modified or 'N/A', 'N/A', table.source_body, None
+                ))
             else:
-                # Procedure não existe no target
-                self.to_create_procedures.append(source_proc)
-
-    def _populate_treeview_with_differences(self):
-        """Popula a TreeView com as diferenças encontradas"""
-        # Adiciona procedures com diferenças
-        for diff in self.diff_procedures:
-            self.treeview.insert("", "end", values=(
-                diff['procedure_name'],
-                "Procedure",
-                "Alter"
-            ))
-
-        # Adiciona procedures que precisam ser criadas
-        for proc in self.to_create_procedures:
-            self.treeview.insert("", "end", values=(
-                proc['procedure_name'],
-                "Procedure",
-                "Create"
-            ))
+                self._post_to_ui(self._add_result, ComparisonEntry(
+                    table.table_name, "Table", ACTION_ALTER,
+                    table.source_modified or 'N/A', table.target_modified or 'N/A',
+                    table.source_body, table.target_body
+                ))
+            self._post_progress("Comparando tabelas", compared, len(comparisons))
+
+        return source_schema, target_schema
+
+    def _comparable_data_tables(self, source_schema, target_schema):
+        """
+        Tabelas cujos dados podem ser comparados: existem nos dois lados com as
+        mesmas colunas e a mesma chave primária. Retorna (tabela, colunas, chave).
+        """
+        def columns_by_table(schema):
+            columns = {}
+            for column in sorted(schema.columns, key=attrgetter('table_name', 'column_id')):
+                columns.setdefault(column.table_name, []).append(column.column_name)
+            return columns
+
+        def primary_keys(schema):
+            return {
+                index.table_name: [name for name, _ in index.key_columns]
+                for index in schema.indexes if index.is_primary_key
+            }
+
+        source_columns = columns_by_table(source_schema)
+        target_columns = columns_by_table(target_schema)
+        source_keys = primary_keys(source_schema)
+        target_keys = primary_keys(target_schema)
+
+        tables = []
+        for table_name in sorted(source_keys):
+            columns = source_columns.get(table_name)
+            if columns and columns == target_columns.get(table_name) \
+                    and source_keys[table_name] == target_keys.get(table_name):
+                tables.append((table_name, columns, source_keys[table_name]))
+        return tables
+
+    def _compare_tables_data(self, source_schema, target_schema, cancel_event):
+        """
+        Compara os dados das tabelas por checksums de intervalos da chave primária;
+        só as linhas dos intervalos divergentes são baixadas.
+        """
+        tables = self._comparable_data_tables(source_schema, target_schema)
+        comparer = TableDataComparator(self.source_connection, self.target_connection)
+        self._post_progress("Comparando dados", 0, len(tables))
+        self.source_connection.connect()
+        self.target_connection.connect()
+        try:
+            for compared, (table_name, columns, key_columns) in enumerate(tables, start=1):
+                if cancel_event.is_set():
+                    return
+
+                header = "  " + " | ".join(columns)
+                source_lines = [header]
+                target_lines = [header]
+                differences = 0
+                for difference in comparer.iter_differences(table_name, columns, key_columns, cancel_event):
+                    differences += 1
+                    if differences > DATA_DIFF_DISPLAY_LIMIT:
+                        continue
+                    source_text = self._format_data_row(difference.source_row)
+                    target_text = self._format_data_row(difference.target_row)
+                    if difference.change == 'added':
+                        source_lines.append(f"- {source_text}")
+                        target_lines.append("")
+                    elif difference.change == 'dropped':
+                        source_lines.append("")
+                        target_lines.append(f"+ {target_text}")
+                    else:
+                        source_lines.append(f"~ {source_text}")
+                        target_lines.append(f"~ {target_text}")
+
+                if differences:
+                    if differences > DATA_DIFF_DISPLAY_LIMIT:
+                        note = f"  ... {differences - DATA_DIFF_DISPLAY_LIMIT} linhas divergentes não exibidas"
+                        source_lines.append(note)
+                        target_lines.append(note)
+                    self._post_to_ui(self._add_result, ComparisonEntry(
+                        table_name, "Table Data", ACTION_ALTER, 'N/A', 'N/A',
+                        "\n".join(source_lines), "\n".join(target_lines)
+                    ))
+                self._post_progress(
+                    "Comparando dados", compared, len(tables), f"linhas baixadas {comparer.rows_fetched}"
+                )
+        finally:
+            self.source_connection.close()
+            self.target_connection.close()
+
+    def _format_data_row(self, row):
+        """Texto de uma linha de dados para exibição"""
+        if row is None:
+            return ""
+        return " | ".join("NULL" if value is None else str(value) for value in row)
+
+    def _add_result(self, entry):
+        """Registra um objeto alterado ou a criar e o insere na TreeView (thread da interface)"""
+        self.results.add(entry)
+        self._queue_tree_row((entry.object_name, entry.object_type, entry.action))
+
+    def _queue_tree_row(self, row):
+        """Acrescenta uma linha ao modelo; o widget a recebe na próxima etapa de preenchimento"""
+        self._tree_rows.append(row)
+        self._tree_pending.append(row)
+        self._schedule_tree_fill()
+
+    def _reset_treeview(self, rows):
+        """Troca todas as linhas exibidas: as atuais saem e `rows` entram, em etapas"""
+        self._tree_stale_items = list(self.treeview.get_children())
+        self._tree_pending = deque(rows)
+        self._schedule_tree_fill()
+
+    def _schedule_tree_fill(self):
+        if not self._tree_fill_scheduled:
+            self._tree_fill_scheduled = True
+            self.root.after(TREE_CHUNK_DELAY_MS, self._fill_treeview_chunk)
+
+    def _fill_treeview_chunk(self):
+        """
+        Uma etapa do preenchimento: remove até TREE_CHUNK_SIZE linhas antigas ou,
+        quando não há mais nenhuma, insere até TREE_CHUNK_SIZE linhas pendentes.
+        Entre as etapas a interface continua respondendo.
+        """
+        self._tree_fill_scheduled = False
+        if self._tree_stale_items:
+            chunk = self._tree_stale_items[:TREE_CHUNK_SIZE]
+            del self._tree_stale_items[:TREE_CHUNK_SIZE]
+            self.treeview.delete(*chunk)
+        else:
+            for _ in range(min(TREE_CHUNK_SIZE, len(self._tree_pending))):
+                self.treeview.insert("", "end", values=self._tree_pending.popleft())
+
+        if self._tree_stale_items or self._tree_pending:
+            self._schedule_tree_fill()
+
+    def _on_treeview_heading_click(self, column):
+        """
+        Ordena pela coluna clicada (um novo clique inverte a ordem). Ordenar por
+        tipo ou ação agrupa as linhas; dentro do grupo a ordem é pelo nome. A
+        ordenação é feita no modelo e a TreeView é repreenchida em etapas; linhas
+        que chegarem depois entram no fim até a próxima ordenação.
+        """
+        position = TREE_COLUMNS.index(column)
+        descending = self._tree_sort == (column, False)
+        self._tree_sort = (column, descending)
+        self._tree_rows.sort(key=lambda row: (row[position], row[0], row[1]), reverse=descending)
+        self._reset_treeview(self._tree_rows)
 
     def _on_treeview_select(self, event):
         """Manipula seleção na TreeView"""
@@ -525,108 +1103,150 @@ class MainScreen:
         if not item_values:
             return
             
-        object_name = item_values[0]
-        action = item_values[2]
+        object_name, object_type, action = item_values[:3]
 
-        self._display_object_content(object_name, action)
+        self._display_object_content(object_name, object_type, action)
 
-    def _display_object_content(self, object_name, action):
+    def _display_object_content(self, object_name, object_type, action):
         """Exibe o conteúdo do objeto selecionado"""
         self._clear_text_widgets()
 
-        if action == "Alter":
-            self._display_altered_procedure(object_name)
-        elif action == "Create":
-            self._display_create_procedure(object_name)
-
-        self._update_line_numbers()
-
-    def _display_altered_procedure(self, object_name):
-        """Exibe procedure alterada com diff colorizado"""
-        for diff in self.diff_procedures:
-            if diff['procedure_name'] == object_name:
-                # Insere texto fonte
-                self._insert_text_with_coloring(
-                    self.text_source_body, 
-                    diff['source_body']
-                )
-                
-                # Insere texto alvo
-                self._insert_text_with_coloring(
-                    self.text_target_body, 
-                    diff['target_body']
-                )
-                
-                # Atualiza datas
-                self._set_source_modification_date(diff['source_modified'])
-                self._set_target_modification_date(diff['target_modified'])
-                break
-
-    def _display_create_procedure(self, object_name):
-        """Exibe procedure que precisa ser criada"""
-        for proc in self.to_create_procedures:
-            if proc['procedure_name'] == object_name:
-                # Texto fonte com a procedure completa
-                self.text_source_body.config(state="normal")
-                self.text_source_body.insert("1.0", proc['procedure_body'])
-                self.text_source_body.config(state="disabled")
-                
-                # Texto alvo vazio
-                self.text_target_body.config(state="normal")
-                self.text_target_body.insert("1.0", "-- Procedure não existe no target")
-                self.text_target_body.config(state="disabled")
-                
-                # Atualiza datas
-                self._set_source_modification_date(proc.get('last_modified_date', 'N/A'))
-                self._set_target_modification_date('N/A')
-                break
-
-    def _insert_text_with_coloring(self, text_widget, content):
-        """Insere texto com colorização baseada nos prefixos"""
-        text_widget.config(state="normal")
-        
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
-            line_start = f"{i+1}.0"
-            
-            # Insere a linha
-            text_widget.insert("end", line + '\n')
-            
-            # Aplica tag baseada no prefixo
-            if line.startswith("++"):
-                text_widget.tag_add("++", line_start, f"{i+1}.end")
-            elif line.startswith("--"):
-                text_widget.tag_add("--", line_start, f"{i+1}.end")
-            elif line.startswith("||"):
-                text_widget.tag_add("||", line_start, f"{i+1}.end")
-            else:
-                text_widget.tag_add("  ", line_start, f"{i+1}.end")
-        
-        text_widget.config(state="disabled")
+        self._displayed_object = (object_name, object_type)
+        entry = self.results.get(object_name, object_type)
+        if entry is None:
+            return
+
+        if entry.action == ACTION_ALTER and entry.source_body is None:
+            # Resultado reaproveitado da execução anterior: corpos baixados agora
+            self.diff_view.set_lines(["-- Carregando..."], ["-- Carregando..."], tagged=False)
+            self._start_deferred_load(entry)
+        elif entry.action == ACTION_ALTER:
+            self._display_altered_object(*self.results.get_formatted(object_name, object_type))
+        elif entry.action == ACTION_CREATE:
+            self._display_create_object(entry)
+
+        # Atualiza datas
+        self._set_source_modification_date(entry.source_modified)
+        self._set_target_modification_date(entry.target_modified)
+
+    def _start_deferred_load(self, entry):
+        """Baixa em segundo plano os corpos de um objeto reaproveitado da execução anterior"""
+        key = (entry.object_name, entry.object_type)
+        if key in self._loading_objects:
+            return
+        self._loading_objects.add(key)
+        threading.Thread(target=self._load_deferred_object, args=(entry,), daemon=True).start()
+
+    def _load_deferred_object(self, entry):
+        """Baixa os corpos de source e target e calcula os blocos do diff (thread de trabalho)"""
+        try:
+            bodies = []
+            for connection in (self.source_connection, self.target_connection):
+                # Conexão própria: as da comparação podem estar em uso em outra thread
+                reader = connection.clone()
+                reader.connect()
+                try:
+                    records = list(reader.iter_objects_bodies([entry.object_name]))
+                finally:
+                    reader.close()
+                bodies.append((records[0].object_body or "") if records else "")
+
+            cache = DiffCache(default_cache_path())
+            try:
+                blocks = WinMergeLikeComparator(cache=cache).compare_blocks(*bodies)
+            finally:
+                cache.close()
+            loaded = entry._replace(source_body=bodies[0], target_body=bodies[1], diff_blocks=blocks)
+            self._post_to_ui(self._on_deferred_object_loaded, loaded, None)
+        except Exception as e:
+            print(f"Erro ao carregar o objeto: {str(e)}")
+            self._post_to_ui(self._on_deferred_object_loaded, entry, e)
+
+    def _on_deferred_object_loaded(self, entry, error):
+        """Guarda os corpos baixados e exibe o objeto se ele ainda estiver selecionado"""
+        key = (entry.object_name, entry.object_type)
+        self._loading_objects.discard(key)
+        current = self.results.get(*key)
+        if current is None or current.source_body is not None:
+            # Resultado limpo por uma nova comparação enquanto baixava
+            return
+        if error is None:
+            self.results.add(entry)
+        if self._displayed_object != key:
+            return
+        if error is not None:
+            self.diff_view.set_lines([f"-- Erro ao carregar: {error}"], [""], tagged=False)
+            return
+        self._clear_text_widgets()
+        self._display_altered_object(*self.results.get_formatted(*key))
+
+    def _display_altered_object(self, source_body, target_body):
+        """Exibe objeto alterado com diff colorizado"""
+        # Destaque intra-linha é calculado depois, só para as linhas visíveis
+        self.diff_view.set_lines(
+            source_body.split('\n'),
+            target_body.split('\n')
+        )
+
+    def _display_create_object(self, entry):
+        """Exibe objeto que precisa ser criado"""
+        # Texto fonte com o objeto completo, texto alvo vazio (sem cores de marcador)
+        self.diff_view.set_lines(
+            entry.source_body.split('\n'),
+            [f"-- {entry.object_type} não existe no target"],
+            tagged=False
+        )
+
+    def _on_diff_view_render(self):
+        """A janela de linhas foi recriada: o destaque intra-linha precisa ser reaplicado"""
+        self._intraline_done = set()
+        self._schedule_intraline_highlight()
+
+    def _schedule_intraline_highlight(self):
+        """Agenda o destaque intra-linha das linhas visíveis (uma vez por ciclo ocioso)"""
+        if not self.diff_view.tagged or self._intraline_scheduled:
+            return
+        self._intraline_scheduled = True
+        self.root.after_idle(self._highlight_visible_intraline)
+
+    def _highlight_visible_intraline(self):
+        """Calcula e aplica o diff por palavras nas linhas substituídas visíveis"""
+        self._intraline_scheduled = False
+        view = self.diff_view
+        if not view.tagged:
+            return
+
+        left_lines, right_lines = view.left_lines, view.right_lines
+        first, last = view.visible_range()
+        window_start, window_end = view.window_range()
+        last_row = min(last + INTRALINE_MARGIN, window_end, len(left_lines), len(right_lines))
+
+        for row in range(max(first - INTRALINE_MARGIN, window_start), last_row):
+            if row in self._intraline_done:
+                continue
+            self._intraline_done.add(row)
+
+            left = left_lines[row]
+            right = right_lines[row]
+            if not (left.startswith("~ ") and right.startswith("~ ")):
+                continue
+
+            ranges = self._intraline_cache.get(row)
+            if ranges is None:
+                ranges = self._intraline_cache[row] = intraline_changes(left[2:], right[2:])
+
+            # Colunas deslocadas em 2 por causa do marcador "~ "
+            left_ranges, right_ranges = ranges
+            for start, end in left_ranges:
+                view.tag_columns("left", row, start + 2, end + 2, "intraline")
+            for start, end in right_ranges:
+                view.tag_columns("right", row, start + 2, end + 2, "intraline")
 
     def _clear_text_widgets(self):
         """Limpa os widgets de texto"""
-        for widget in [self.text_source_body, self.text_target_body]:
-            widget.config(state="normal")
-            widget.delete("1.0", "end")
-            widget.config(state="disabled")
-
-    def _update_line_numbers(self):
-        """Atualiza o contador de linhas"""
-        self.line_numbers.config(state="normal")
-        self.line_numbers.delete("1.0", "end")
-        
-        # Calcula o número máximo de linhas
-        max_lines = max(
-            int(self.text_source_body.index("end-1c").split(".")[0]),
-            int(self.text_target_body.index("end-1c").split(".")[0])
-        )
-        
-        # Insere números das linhas
-        for i in range(1, max_lines + 1):
-            self.line_numbers.insert("end", f"{i:3d}\n")
-            
-        self.line_numbers.config(state="disabled")
+        self._intraline_cache = {}
+        self._intraline_done = set()
+        self.diff_view.clear()
 
     def _set_source_modification_date(self, date_str):
         """Atualiza a data de modificação do source"""
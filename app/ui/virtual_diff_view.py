@@ -0,0 +1,262 @@
+import tkinter.font as tkfont
+
+# Linhas inseridas nos widgets além da área visível (acima e abaixo)
+VIEW_MARGIN_LINES = 100
+
+# Tag aplicada a cada marcador da saída do comparador (linhas iguais ficam sem tag)
+MARKER_TAGS = {"- ": "deleted", "+ ": "added", "~ ": "modified", "* ": "moved"}
+
+
+def marker_tag_ranges(lines, first_row=1):
+    """
+    Agrupa linhas consecutivas com o mesmo marcador.
+
+    Returns:
+        dict: tag -> lista plana de índices Tk (início, fim, início, fim...),
+              pronta para um único tag_add por tag
+    """
+    ranges = {}
+    current_tag = None
+    run_start = first_row
+    row = first_row
+    for row, line in enumerate(lines, start=first_row):
+        tag = MARKER_TAGS.get(line[:2])
+        if tag != current_tag:
+            if current_tag is not None:
+                ranges.setdefault(current_tag, []).extend((f"{run_start}.0", f"{row}.0"))
+            current_tag = tag
+            run_start = row
+    if current_tag is not None:
+        ranges.setdefault(current_tag, []).extend((f"{run_start}.0", f"{row + 1}.0"))
+    return ranges
+
+
+class VirtualDiffView:
+    """
+    Visão lado a lado virtualizada sobre três widgets de texto (source,
+    números de linha e target).
+
+    O diff completo fica em memória como listas de linhas; apenas a janela
+    visível, mais VIEW_MARGIN_LINES acima e abaixo, é inserida nos widgets.
+    Ao rolar para fora dessa janela ela é recriada em torno da nova posição,
+    então o custo de abrir e rolar não depende do tamanho do objeto. A barra
+    de rolagem vertical representa o documento inteiro.
+
+    A visão também é a única dona da posição de rolagem (vertical e
+    horizontal): barras, roda do mouse e rolagens internas dos widgets apenas
+    registram a posição desejada, e uma única atualização por ciclo ocioso
+    (after_idle) move todos os painéis. Os yscrollcommand/xscrollcommand
+    disparados por esses próprios movimentos são ignorados, então um painel
+    nunca volta a mover os outros.
+
+    As linhas são sempre indexadas a partir de 0 no modelo; `on_render` é
+    chamado sempre que a janela é recriada (as tags extras, como o destaque
+    intra-linha, precisam ser reaplicadas) e `on_scroll` após cada
+    atualização de posição.
+    """
+
+    def __init__(self, left, numbers, right, v_scroll, h_scroll=None, on_render=None,
+                 on_scroll=None, margin=VIEW_MARGIN_LINES):
+        self.left = left
+        self.numbers = numbers
+        self.right = right
+        self.v_scroll = v_scroll
+        self.h_scroll = h_scroll
+        self.on_render = on_render
+        self.on_scroll = on_scroll
+        self.margin = margin
+
+        self.left_lines = []
+        self.right_lines = []
+        self.tagged = True
+        self.top = 0
+        self.window_start = 0
+        self.window_end = 0
+        self._linespace = None
+
+        # Posições pendentes, aplicadas juntas no próximo ciclo ocioso
+        self._pending_top = None
+        self._pending_x = None
+        self._flush_scheduled = False
+        # Fração horizontal aplicada a cada painel (para reconhecer os próprios callbacks)
+        self._applied_x = {}
+        self._syncing = False
+
+    @property
+    def total(self):
+        return max(len(self.left_lines), len(self.right_lines))
+
+    def visible_count(self):
+        """Quantidade de linhas que cabem na área visível."""
+        if self._linespace is None:
+            self._linespace = tkfont.Font(font=self.left.cget("font")).metrics("linespace") or 1
+        return max(self.left.winfo_height() // self._linespace, 1) + 1
+
+    def visible_range(self):
+        """(primeira, última + 1) linhas do modelo na área visível."""
+        return self.top, min(self.top + self.visible_count(), self.total)
+
+    def window_range(self):
+        """(primeira, última + 1) linhas do modelo inseridas nos widgets."""
+        return self.window_start, self.window_end
+
+    def set_lines(self, left_lines, right_lines, tagged=True):
+        """Troca o conteúdo exibido; `tagged` aplica as cores dos marcadores."""
+        self.left_lines = left_lines
+        self.right_lines = right_lines
+        self.tagged = tagged
+        self._pending_top = None
+        self._render(0)
+
+    def clear(self):
+        self.set_lines([], [])
+
+    def tag_columns(self, side, row, start_column, end_column, tag):
+        """Aplica `tag` a colunas de uma linha do modelo, se ela estiver na janela."""
+        if not self.window_start <= row < self.window_end:
+            return
+        widget = self.left if side == "left" else self.right
+        widget_row = row - self.window_start + 1
+        widget.tag_add(tag, f"{widget_row}.{start_column}", f"{widget_row}.{end_column}")
+
+    def yview(self, *args):
+        """Comando da barra de rolagem vertical ('moveto' ou 'scroll')."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_count() - 1
+            # Relativo à posição pendente: vários eventos no mesmo quadro se somam
+            base = self.top if self._pending_top is None else self._pending_top
+            self.scroll_to(base + amount)
+
+    def xview(self, *args):
+        """Comando da barra de rolagem horizontal ('moveto' ou 'scroll')."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._pending_x = float(args[1])
+            self._schedule_flush()
+        elif args[0] == "scroll":
+            # O painel fonte rola e o seu xscrollcommand propaga a posição
+            self.left.xview_scroll(int(args[1]), args[2])
+
+    def scroll(self, delta, what="units"):
+        self.yview("scroll", delta, what)
+
+    def scroll_to(self, top):
+        """Agenda a linha `top` do modelo no topo da área visível."""
+        self._pending_top = top
+        self._schedule_flush()
+
+    def on_widget_scrolled(self, widget, first):
+        """
+        Chamado pelo yscrollcommand dos widgets. Movimentos causados pela
+        própria visão (que já correspondem a `top`) são ignorados; os demais
+        (teclado, seleção com o mouse) viram a nova posição de todos os painéis.
+        """
+        if self._syncing:
+            return
+        window_size = self.window_end - self.window_start
+        widget_top = self.window_start + round(float(first) * window_size)
+        if widget_top != self.top:
+            self.scroll_to(widget_top)
+
+    def on_widget_x_scrolled(self, widget, first, last):
+        """Chamado pelo xscrollcommand dos painéis de texto."""
+        if self._syncing or abs(float(first) - self._applied_x.get(widget, -1.0)) < 1e-9:
+            return
+        self._applied_x[widget] = float(first)
+        self._pending_x = float(first)
+        if self.h_scroll is not None:
+            self.h_scroll.set(first, last)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.left.after_idle(self._flush)
+
+    def _flush(self):
+        """Aplica de uma vez as posições acumuladas desde o último ciclo."""
+        self._flush_scheduled = False
+        self._syncing = True
+        try:
+            self._apply_pending()
+        finally:
+            self._syncing = False
+        if self.on_scroll:
+            self.on_scroll()
+
+    def _apply_pending(self):
+        if self._pending_top is not None:
+            top, self._pending_top = self._pending_top, None
+            self._apply_top(top)
+        if self._pending_x is not None:
+            fraction, self._pending_x = self._pending_x, None
+            for widget in (self.left, self.right):
+                if self._applied_x.get(widget) != fraction:
+                    self._applied_x[widget] = fraction
+                    widget.xview_moveto(fraction)
+            if self.h_scroll is not None:
+                self.h_scroll.set(*self.left.xview())
+
+    def _apply_top(self, top):
+        """Posiciona `top` no topo, recriando a janela só quando necessário."""
+        visible = self.visible_count()
+        top = max(0, min(top, self.total - visible + 1))
+        fits = (self.window_start <= top
+                and (top + visible <= self.window_end or self.window_end == self.total)
+                and (top - self.window_start >= self.margin // 2 or self.window_start == 0))
+        if fits:
+            self._place(top)
+        else:
+            self._render(top)
+
+    def _render(self, top):
+        """Recria a janela de linhas em torno de `top` (imediatamente)."""
+        visible = self.visible_count()
+        total = self.total
+        top = max(0, min(top, total - visible + 1))
+        start = max(top - self.margin, 0)
+        end = min(top + visible + self.margin, total)
+        self.window_start, self.window_end = start, end
+
+        for widget, lines in ((self.left, self.left_lines), (self.right, self.right_lines)):
+            window = lines[start:end]
+            widget.config(state="normal")
+            widget.delete("1.0", "end")
+            if window:
+                widget.insert("end", "\n".join(window) + "\n")
+                if self.tagged:
+                    for tag, indices in marker_tag_ranges(window).items():
+                        widget.tag_add(tag, *indices)
+            widget.config(state="disabled")
+
+        self.numbers.config(state="normal")
+        self.numbers.delete("1.0", "end")
+        self.numbers.insert("end", "".join(f"{row:3d}\n" for row in range(start + 1, end + 1)))
+        self.numbers.config(state="disabled")
+
+        self._place(top)
+        if self.on_render:
+            self.on_render()
+
+    def _place(self, top):
+        """Rola os widgets dentro da janela atual e atualiza a barra de rolagem."""
+        self.top = top
+        offset = top - self.window_start
+        for widget in (self.left, self.numbers, self.right):
+            # O widget guarda as linhas da janela mais a linha vazia após o último
+            # '\n': a fração é relativa ao total real de linhas do widget
+            line_count = int(widget.index("end-1c").split(".")[0])
+            widget.yview_moveto(offset / line_count if line_count else 0.0)
+
+        total = self.total
+        if total:
+            self.v_scroll.set(top / total, min((top + self.visible_count()) / total, 1.0))
+        else:
+            self.v_scroll.set(0.0, 1.0)
@@ -1,5 +1,7 @@
 # app/utils/
 
+from app.utils.connection_pool import ConnectionPool, connection_pool
 from app.utils.database_connection_manager import DatabaseConnectionManager
 from app.utils.saved_connections_manager import SavedConnectionsManager
+from app.utils.snapshot_store import SnapshotStore
 from app.utils.screen_navigation_manager import ScreenNavigationManager
\ No newline at end of file
@@ -0,0 +1,155 @@
+import threading
+import time
+
+# Max connections (in use + idle) per pool key
+POOL_MAX_SIZE = 4
+# Idle connections older than this (seconds) are closed
+POOL_IDLE_TIMEOUT = 300
+# Idle connections older than this (seconds) are pinged before being reused
+POOL_HEALTH_CHECK_AFTER = 30
+# How long acquire() waits (seconds) for a free slot before giving up
+POOL_ACQUIRE_TIMEOUT = 30
+
+
+class ConnectionPool:
+    """
+    Small thread-safe pool of database connections, grouped by key
+    (server, database, authentication and credentials).
+
+    Connections are health-checked before reuse when they have been idle for a
+    while, evicted after POOL_IDLE_TIMEOUT and capped at `max_size` per key.
+    """
+
+    def __init__(self, max_size=POOL_MAX_SIZE, idle_timeout=POOL_IDLE_TIMEOUT,
+                 health_check_after=POOL_HEALTH_CHECK_AFTER, acquire_timeout=POOL_ACQUIRE_TIMEOUT):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._condition = threading.Condition()
+        self._idle = {}  # key -> [(connection, released_at)]
+        self._in_use = {}  # key -> number of checked out connections
+
+    def acquire(self, key, factory):
+        """
+        Returns a connection for `key`, reusing an idle one when possible or
+        creating a new one with `factory()`.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            candidate = None
+            expired = []
+            try:
+                with self._condition:
+                    expired = self._take_expired()
+                    while True:
+                        idle = self._idle.get(key)
+                        if idle:
+                            candidate = idle.pop()
+                            break
+                        if self._in_use.get(key, 0) < self.max_size:
+                            break
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise Exception(f"Connection pool exhausted for server {key[0]}")
+                        self._condition.wait(remaining)
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+            finally:
+                # Closing can block on the network: never do it while holding the lock
+                for stale in expired:
+                    self._close_quietly(stale)
+
+            if candidate is None:
+                try:
+                    return factory()
+                except Exception:
+                    self._discard(key)
+                    raise
+
+            connection, released_at = candidate
+            if time.monotonic() - released_at < self.health_check_after or self._is_healthy(connection):
+                return connection
+
+            # Stale connection: drop it and try again
+            self._close_quietly(connection)
+            self._discard(key)
+
+    def release(self, key, connection):
+        """Returns a connection to the pool (or closes it when the pool is full)."""
+        try:
+            connection.rollback()
+            reusable = True
+        except Exception:
+            reusable = False
+
+        to_close = None
+        with self._condition:
+            self._in_use[key] = max(self._in_use.get(key, 0) - 1, 0)
+            idle = self._idle.setdefault(key, [])
+            if reusable and len(idle) + self._in_use[key] < self.max_size:
+                idle.append((connection, time.monotonic()))
+            else:
+                to_close = connection
+            self._condition.notify()
+
+        if to_close is not None:
+            self._close_quietly(to_close)
+
+    def close_all(self):
+        """Closes every idle connection in the pool."""
+        with self._condition:
+            idle_lists = list(self._idle.values())
+            self._idle = {}
+
+        for idle in idle_lists:
+            for connection, _ in idle:
+                self._close_quietly(connection)
+
+    def _discard(self, key):
+        """Frees the slot of a connection that will not come back."""
+        with self._condition:
+            self._in_use[key] = max(self._in_use.get(key, 0) - 1, 0)
+            self._condition.notify()
+
+    def _take_expired(self):
+        """
+        Removes idle connections past the idle timeout from the pool and
+        returns them (caller holds the lock and closes them after releasing it).
+        """
+        now = time.monotonic()
+        expired = []
+        for key, idle in self._idle.items():
+            alive = []
+            for connection, released_at in idle:
+                if now - released_at > self.idle_timeout:
+                    expired.append(connection)
+                else:
+                    alive.append((connection, released_at))
+            self._idle[key] = alive
+        return expired
+
+    def _is_healthy(self, connection):
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            return True
+        except Exception:
+            return False
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+# Pool shared by every DatabaseConnectionManager
+connection_pool = ConnectionPool()
@@ -1,4 +1,196 @@
+from collections import namedtuple
+
 import pyodbc
+from app.utils.connection_pool import connection_pool
+
+# Max names per body query (SQL Server caps a statement at 2100 parameters)
+BODY_FETCH_BATCH_SIZE = 500
+# Rows pulled per fetchmany() round trip by the streaming readers
+FETCH_ARRAY_SIZE = 500
+
+# Compact records yielded by the streaming readers
+ObjectFingerprint = namedtuple("ObjectFingerprint", "object_name object_type last_modified_date object_hash object_id")
+ObjectCatalogEntry = namedtuple("ObjectCatalogEntry", "object_name object_type object_id last_modified_date")
+ObjectRecord = namedtuple("ObjectRecord", "object_name object_type last_modified_date object_body")
+
+# Programmable objects compared (sys.objects.type -> label shown in the UI)
+OBJECT_TYPES = {
+    "P": "Procedure",
+    "V": "View",
+    "FN": "Function",
+    "IF": "Function",
+    "TF": "Function",
+    "TR": "Trigger",
+}
+
+# Every programmable object with a definition, identified as schema.name.
+# One query covers all types, so adding a type costs no extra round trip.
+_OBJECT_NAME_SQL = "s.name + N'.' + o.name"
+_OBJECTS_FROM_SQL = f"""
+    FROM
+        sys.sql_modules m
+        INNER JOIN sys.objects o ON o.object_id = m.object_id
+        INNER JOIN sys.schemas s ON s.schema_id = o.schema_id
+    WHERE
+        o.is_ms_shipped = 0
+        AND o.type IN ({", ".join(f"'{code}'" for code in OBJECT_TYPES)})
+"""
+_OBJECTS_ORDER_SQL = f"ORDER BY ({_OBJECT_NAME_SQL}) COLLATE Latin1_General_BIN2"
+
+# Before SQL Server 2016 (major version 13) HASHBYTES input is capped at 8000 bytes
+HASHBYTES_UNLIMITED_MAJOR_VERSION = 13
+HASHBYTES_MAX_INPUT_BYTES = 8000
+# Azure SQL Database (5) and Managed Instance (8) report an older major version
+# but have no HASHBYTES input limit
+_AZURE_ENGINE_EDITIONS = (5, 8)
+
+_FINGERPRINT_HASH_SQL = "HASHBYTES('SHA2_256', m.definition)"
+# Longer definitions get a NULL hash, which the caller treats as a mismatch
+# and resolves by downloading the body
+_CAPPED_FINGERPRINT_HASH_SQL = f"""
+        CASE WHEN DATALENGTH(m.definition) > {HASHBYTES_MAX_INPUT_BYTES} THEN NULL
+             ELSE {_FINGERPRINT_HASH_SQL} END"""
+
+
+def _fingerprint_select_sql(hash_input_capped=False):
+    hash_sql = _CAPPED_FINGERPRINT_HASH_SQL if hash_input_capped else _FINGERPRINT_HASH_SQL
+    return f"""
+    SELECT
+        {_OBJECT_NAME_SQL} AS [object_name],
+        o.type AS [object_type],
+        o.modify_date AS [last_modified_date],
+        {hash_sql} AS [object_hash],
+        o.object_id AS [object_id]
+"""
+
+
+_BODY_SELECT_SQL = f"""
+    SELECT
+        {_OBJECT_NAME_SQL} AS [object_name],
+        o.type AS [object_type],
+        o.modify_date AS [last_modified_date],
+        m.definition AS [object_body]
+"""
+
+# Table structure records (see get_tables_schema)
+TableInfo = namedtuple("TableInfo", "table_name object_id last_modified_date")
+TableColumn = namedtuple(
+    "TableColumn",
+    "table_name column_name column_id type_name max_length precision scale is_nullable "
+    "is_identity default_definition collation_name computed_definition"
+)
+TableIndex = namedtuple(
+    "TableIndex",
+    "table_name index_name is_system_named index_type is_unique is_primary_key "
+    "is_unique_constraint filter_definition key_columns included_columns"
+)
+TableForeignKey = namedtuple(
+    "TableForeignKey",
+    "table_name constraint_name is_system_named referenced_table columns referenced_columns "
+    "delete_action update_action is_disabled"
+)
+TableCheckConstraint = namedtuple(
+    "TableCheckConstraint", "table_name constraint_name is_system_named definition is_disabled"
+)
+TablesSchema = namedtuple("TablesSchema", "tables columns indexes foreign_keys check_constraints")
+
+# One batch, one round trip: every result set covers all user tables at once
+_TABLES_SCHEMA_SQL = """
+    SET NOCOUNT ON;
+
+    SELECT s.name + N'.' + t.name, t.object_id, t.modify_date
+    FROM sys.tables t
+        INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+    WHERE t.is_ms_shipped = 0;
+
+    SELECT
+        s.name + N'.' + t.name, c.name, c.column_id, ty.name, c.max_length, c.precision, c.scale,
+        c.is_nullable, c.is_identity, dc.definition, c.collation_name, cc.definition
+    FROM sys.tables t
+        INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+        INNER JOIN sys.columns c ON c.object_id = t.object_id
+        INNER JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+        LEFT JOIN sys.default_constraints dc ON dc.object_id = c.default_object_id
+        LEFT JOIN sys.computed_columns cc ON cc.object_id = c.object_id AND cc.column_id = c.column_id
+    WHERE t.is_ms_shipped = 0;
+
+    SELECT
+        s.name + N'.' + t.name, i.name, ISNULL(kc.is_system_named, 0), i.type_desc, i.is_unique,
+        i.is_primary_key, i.is_unique_constraint, i.filter_definition,
+        c.name, ic.is_descending_key, ic.is_included_column
+    FROM sys.indexes i
+        INNER JOIN sys.tables t ON t.object_id = i.object_id
+        INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+        INNER JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+        LEFT JOIN sys.key_constraints kc ON kc.parent_object_id = i.object_id AND kc.unique_index_id = i.index_id
+    WHERE t.is_ms_shipped = 0 AND i.type > 0
+    ORDER BY i.object_id, i.index_id, ic.is_included_column, ic.key_ordinal, ic.index_column_id;
+
+    SELECT
+        s.name + N'.' + t.name, fk.name, fk.is_system_named, rs.name + N'.' + rt.name,
+        pc.name, rc.name, fk.delete_referential_action_desc, fk.update_referential_action_desc,
+        fk.is_disabled
+    FROM sys.foreign_keys fk
+        INNER JOIN sys.tables t ON t.object_id = fk.parent_object_id
+        INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+        INNER JOIN sys.tables rt ON rt.object_id = fk.referenced_object_id
+        INNER JOIN sys.schemas rs ON rs.schema_id = rt.schema_id
+        INNER JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+        INNER JOIN sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+        INNER JOIN sys.columns rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+    WHERE t.is_ms_shipped = 0
+    ORDER BY fk.object_id, fkc.constraint_column_id;
+
+    SELECT s.name + N'.' + t.name, ck.name, ck.is_system_named, ck.definition, ck.is_disabled
+    FROM sys.check_constraints ck
+        INNER JOIN sys.tables t ON t.object_id = ck.parent_object_id
+        INNER JOIN sys.schemas s ON s.schema_id = t.schema_id
+    WHERE t.is_ms_shipped = 0;
+"""
+
+def _quote_identifier(identifier):
+    return "[" + identifier.replace("]", "]]") + "]"
+
+
+def _quote_table(table_name):
+    """Quotes a schema-qualified 'schema.name' table name."""
+    schema, name = table_name.split(".", 1)
+    return f"{_quote_identifier(schema)}.{_quote_identifier(name)}"
+
+
+def _key_bound(key_columns, values, operator):
+    """
+    Row-value comparison `(k1, k2, ...) <operator> (v1, v2, ...)` for '>=' or
+    '<', expanded into AND/OR terms since T-SQL has no tuple comparison.
+    Returns (sql, params).
+    """
+    strict = ">" if operator == ">=" else "<"
+    terms = []
+    params = []
+    for position, column in enumerate(key_columns):
+        parts = [f"{_quote_identifier(previous)} = ?" for previous in key_columns[:position]]
+        last = position == len(key_columns) - 1
+        parts.append(f"{_quote_identifier(column)} {operator if last else strict} ?")
+        terms.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:position + 1])
+    return "(" + " OR ".join(terms) + ")", params
+
+
+def _key_range(key_columns, low, high):
+    """WHERE clause for low <= key < high (None = unbounded). Returns (sql, params)."""
+    clauses = []
+    params = []
+    if low is not None:
+        sql, bound_params = _key_bound(key_columns, low, ">=")
+        clauses.append(sql)
+        params.extend(bound_params)
+    if high is not None:
+        sql, bound_params = _key_bound(key_columns, high, "<")
+        clauses.append(sql)
+        params.extend(bound_params)
+    return (" AND ".join(clauses) or "1 = 1"), params
+
 
 class DatabaseConnectionManager:
     def __init__(self, server, username=None, password=None, database=None, authentication="Windows Authentication"):
@@ -8,19 +200,53 @@ class DatabaseConnectionManager:
         self.database = database
         self.authentication = authentication
         self.connection = None
+        self._hash_input_capped = None
         print(f'connecting to {self.server}')
 
+    def clone(self):
+        """
+        New manager for the same server and database. Its connect() takes a
+        separate pooled connection, so it can be used from another thread
+        while this manager's connection is busy.
+        """
+        manager = DatabaseConnectionManager(self.server, self.username, self.password,
+                                            self.database, self.authentication)
+        manager._hash_input_capped = self._hash_input_capped
+        return manager
+
+    def identity(self):
+        """
+        (server, database, authentication, username) identifying what this
+        manager can see; snapshots are kept apart per login, since two logins
+        on the same database may not have permission on the same objects.
+        """
+        username = self.username if self.authentication != "Windows Authentication" else None
+        return (self.server, self.database or "master", self.authentication, username or "")
+
+    def _pool_key(self):
+        return (self.server, self.database or "master", self.authentication, self.username, self.password)
+
+    def _open_connection(self):
+        if self.authentication == "Windows Authentication":
+            return pyodbc.connect(
+                f'DRIVER={{SQL Server}};SERVER={self.server};Trusted_Connection=yes;DATABASE={self.database or "master"}'
+            )
+        return pyodbc.connect(
+            f'DRIVER={{SQL Server}};SERVER={self.server};UID={self.username};PWD={self.password};DATABASE={self.database or "master"}'
+        )
+
     def connect(self):
+        """
+        Takes a connection from the shared pool (opening a new one if needed)
+        and returns it. Call close() to hand it back to the pool.
+        """
+        if self.connection:
+            return self.connection
+
         try:
-            if self.authentication == "Windows Authentication":
-                self.connection = pyodbc.connect(
-                    f'DRIVER={{SQL Server}};SERVER={self.server};Trusted_Connection=yes;DATABASE={self.database or "master"}'
-                )
-            else:
-                self.connection = pyodbc.connect(
-                    f'DRIVER={{SQL Server}};SERVER={self.server};UID={self.username};PWD={self.password};DATABASE={self.database or "master"}'
-                )
+            self.connection = connection_pool.acquire(self._pool_key(), self._open_connection)
             print("Connection successful")
+            return self.connection
         except pyodbc.Error as e:
             raise Exception(f"Error connecting to the database: {e}")
 
@@ -44,40 +270,330 @@ class DatabaseConnectionManager:
 
     def close(self):
         if self.connection:
-            self.connection.close()
-            print("Connection closed")
+            connection_pool.release(self._pool_key(), self.connection)
+            self.connection = None
+            print("Connection released")
 
-    def get_procedures_schema(self):
-        print(f"Fetching procedures schema for database: {self.database}")
+    def _iter_rows(self, query, params=(), arraysize=FETCH_ARRAY_SIZE):
+        """Runs `query` and yields its rows, pulling `arraysize` rows per round trip."""
         if not self.connection:
             raise Exception("Not connected to the database")
 
-        cursor = None
+        cursor = self.connection.cursor()
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(f"""
+            cursor.arraysize = arraysize
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def _iter_object_batches(self, select_sql, object_names, batch_size, arraysize):
+        """Runs `select_sql` for the given objects, at most `batch_size` names per query."""
+        for start in range(0, len(object_names), batch_size):
+            batch = list(object_names[start:start + batch_size])
+            placeholders = ", ".join("?" for _ in batch)
+            yield from self._iter_rows(f"""
+                {select_sql}
+                {_OBJECTS_FROM_SQL}
+                    AND {_OBJECT_NAME_SQL} IN ({placeholders})
+                {_OBJECTS_ORDER_SQL}
+            """, batch, arraysize=arraysize)
+
+    def _is_hash_input_capped(self):
+        """
+        True when the server's HASHBYTES only accepts 8000 bytes of input
+        (SQL Server 2012/2014). Checked once per manager.
+        """
+        if self._hash_input_capped is None:
+            rows = list(self._iter_rows("""
                 SELECT
-                    p.name AS [procedure_name],
-                    p.modify_date  AS [last_modified_date],
-                    OBJECT_DEFINITION(p.object_id) AS [procedure_body]
-                FROM 
-                    sys.procedures p
-                WHERE 
-                    p.is_ms_shipped = 0
-                ORDER BY
-                    [procedure_name]
-            """)
-            procedures = [
-                {
-                    "procedure_name": row[0],
-                    "last_modified_date": row[1],
-                    "procedure_body": row[2]
-                }
-                for row in cursor.fetchall()
-            ]
-            return procedures
+                    CONVERT(nvarchar(128), SERVERPROPERTY('ProductVersion')),
+                    CONVERT(int, SERVERPROPERTY('EngineEdition'))
+            """))
+            version, engine_edition = rows[0]
+            major_version = int(version.split(".")[0])
+            self._hash_input_capped = (major_version < HASHBYTES_UNLIMITED_MAJOR_VERSION
+                                       and engine_edition not in _AZURE_ENGINE_EDITIONS)
+        return self._hash_input_capped
+
+    def _fingerprint_from_row(self, row):
+        return ObjectFingerprint(row[0], OBJECT_TYPES[row[1].strip()], row[2],
+                                 bytes(row[3]) if row[3] is not None else None, row[4])
+
+    def iter_objects_fingerprints(self, arraysize=FETCH_ARRAY_SIZE):
+        """
+        First phase of the hash-first fetch: streams schema-qualified name,
+        type, modify_date and a server-computed SHA2_256 hash of every
+        programmable object (procedures, views, functions and triggers) in a
+        single query ordered by name (binary collation), without transferring
+        the definitions themselves.
+        On servers whose HASHBYTES is capped at 8000 bytes, longer definitions
+        come back with a None hash.
+        """
+        print(f"Fetching objects fingerprints for database: {self.database}")
+        try:
+            select_sql = _fingerprint_select_sql(self._is_hash_input_capped())
+            for row in self._iter_rows(f"""
+                {select_sql}
+                {_OBJECTS_FROM_SQL}
+                {_OBJECTS_ORDER_SQL}
+            """, arraysize=arraysize):
+                yield self._fingerprint_from_row(row)
         except pyodbc.Error as e:
-            raise Exception(f"Error fetching procedures schema: {e}")
+            raise Exception(f"Error fetching objects fingerprints: {e}")
+
+    def iter_objects_catalog(self, arraysize=FETCH_ARRAY_SIZE):
+        """
+        Streams name, type, object_id and modify_date of every programmable
+        object ordered by name. Reads only catalog metadata, no definitions.
+        """
+        try:
+            for row in self._iter_rows(f"""
+                SELECT
+                    {_OBJECT_NAME_SQL} AS [object_name],
+                    o.type AS [object_type],
+                    o.object_id AS [object_id],
+                    o.modify_date AS [last_modified_date]
+                {_OBJECTS_FROM_SQL}
+                {_OBJECTS_ORDER_SQL}
+            """, arraysize=arraysize):
+                yield ObjectCatalogEntry(row[0], OBJECT_TYPES[row[1].strip()], row[2], row[3])
+        except pyodbc.Error as e:
+            raise Exception(f"Error fetching objects catalog: {e}")
+
+    def iter_objects_hashes(self, object_names, batch_size=BODY_FETCH_BATCH_SIZE,
+                            arraysize=FETCH_ARRAY_SIZE):
+        """Streams fingerprints only for the given objects, `batch_size` names per query."""
+        try:
+            select_sql = _fingerprint_select_sql(self._is_hash_input_capped())
+            for row in self._iter_object_batches(select_sql, object_names,
+                                                 batch_size, arraysize):
+                yield self._fingerprint_from_row(row)
+        except pyodbc.Error as e:
+            raise Exception(f"Error fetching objects hashes: {e}")
+
+    def iter_objects_fingerprints_since(self, snapshot, arraysize=FETCH_ARRAY_SIZE):
+        """
+        Incremental variant of iter_objects_fingerprints.
+
+        `snapshot` maps object name -> ObjectFingerprint from a previous run.
+        Objects whose object_id and modify_date are unchanged reuse the stored
+        hash; only new or modified ones are hashed on the server.
+        Output is ordered by name, like iter_objects_fingerprints.
+        """
+        if not snapshot:
+            yield from self.iter_objects_fingerprints(arraysize)
+            return
+
+        print(f"Fetching objects catalog for database: {self.database}")
+        catalog = list(self.iter_objects_catalog(arraysize))
+        changed = []
+        for entry in catalog:
+            previous = snapshot.get(entry.object_name)
+            if (previous is None or previous.object_id != entry.object_id
+                    or previous.last_modified_date != entry.last_modified_date):
+                changed.append(entry.object_name)
+
+        # Too many changes: a single ordered pass is cheaper than IN batches
+        if len(changed) > len(catalog) // 2:
+            yield from self.iter_objects_fingerprints(arraysize)
+            return
+
+        print(f"Hashing {len(changed)} changed objects for database: {self.database}")
+        changed_fingerprints = {
+            fingerprint.object_name: fingerprint
+            for fingerprint in self.iter_objects_hashes(changed, arraysize=arraysize)
+        }
+        changed = set(changed)
+        for entry in catalog:
+            if entry.object_name not in changed:
+                yield snapshot[entry.object_name]
+            elif entry.object_name in changed_fingerprints:
+                # Missing here only if it was dropped between the two queries
+                yield changed_fingerprints[entry.object_name]
+
+    def iter_objects_bodies(self, object_names, batch_size=BODY_FETCH_BATCH_SIZE,
+                            arraysize=FETCH_ARRAY_SIZE):
+        """
+        Second phase of the hash-first fetch: streams the full definition only
+        for the given objects, querying at most `batch_size` names at a time.
+        Records come out ordered by name within each batch.
+        """
+        print(f"Fetching {len(object_names)} object bodies for database: {self.database}")
+        try:
+            for row in self._iter_object_batches(_BODY_SELECT_SQL, object_names,
+                                                 batch_size, arraysize):
+                yield ObjectRecord(row[0], OBJECT_TYPES[row[1].strip()], row[2], row[3])
+        except pyodbc.Error as e:
+            raise Exception(f"Error fetching objects bodies: {e}")
+
+    def _fetch_result_sets(self, batch, arraysize=FETCH_ARRAY_SIZE):
+        """Runs a multi-statement batch and returns the rows of each result set."""
+        if not self.connection:
+            raise Exception("Not connected to the database")
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.arraysize = arraysize
+            cursor.execute(batch)
+            result_sets = []
+            while True:
+                rows = []
+                while True:
+                    chunk = cursor.fetchmany()
+                    if not chunk:
+                        break
+                    rows.extend(chunk)
+                result_sets.append(rows)
+                if not cursor.nextset():
+                    break
+            return result_sets
         finally:
-            if cursor:
-                cursor.close()
\ No newline at end of file
+            cursor.close()
+
+    def get_tables_schema(self):
+        """
+        Reads the structure of every user table (columns, indexes with their
+        columns, foreign keys and check constraints) in a single round trip.
+        Tables are identified as schema.name.
+
+        Returns:
+            TablesSchema: one list of records per kind of item
+        """
+        print(f"Fetching tables schema for database: {self.database}")
+        try:
+            tables, columns, index_rows, foreign_key_rows, checks = self._fetch_result_sets(_TABLES_SCHEMA_SQL)
+        except pyodbc.Error as e:
+            raise Exception(f"Error fetching tables schema: {e}")
+
+        # Index and foreign key queries return one row per column, in order
+        indexes = []
+        for row in index_rows:
+            if indexes and indexes[-1][0] == row[0] and indexes[-1][1] == row[1]:
+                index = indexes[-1]
+            else:
+                index = list(row[:8]) + [[], []]
+                indexes.append(index)
+            if row[10]:
+                index[9].append(row[8])
+            else:
+                index[8].append((row[8], bool(row[9])))
+
+        foreign_keys = []
+        for row in foreign_key_rows:
+            if foreign_keys and foreign_keys[-1][0] == row[0] and foreign_keys[-1][1] == row[1]:
+                foreign_key = foreign_keys[-1]
+            else:
+                foreign_key = [row[0], row[1], row[2], row[3], [], [], row[6], row[7], row[8]]
+                foreign_keys.append(foreign_key)
+            foreign_key[4].append(row[4])
+            foreign_key[5].append(row[5])
+
+        return TablesSchema(
+            tables=[TableInfo(*row) for row in tables],
+            columns=[TableColumn(*row) for row in columns],
+            indexes=[
+                TableIndex(*index[:8], key_columns=tuple(index[8]), included_columns=tuple(index[9]))
+                for index in indexes
+            ],
+            foreign_keys=[
+                TableForeignKey(*fk[:4], columns=tuple(fk[4]), referenced_columns=tuple(fk[5]),
+                                delete_action=fk[6], update_action=fk[7], is_disabled=fk[8])
+                for fk in foreign_keys
+            ],
+            check_constraints=[TableCheckConstraint(*row) for row in checks]
+        )
+
+    def get_range_checksums(self, table_name, key_columns, low, high, boundaries):
+        """
+        Server-side aggregate of the rows with low <= key < high, split into
+        len(boundaries) + 1 buckets at the given (sorted) key boundaries.
+        Only one summary per bucket crosses the network.
+
+        Each row (every column, serialized with FOR XML RAW) is hashed with
+        SHA2_256 and the first 8 bytes of the hashes are summed, so moving a
+        value from one row to another changes the sum. On servers whose
+        HASHBYTES is capped at 8000 bytes, longer rows are not hashed but
+        counted apart; the caller compares buckets holding them row by row.
+
+        Returns:
+            list: (row count, sum of row hashes, unhashed rows) per bucket;
+                  empty buckets are (0, None, 0)
+        """
+        keys = ", ".join(_quote_identifier(column) for column in key_columns)
+        range_sql, range_params = _key_range(key_columns, low, high)
+        bucket_sql = "0"
+        bucket_params = []
+        if boundaries:
+            cases = []
+            for bucket, boundary in enumerate(boundaries):
+                sql, params = _key_bound(key_columns, boundary, "<")
+                cases.append(f"WHEN {sql} THEN {bucket}")
+                bucket_params.extend(params)
+            bucket_sql = f"CASE {' '.join(cases)} ELSE {len(boundaries)} END"
+
+        hash_sql = "HASHBYTES('SHA2_256', r.row_data)"
+        if self._is_hash_input_capped():
+            hash_sql = (f"CASE WHEN DATALENGTH(r.row_data) > {HASHBYTES_MAX_INPUT_BYTES} THEN NULL "
+                        f"ELSE {hash_sql} END")
+
+        try:
+            # The sum is taken as decimal: a bigint sum of 64-bit values would overflow
+            rows = list(self._iter_rows(f"""
+                SELECT
+                    x.bucket,
+                    COUNT_BIG(*),
+                    SUM(CAST(CAST(SUBSTRING(x.row_hash, 1, 8) AS bigint) AS decimal(38, 0))),
+                    SUM(CASE WHEN x.row_hash IS NULL THEN 1 ELSE 0 END)
+                FROM (
+                    SELECT {bucket_sql} AS bucket, {hash_sql} AS row_hash
+                    FROM {_quote_table(table_name)} t
+                    CROSS APPLY (SELECT (SELECT t.* FOR XML RAW, BINARY BASE64) AS row_data) r
+                    WHERE {range_sql}
+                ) x
+                GROUP BY x.bucket
+            """, bucket_params + range_params))
+        except pyodbc.Error as e:
+            raise Exception(f"Error computing checksums for {table_name} ({keys}): {e}")
+
+        checksums = [(0, None, 0)] * (len(boundaries) + 1)
+        for bucket, count, hash_sum, unhashed in rows:
+            checksums[bucket] = (count, hash_sum, unhashed)
+        return checksums
+
+    def get_range_boundaries(self, table_name, key_columns, low, high, step):
+        """Keys of every `step`-th row (after the first) with low <= key < high, in key order."""
+        keys = ", ".join(_quote_identifier(column) for column in key_columns)
+        range_sql, range_params = _key_range(key_columns, low, high)
+        try:
+            return [tuple(row) for row in self._iter_rows(f"""
+                SELECT {keys}
+                FROM (
+                    SELECT {keys}, ROW_NUMBER() OVER (ORDER BY {keys}) AS rn
+                    FROM {_quote_table(table_name)}
+                    WHERE {range_sql}
+                ) x
+                WHERE x.rn > 1 AND (x.rn - 1) % ? = 0
+                ORDER BY x.rn
+            """, range_params + [step])]
+        except pyodbc.Error as e:
+            raise Exception(f"Error splitting {table_name}: {e}")
+
+    def iter_range_rows(self, table_name, key_columns, low, high, arraysize=FETCH_ARRAY_SIZE):
+        """Streams the full rows with low <= key < high, ordered by key."""
+        keys = ", ".join(_quote_identifier(column) for column in key_columns)
+        range_sql, range_params = _key_range(key_columns, low, high)
+        try:
+            for row in self._iter_rows(f"""
+                SELECT *
+                FROM {_quote_table(table_name)}
+                WHERE {range_sql}
+                ORDER BY {keys}
+            """, range_params, arraysize=arraysize):
+                yield tuple(row)
+        except pyodbc.Error as e:
+            raise Exception(f"Error fetching rows of {table_name}: {e}")
@@ -0,0 +1,183 @@
+import os
+import sqlite3
+from datetime import datetime
+
+from app.utils.database_connection_manager import ObjectFingerprint
+
+# Bumped whenever the tables change; older files are recreated (they are only a cache)
+SNAPSHOT_SCHEMA_VERSION = 2
+
+_IDENTITY_WHERE = "server = ? AND database_name = ? AND authentication = ? AND username = ?"
+_PAIR_WHERE = (
+    "source_server = ? AND source_database = ? AND source_authentication = ? AND source_username = ? "
+    "AND target_server = ? AND target_database = ? AND target_authentication = ? AND target_username = ?"
+)
+
+
+def default_snapshot_path():
+    """Default location of the snapshot file inside the user profile."""
+    base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    return os.path.join(base, 'SQLCompareApp', 'snapshots.sqlite')
+
+
+class SnapshotStore:
+    """
+    Persists, per connection identity (server, database, authentication,
+    username), the object fingerprints (name, type,
+    object_id, modify_date, hash) seen in the last comparison, so the next
+    run only needs to hash objects that were added or modified.
+
+    It also keeps, per source/target pair, the outcome of the last text
+    comparison of each mismatched object together with both hashes and the
+    signature of the comparison options (algorithm and ignore options), so a
+    pair whose definitions and options did not change is not downloaded and
+    diffed again.
+
+    Failures to read or write the file are ignored: the next run simply does
+    a full fetch.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_snapshot_path()
+
+    def load(self, identity):
+        """Returns {object name: ObjectFingerprint} for the connection `identity`."""
+        snapshot = {}
+        try:
+            connection = self._connect()
+            try:
+                rows = connection.execute(
+                    "SELECT object_name, object_type, object_id, modify_date, object_hash "
+                    "FROM object_snapshot WHERE " + _IDENTITY_WHERE,
+                    self._identity_key(identity)
+                )
+                for name, object_type, object_id, modify_date, object_hash in rows:
+                    snapshot[name] = ObjectFingerprint(
+                        name,
+                        object_type,
+                        datetime.fromisoformat(modify_date) if modify_date else None,
+                        object_hash,
+                        object_id
+                    )
+            finally:
+                connection.close()
+        except (OSError, sqlite3.Error, ValueError) as e:
+            print(f"Error loading snapshot: {e}")
+            return {}
+        return snapshot
+
+    def save(self, identity, fingerprints):
+        """Replaces the stored snapshot of the connection `identity` with `fingerprints`."""
+        key = self._identity_key(identity)
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute(
+                        "DELETE FROM object_snapshot WHERE " + _IDENTITY_WHERE, key
+                    )
+                    connection.executemany(
+                        "INSERT INTO object_snapshot (server, database_name, authentication, "
+                        "username, object_name, object_type, object_id, modify_date, object_hash) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            key + (fp.object_name, fp.object_type, fp.object_id,
+                             fp.last_modified_date.isoformat() if fp.last_modified_date else None,
+                             fp.object_hash)
+                            for fp in fingerprints
+                        )
+                    )
+            finally:
+                connection.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error saving snapshot: {e}")
+
+    def load_pair_results(self, source, target, options_signature):
+        """
+        Returns {object name: (source hash, target hash, has differences)} from
+        the last run between the `source` and `target` identities. Outcomes
+        stored under other comparison options are not returned.
+        """
+        results = {}
+        try:
+            connection = self._connect()
+            try:
+                rows = connection.execute(
+                    "SELECT object_name, source_hash, target_hash, has_differences FROM pair_result "
+                    "WHERE " + _PAIR_WHERE + " AND options_signature = ?",
+                    self._pair_key(source, target) + (options_signature,)
+                )
+                for name, source_hash, target_hash, has_differences in rows:
+                    results[name] = (source_hash, target_hash, bool(has_differences))
+            finally:
+                connection.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error loading pair results: {e}")
+            return {}
+        return results
+
+    def save_pair_results(self, source, target, options_signature, results):
+        """
+        Replaces the stored outcomes between `source` and `target` with
+        `results`, an iterable of (name, source hash, target hash, has differences)
+        obtained with the comparison options described by `options_signature`.
+        """
+        key = self._pair_key(source, target)
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute(
+                        "DELETE FROM pair_result WHERE " + _PAIR_WHERE, key
+                    )
+                    connection.executemany(
+                        "INSERT INTO pair_result (source_server, source_database, source_authentication, "
+                        "source_username, target_server, target_database, target_authentication, "
+                        "target_username, object_name, source_hash, target_hash, has_differences, "
+                        "options_signature) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key + (name, source_hash, target_hash, int(has_differences), options_signature)
+                         for name, source_hash, target_hash, has_differences in results)
+                    )
+            finally:
+                connection.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error saving pair results: {e}")
+
+    @staticmethod
+    def _identity_key(identity):
+        server, database, authentication, username = identity
+        return (server, database or "master", authentication or "", username or "")
+
+    @classmethod
+    def _pair_key(cls, source, target):
+        return cls._identity_key(source) + cls._identity_key(target)
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SNAPSHOT_SCHEMA_VERSION:
+            with connection:
+                connection.execute("DROP TABLE IF EXISTS object_snapshot")
+                connection.execute("DROP TABLE IF EXISTS pair_result")
+                connection.execute(
+                    "CREATE TABLE object_snapshot ("
+                    "server TEXT NOT NULL, database_name TEXT NOT NULL, "
+                    "authentication TEXT NOT NULL, username TEXT NOT NULL, object_name TEXT NOT NULL, "
+                    "object_type TEXT, object_id INTEGER, modify_date TEXT, object_hash BLOB, "
+                    "PRIMARY KEY (server, database_name, authentication, username, object_name))"
+                )
+                connection.execute(
+                    "CREATE TABLE pair_result ("
+                    "source_server TEXT NOT NULL, source_database TEXT NOT NULL, "
+                    "source_authentication TEXT NOT NULL, source_username TEXT NOT NULL, "
+                    "target_server TEXT NOT NULL, target_database TEXT NOT NULL, "
+                    "target_authentication TEXT NOT NULL, target_username TEXT NOT NULL, "
+                    "object_name TEXT NOT NULL, source_hash BLOB, target_hash BLOB, "
+                    "has_differences INTEGER NOT NULL, options_signature TEXT NOT NULL, "
+                    "PRIMARY KEY (source_server, source_database, source_authentication, source_username, "
+                    "target_server, target_database, target_authentication, target_username, object_name))"
+                )
+                connection.execute(f"PRAGMA user_version = {SNAPSHOT_SCHEMA_VERSION}")
+        return connection
@@ -0,0 +1,33 @@
+import os
+
+from app.core.batch_comparator import COMPARE_WORKERS_ENV, BatchComparator, resolve_workers
+
+
+def test_resolve_workers_reads_environment_and_caps_at_cpu_count(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    monkeypatch.delenv(COMPARE_WORKERS_ENV, raising=False)
+    assert resolve_workers() == 4
+
+    monkeypatch.setenv(COMPARE_WORKERS_ENV, "2")
+    assert resolve_workers() == 2
+    assert BatchComparator().max_workers == 2
+
+    monkeypatch.setenv(COMPARE_WORKERS_ENV, "64")
+    assert resolve_workers() == 4
+
+    monkeypatch.setenv(COMPARE_WORKERS_ENV, "many")
+    assert resolve_workers() == 4
+
+    assert resolve_workers(0) == 1
+    assert resolve_workers(3) == 3
+
+
+def test_batch_compare_returns_blocks_only_for_differences():
+    comparer = BatchComparator(max_workers=1, format_output=False)
+    results = list(comparer.iter_compare([
+        ("dbo.a", "SELECT 1", "SELECT 1"),
+        ("dbo.b", "SELECT 1", "SELECT 2"),
+    ]))
+    by_name = {result['name']: result for result in results}
+    assert by_name['dbo.a']['has_differences'] is False
+    assert by_name['dbo.b']['blocks'] == [('replace', 0, 1, 0, 1)]
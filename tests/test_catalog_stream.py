@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from app.core.catalog_stream import merge_join, prefetch
+
+
+def test_merge_join_pairs_by_key():
+    joined = list(merge_join([1, 3, 4], [2, 3], key=lambda x: x))
+    assert joined == [(1, None), (None, 2), (3, 3), (4, None)]
+
+
+def test_prefetch_reraises_producer_errors():
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    stream = prefetch(failing())
+    assert next(stream) == 1
+    with pytest.raises(ValueError):
+        next(stream)
+
+
+def test_prefetch_close_joins_producer_and_closes_source():
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                yield 1
+        finally:
+            closed.set()
+
+    stream = prefetch(endless(), buffer_size=2)
+    assert next(stream) == 1
+    stream.close()
+
+    assert closed.is_set()
+    with pytest.raises(StopIteration):
+        next(stream)
+
+
+def test_prefetch_stops_waiting_on_cancel():
+    release = threading.Event()
+    cancel_event = threading.Event()
+
+    def slow():
+        release.wait(5)
+        yield 1
+
+    stream = prefetch(slow(), cancel_event=cancel_event)
+    cancel_event.set()
+    release.set()
+    assert list(stream) == []
@@ -0,0 +1,71 @@
+from app.core.comparison_result import (
+    ACTION_ALTER, ACTION_CREATE, ComparisonEntry, ComparisonResult, make_result_key
+)
+from app.core.winmerge_comparator import WinMergeLikeComparator
+
+
+def _entry(name, object_type="Procedure", action=ACTION_ALTER, source="a", target="b", blocks=None):
+    return ComparisonEntry(name, object_type, action, "N/A", "N/A", source, target, blocks)
+
+
+def test_entries_are_indexed_by_key_action_and_type():
+    result = ComparisonResult()
+    key = result.add(_entry("dbo.p"))
+    result.add(_entry("sales.v", "View", ACTION_CREATE, target=None))
+
+    assert key == ("dbo", "p", "Procedure") == make_result_key("dbo.p", "Procedure")
+    assert result.get("dbo.p", "Procedure").source_body == "a"
+    assert result.get("dbo.p", "View") is None
+    assert result.get_by_key(("sales", "v", "View")).action == ACTION_CREATE
+    assert result.keys_by_action(ACTION_ALTER) == [key]
+    assert result.keys_by_type("View") == [("sales", "v", "View")]
+    assert (len(result), result.count(), result.count(ACTION_CREATE)) == (2, 2, 1)
+
+
+def test_adding_an_existing_key_replaces_it():
+    result = ComparisonResult()
+    result.add(_entry("dbo.p"))
+    result.add(_entry("dbo.p", action=ACTION_CREATE, source="new", target=None))
+
+    assert [entry.source_body for entry in result] == ["new"]
+    assert result.count(ACTION_ALTER) == 0
+    assert result.count(ACTION_CREATE) == 1
+
+
+def test_formatted_output_is_built_on_demand_and_cached():
+    comparator = WinMergeLikeComparator()
+    calls = []
+
+    def formatter(source, target, blocks):
+        calls.append(source)
+        return comparator.format_blocks(source, target, blocks)
+
+    result = ComparisonResult(formatter, formatted_cache_size=1)
+    for name in ("dbo.a", "dbo.b"):
+        source, target = f"SELECT 1 -- {name}", f"SELECT 2 -- {name}"
+        result.add(_entry(name, source=source, target=target,
+                          blocks=comparator.compare_blocks(source, target)))
+    result.add(_entry("dbo.plain", source="formatted", target="already"))
+
+    assert calls == []
+    first = result.get_formatted("dbo.a", "Procedure")
+    assert result.get_formatted("dbo.a", "Procedure") == first
+    assert len(calls) == 1
+
+    # Cache de uma posição: abrir outro objeto descarta a saída de dbo.a
+    result.get_formatted("dbo.b", "Procedure")
+    result.get_formatted("dbo.a", "Procedure")
+    assert len(calls) == 3
+
+    assert result.get_formatted("dbo.plain", "Procedure") == ("formatted", "already")
+    assert result.get_formatted("dbo.missing", "Procedure") is None
+
+
+def test_clear_drops_everything():
+    result = ComparisonResult()
+    result.add(_entry("dbo.p"))
+    result.clear()
+
+    assert len(result) == 0
+    assert result.keys_by_action(ACTION_ALTER) == []
+    assert result.keys_by_type("Procedure") == []
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+# app.utils importa os gerenciadores de conexão, que dependem do pyodbc e do keyring
+pytest.importorskip("pyodbc")
+pytest.importorskip("keyring")
+
+from app.utils.connection_pool import ConnectionPool  # noqa: E402
+
+
+class FakeConnection:
+    def __init__(self, on_close=None):
+        self.closed = False
+        self.on_close = on_close
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        if self.on_close:
+            self.on_close()
+        self.closed = True
+
+
+def test_expired_connections_are_closed_without_holding_the_lock():
+    pool = ConnectionPool(idle_timeout=0, health_check_after=60)
+    lock_free_during_close = []
+
+    def try_lock():
+        acquired = pool._condition.acquire(timeout=1)
+        lock_free_during_close.append(acquired)
+        if acquired:
+            pool._condition.release()
+
+    def on_close():
+        # Outra thread consegue usar o pool enquanto o close está em andamento
+        other = threading.Thread(target=try_lock)
+        other.start()
+        other.join(5)
+
+    stale = FakeConnection(on_close)
+    pool.release("key", stale)
+
+    fresh = FakeConnection()
+    assert pool.acquire("key", lambda: fresh) is fresh
+    assert stale.closed
+    assert lock_free_during_close == [True]
+
+
+def test_released_connection_is_reused():
+    pool = ConnectionPool()
+    connection = FakeConnection()
+    pool.release("key", connection)
+    assert pool.acquire("key", FakeConnection) is connection
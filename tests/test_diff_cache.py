@@ -0,0 +1,70 @@
+from app.core import diff_cache
+from app.core.diff_cache import DiffCache
+from app.core.winmerge_comparator import WinMergeLikeComparator
+
+
+def test_cache_round_trips_blocks(tmp_path):
+    cache = DiffCache(str(tmp_path / "cache.sqlite"))
+    blocks = [('equal', 0, 2, 0, 2), ('move_from', 2, 5, 2, 2), ('insert', 5, 5, 2, 4)]
+    key = DiffCache.make_key("a", "b", "default", True, ())
+    try:
+        assert cache.get(key) is None
+        cache.put(key, blocks)
+        assert cache.get(key) == blocks
+    finally:
+        cache.close()
+
+
+def test_cache_key_depends_on_options():
+    keys = {
+        DiffCache.make_key("a", "b", "default", True, ()),
+        DiffCache.make_key("a", "b", "minimal", True, ()),
+        DiffCache.make_key("a", "b", "default", False, ()),
+        DiffCache.make_key("a", "b", "default", True, (True,)),
+        DiffCache.make_key("b", "a", "default", True, ()),
+    }
+    assert len(keys) == 5
+
+
+def test_comparator_reuses_cached_blocks(tmp_path):
+    text1 = "SELECT 1\nFROM a\nWHERE x = 1"
+    text2 = "SELECT 1\nFROM b\nWHERE x = 1"
+    cache = DiffCache(str(tmp_path / "cache.sqlite"))
+    try:
+        expected = WinMergeLikeComparator(cache=cache).compare_blocks(text1, text2)
+
+        class CachedOnly(WinMergeLikeComparator):
+            def _diff_with_algorithm(self, lines1, lines2):
+                raise AssertionError("cache hit expected")
+
+        assert CachedOnly(cache=cache).compare_blocks(text1, text2) == expected
+    finally:
+        cache.close()
+
+
+def test_unusable_cache_path_does_not_break_comparison(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = DiffCache(str(blocker / "cache.sqlite"))
+    comparator = WinMergeLikeComparator(cache=cache)
+    assert comparator.compare_blocks("a", "b") == [('replace', 0, 1, 0, 1)]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(diff_cache, 'DIFF_CACHE_EVICT_EVERY', 2)
+    cache = DiffCache(str(tmp_path / "cache.sqlite"), max_bytes=400)
+    blocks = [('replace', 0, 1, 0, 1)]
+    keys = [DiffCache.make_key(str(n), "x", "default", True, ()) for n in range(6)]
+    try:
+        for key in keys:
+            cache.put(key, blocks)
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[-1]) == blocks
+    finally:
+        cache.close()
+
+
+def test_format_version_is_part_of_the_key(monkeypatch):
+    key = DiffCache.make_key("a", "b", "default", True, ())
+    monkeypatch.setattr(diff_cache, 'DIFF_CACHE_VERSION', diff_cache.DIFF_CACHE_VERSION + 1)
+    assert DiffCache.make_key("a", "b", "default", True, ()) != key
@@ -0,0 +1,126 @@
+import random
+import time
+
+import pytest
+
+from app.core import diff_engines
+from app.core.diff_engines import (
+    histogram_matches, intern_lines, myers_matches,
+    opcodes_from_matches, patience_matches
+)
+from app.core.winmerge_comparator import DiffAlgorithm, WinMergeLikeComparator
+
+
+ENGINES = {
+    'default': myers_matches,
+    'minimal': lambda a, b: myers_matches(a, b, minimal=True),
+    'histogram': histogram_matches,
+    'patience': patience_matches,
+}
+
+
+def _lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def _random_pair(rng):
+    alphabet = rng.randint(1, 8)
+    a = [rng.randrange(alphabet) for _ in range(rng.randint(0, 40))]
+    b = [rng.randrange(alphabet) for _ in range(rng.randint(0, 40))]
+    return a, b
+
+
+def _numbered(count):
+    return [f"SELECT {i} AS col{i};" for i in range(count)]
+
+
+def _moved_block_texts():
+    lines = _numbered(20000)
+    moved = lines[:5000] + lines[5300:15000] + lines[5000:5300] + lines[15000:]
+    return "\n".join(lines), "\n".join(moved)
+
+
+def test_default_detects_large_moved_block():
+    text1, text2 = _moved_block_texts()
+    comparator = WinMergeLikeComparator(DiffAlgorithm.DEFAULT)
+    comparator.compare_blocks(text1, text2)
+
+    blocks = comparator.get_diff_blocks()
+    assert len(blocks) == 5
+    assert [block.type for block in blocks if block.is_moved] == ['move_from', 'move_to']
+    assert comparator.get_statistics()['modified_lines'] == 0
+    assert comparator.similarity_ratio > 0.98
+
+
+def test_default_matches_minimal_on_large_moved_block():
+    text1, text2 = _moved_block_texts()
+    results = []
+    for algorithm in (DiffAlgorithm.DEFAULT, DiffAlgorithm.MINIMAL):
+        comparator = WinMergeLikeComparator(algorithm)
+        results.append(comparator.compare_blocks(text1, text2))
+    assert results[0] == results[1]
+
+
+def test_minimal_is_bounded_on_reversed_text():
+    lines = _numbered(20000)
+    seq1, seq2 = intern_lines(lines, lines[::-1])
+
+    start = time.perf_counter()
+    matches = myers_matches(seq1, seq2, minimal=True)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 10
+    assert sum(size for _, _, size in matches) == 1
+    assert matches == histogram_matches(seq1, seq2)
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_engine_opcodes_rebuild_target(engine):
+    rng = random.Random(engine)
+    for _ in range(500):
+        a, b = _random_pair(rng)
+        matches = ENGINES[engine](a, b)
+        for i, j, size in matches:
+            assert size > 0 and a[i:i + size] == b[j:j + size]
+
+        opcodes = opcodes_from_matches(matches, len(a), len(b))
+        rebuilt = []
+        position_a = position_b = 0
+        for tag, i1, i2, j1, j2 in opcodes:
+            assert (i1, j1) == (position_a, position_b)
+            assert tag in ('equal', 'replace', 'delete', 'insert')
+            assert (i1 < i2) == (tag != 'insert') and (j1 < j2) == (tag != 'delete')
+            rebuilt.extend(a[i1:i2] if tag == 'equal' else b[j1:j2])
+            position_a, position_b = i2, j2
+        assert (position_a, position_b) == (len(a), len(b))
+        assert rebuilt == b
+
+
+def test_capped_search_and_fallbacks_stay_valid(monkeypatch):
+    # Limites pequenos forçam a heurística da snake e o fallback para o histogram
+    monkeypatch.setattr(diff_engines, 'MYERS_MIN_COST', 2)
+    monkeypatch.setattr(diff_engines, 'MYERS_SNAKE_MIN', 2)
+    monkeypatch.setattr(diff_engines, 'MYERS_MINIMAL_MAX_COST', 3)
+    rng = random.Random(5)
+    for _ in range(1000):
+        a, b = _random_pair(rng)
+        for engine in ENGINES.values():
+            previous_a = previous_b = 0
+            for i, j, size in engine(a, b):
+                assert i >= previous_a and j >= previous_b
+                assert a[i:i + size] == b[j:j + size]
+                previous_a, previous_b = i + size, j + size
+
+
+def test_minimal_matches_lcs_length():
+    rng = random.Random(3)
+    for _ in range(500):
+        a, b = _random_pair(rng)
+        matches = myers_matches(a, b, minimal=True)
+        assert sum(size for _, _, size in matches) == _lcs_length(a, b)
@@ -0,0 +1,36 @@
+from app.core.comparison_result import ACTION_ALTER, ACTION_CREATE, ComparisonEntry
+from app.core.html_report import HtmlReportWriter
+from app.core.winmerge_comparator import WinMergeLikeComparator
+
+
+def test_write_uses_object_kind_and_totals(tmp_path):
+    path = tmp_path / "report.html"
+    totals = HtmlReportWriter().write(str(path), [
+        ("dbo.same", "SELECT 1", "SELECT 1"),
+        ("dbo.changed", "SELECT 1\nFROM a", "SELECT 2\nFROM a"),
+    ], object_kind="Table")
+
+    assert totals == {'compared': 2, 'different': 1, 'identical': 1}
+    report = path.read_text(encoding='utf-8')
+    assert '<th>Table</th><th>Modified</th>' in report
+    assert 'dbo.changed' in report and 'dbo.same' not in report
+
+
+def test_write_entries_reuses_diff_blocks(tmp_path):
+    source, target = "SELECT 1\nFROM a", "SELECT 2\nFROM a"
+    blocks = WinMergeLikeComparator().compare_blocks(source, target)
+
+    class NoDiffComparator(WinMergeLikeComparator):
+        def compare_blocks(self, text1, text2):
+            raise AssertionError("entries with diff_blocks must not be diffed again")
+
+    path = tmp_path / "report.html"
+    totals = HtmlReportWriter(NoDiffComparator()).write_entries(str(path), [
+        ComparisonEntry("dbo.p", "Procedure", ACTION_ALTER, "N/A", "N/A", source, target, blocks),
+        ComparisonEntry("dbo.new", "Procedure", ACTION_CREATE, "N/A", "N/A", source, None),
+    ])
+
+    assert totals == {'compared': 1, 'different': 1, 'identical': 0}
+    report = path.read_text(encoding='utf-8')
+    assert '<th>Type</th>' in report and '<td>Procedure</td>' in report
+    assert 'SELECT 2' in report
@@ -0,0 +1,23 @@
+from app.core.diff_engines import intraline_changes
+
+
+def test_intraline_changes_marks_changed_words():
+    left, right = intraline_changes("SELECT a, b FROM t", "SELECT a, c FROM t")
+    assert left == [(10, 11)]
+    assert right == [(10, 11)]
+
+
+def test_intraline_changes_for_appended_text():
+    left, right = intraline_changes("SELECT a FROM t", "SELECT a FROM t WHERE x = 1")
+    assert left == []
+    assert right == [(15, 27)]
+
+
+def test_intraline_changes_identical_lines():
+    assert intraline_changes("same", "same") == ([], [])
+
+
+def test_intraline_changes_long_lines_mark_middle_only():
+    left, right = intraline_changes("x " + "a " * 600 + "y", "x " + "b " * 600 + "y", max_tokens=100)
+    assert left == [(2, 1201)]
+    assert right == [(2, 1201)]
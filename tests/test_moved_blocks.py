@@ -0,0 +1,37 @@
+from app.core.diff_engines import find_moved_runs
+from app.core.winmerge_comparator import WinMergeLikeComparator
+
+LEFT = "\n".join(["h", "m1", "m2", "m3", "o1", "b1", "b2", "b3", "b4", "b5", "t"])
+RIGHT = "\n".join(["h", "n1", "b1", "b2", "b3", "b4", "b5", "m1", "m2", "m3", "t"])
+
+
+def test_find_moved_runs_skips_trivial_windows():
+    a = [1, 2, 3, 4, 0, 0, 0]
+    b = [9, 0, 0, 0, 1, 2, 3, 4]
+    moves = find_moved_runs(a, [(0, 7)], b, [(0, 8)], 3, trivial_ids={0})
+    assert moves == [(0, 4, 4)]
+
+
+def test_find_moved_runs_ignores_runs_shorter_than_minimum():
+    assert find_moved_runs([1, 2], [(0, 2)], [1, 2], [(0, 2)], 3) == []
+
+
+def test_moved_lines_split_from_replace_keep_the_rest_paired():
+    comparator = WinMergeLikeComparator()
+    blocks = comparator.compare_blocks(LEFT, RIGHT)
+
+    assert blocks == [
+        ('equal', 0, 1, 0, 1),
+        ('move_from', 1, 4, 1, 1),
+        ('replace', 4, 5, 1, 2),
+        ('equal', 5, 10, 2, 7),
+        ('move_to', 10, 10, 7, 10),
+        ('equal', 10, 11, 10, 11),
+    ]
+    assert comparator.get_statistics()['moved_lines'] == 3
+
+
+def test_moved_block_detection_can_be_disabled():
+    comparator = WinMergeLikeComparator(detect_moved_blocks=False)
+    comparator.compare_blocks(LEFT, RIGHT)
+    assert not any(block.is_moved for block in comparator.get_diff_blocks())
@@ -0,0 +1,56 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+# app.utils importa os gerenciadores de conexão, que dependem do pyodbc e do keyring
+pytest.importorskip("pyodbc")
+pytest.importorskip("keyring")
+
+from app.utils.database_connection_manager import ObjectFingerprint  # noqa: E402
+from app.utils.snapshot_store import SnapshotStore  # noqa: E402
+
+SQL_LOGIN = ("srv", "db", "SQL Server Authentication", "reader")
+OTHER_LOGIN = ("srv", "db", "SQL Server Authentication", "admin")
+TARGET = ("srv2", None, "Windows Authentication", None)
+
+
+def _fingerprint(name):
+    return ObjectFingerprint(name, "Procedure", datetime(2024, 1, 2, 3, 4, 5), b"\x01\x02", 7)
+
+
+def test_snapshot_round_trip_is_kept_per_login(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    store.save(SQL_LOGIN, [_fingerprint("dbo.a")])
+    store.save(OTHER_LOGIN, [_fingerprint("dbo.b")])
+
+    assert store.load(SQL_LOGIN) == {"dbo.a": _fingerprint("dbo.a")}
+    assert list(store.load(OTHER_LOGIN)) == ["dbo.b"]
+
+    store.save(SQL_LOGIN, [])
+    assert store.load(SQL_LOGIN) == {}
+    assert list(store.load(OTHER_LOGIN)) == ["dbo.b"]
+
+
+def test_pair_results_are_reused_only_with_the_same_options(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    store.save_pair_results(SQL_LOGIN, TARGET, "options-a", [("dbo.p", b"s", b"t", True)])
+
+    assert store.load_pair_results(SQL_LOGIN, TARGET, "options-a") == {"dbo.p": (b"s", b"t", True)}
+    assert store.load_pair_results(SQL_LOGIN, TARGET, "options-b") == {}
+    assert store.load_pair_results(OTHER_LOGIN, TARGET, "options-a") == {}
+    # O database vazio é tratado como master
+    assert store.load_pair_results(SQL_LOGIN, ("srv2", "master", "Windows Authentication", ""),
+                                   "options-a") == {"dbo.p": (b"s", b"t", True)}
+
+
+def test_old_schema_is_recreated(tmp_path):
+    path = tmp_path / "snapshots.sqlite"
+    connection = sqlite3.connect(str(path))
+    connection.execute("CREATE TABLE object_snapshot (server TEXT, database_name TEXT, object_name TEXT)")
+    connection.commit()
+    connection.close()
+
+    store = SnapshotStore(str(path))
+    store.save(SQL_LOGIN, [_fingerprint("dbo.a")])
+    assert list(store.load(SQL_LOGIN)) == ["dbo.a"]
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+from app.core.table_comparator import TableSchemaComparator
+
+
+# Registros com os mesmos campos de DatabaseConnectionManager.get_tables_schema
+def _column(table, name, column_id, type_name='int', max_length=4, is_nullable=False, default=None):
+    return SimpleNamespace(
+        table_name=table, column_name=name, column_id=column_id, type_name=type_name,
+        max_length=max_length, precision=0, scale=0, is_nullable=is_nullable, is_identity=False,
+        default_definition=default, collation_name=None, computed_definition=None
+    )
+
+
+def _primary_key(table, name, columns, is_system_named=True):
+    return SimpleNamespace(
+        table_name=table, index_name=name, is_system_named=is_system_named, index_type='CLUSTERED',
+        is_unique=True, is_primary_key=True, is_unique_constraint=False, filter_definition=None,
+        key_columns=tuple((column, False) for column in columns), included_columns=()
+    )
+
+
+def _check(table, name, definition, is_system_named=False):
+    return SimpleNamespace(table_name=table, constraint_name=name, is_system_named=is_system_named,
+                           definition=definition, is_disabled=False)
+
+
+def _schema(tables, columns=(), indexes=(), checks=()):
+    return SimpleNamespace(
+        tables=[SimpleNamespace(table_name=name, object_id=i, last_modified_date=None)
+                for i, name in enumerate(tables)],
+        columns=list(columns), indexes=list(indexes), foreign_keys=[], check_constraints=list(checks)
+    )
+
+
+def test_identical_tables_report_nothing():
+    columns = [_column('dbo.t', 'id', 1), _column('dbo.t', 'name', 2, 'nvarchar', 100, True)]
+    source = _schema(['dbo.t'], columns, [_primary_key('dbo.t', 'PK__t__1', ['id'])])
+    target = _schema(['dbo.t'], columns, [_primary_key('dbo.t', 'PK__t__2', ['id'])])
+
+    # A PK com nome gerado pelo sistema é casada pela estrutura, não pelo nome
+    assert TableSchemaComparator().compare(source, target) == []
+
+
+def test_column_changes_are_classified():
+    source = _schema(['dbo.t'], [
+        _column('dbo.t', 'id', 1),
+        _column('dbo.t', 'name', 2, 'nvarchar', 100),
+        _column('dbo.t', 'created', 3, 'datetime', 8),
+    ])
+    target = _schema(['dbo.t'], [
+        _column('dbo.t', 'id', 1),
+        _column('dbo.t', 'name', 2, 'nvarchar', 200),
+        _column('dbo.t', 'legacy', 3, default='((0))'),
+    ])
+
+    [comparison] = TableSchemaComparator().compare(source, target)
+
+    assert comparison.status == 'altered'
+    assert [(c.kind, c.change, c.item_name) for c in comparison.changes] == [
+        ('column', 'altered', 'name'),
+        ('column', 'added', 'created'),
+        ('column', 'dropped', 'legacy'),
+    ]
+    assert comparison.changes[0].source_definition == "COLUMN [name] nvarchar(50) NOT NULL"
+    assert comparison.source_body.split("\n") == [
+        "  COLUMN [id] int NOT NULL",
+        "~ COLUMN [name] nvarchar(50) NOT NULL",
+        "- COLUMN [created] datetime NOT NULL",
+        "",
+    ]
+    assert comparison.target_body.split("\n")[-1] == "+ COLUMN [legacy] int NOT NULL DEFAULT ((0))"
+
+
+def test_named_constraints_are_matched_by_name():
+    source = _schema(['dbo.t'], [_column('dbo.t', 'id', 1)],
+                     checks=[_check('dbo.t', 'CK_t_id', '([id]>(0))')])
+    target = _schema(['dbo.t'], [_column('dbo.t', 'id', 1)],
+                     checks=[_check('dbo.t', 'CK_t_id', '([id]>(1))')])
+
+    [comparison] = TableSchemaComparator().compare(source, target)
+
+    assert [(c.kind, c.change, c.item_name) for c in comparison.changes] == [('check', 'altered', 'CK_t_id')]
+
+
+def test_missing_tables_are_listed_and_target_only_tables_ignored():
+    source = _schema(['dbo.b', 'dbo.a'], [_column('dbo.a', 'id', 1), _column('dbo.b', 'id', 1)])
+    target = _schema(['dbo.b', 'dbo.extra'], [_column('dbo.b', 'id', 1), _column('dbo.extra', 'id', 1)])
+
+    [comparison] = TableSchemaComparator().compare(source, target)
+
+    assert (comparison.table_name, comparison.status) == ('dbo.a', 'missing')
+    assert comparison.source_body == "COLUMN [id] int NOT NULL"
+    assert comparison.target_body is None
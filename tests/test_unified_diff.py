@@ -0,0 +1,92 @@
+import random
+import re
+
+from app.core.winmerge_comparator import WinMergeLikeComparator
+
+_HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@$')
+
+
+def _apply_patch(text, diff):
+    """Aplica um diff unificado exigindo que contexto e remoções batam exatamente."""
+    old = text.splitlines()
+    result = []
+    position = 0
+    lines = diff.splitlines()
+    assert lines[0].startswith('--- ') and lines[1].startswith('+++ ')
+    index = 2
+    while index < len(lines):
+        match = _HUNK_RE.match(lines[index])
+        assert match, lines[index]
+        start1, count1, start2, count2 = (
+            int(value) if value is not None else 1 for value in match.groups()
+        )
+        index += 1
+        # Hunk vazio em um dos lados aponta para a linha anterior
+        hunk_start = start1 - 1 if count1 else start1
+        assert hunk_start >= position
+        result.extend(old[position:hunk_start])
+        assert (start2 - 1 if count2 else start2) == len(result)
+        position = hunk_start
+
+        seen1 = seen2 = 0
+        while seen1 < count1 or seen2 < count2:
+            marker, line = lines[index][0], lines[index][1:]
+            index += 1
+            if marker in ' -':
+                assert old[position] == line
+                position += 1
+                seen1 += 1
+            if marker in ' +':
+                result.append(line)
+                seen2 += 1
+        assert (seen1, seen2) == (count1, count2)
+
+    result.extend(old[position:])
+    return '\n'.join(result)
+
+
+def _random_text(rng, count):
+    choices = ['BEGIN', 'END', '', '   ', '-- comment', 'GO']
+    lines = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            lines.append(rng.choice(choices))
+        else:
+            lines.append(f'SELECT {rng.randint(0, 30)}')
+    return '\n'.join(lines)
+
+
+def test_hunk_ranges_cover_ignored_lines():
+    comparator = WinMergeLikeComparator()
+    comparator.set_ignore_options(ignore_blank_lines=True)
+    diff = comparator.generate_unified_diff("a\n\n\nb\nc\nd", "a\nb\nX\nd")
+
+    assert diff.splitlines()[2] == '@@ -2,5 +2,5 @@'
+    assert _apply_patch("a\n\n\nb\nc\nd", diff) == "a\n\n\nb\nX\nd"
+
+
+def test_unified_diff_round_trip_without_ignore_options():
+    rng = random.Random(7)
+    comparator = WinMergeLikeComparator()
+    for _ in range(200):
+        text1 = _random_text(rng, rng.randint(0, 40))
+        text2 = _random_text(rng, rng.randint(0, 40))
+        diff = comparator.generate_unified_diff(text1, text2, context=rng.randint(0, 3))
+        patched = _apply_patch(text1, diff) if diff else text1
+        assert patched.splitlines() == text2.splitlines()
+
+
+def test_unified_diff_round_trip_with_ignore_options():
+    rng = random.Random(11)
+    comparator = WinMergeLikeComparator()
+    comparator.set_ignore_options(ignore_blank_lines=True, ignore_whitespace=True,
+                                  ignore_regex_patterns=[r'--'])
+    for _ in range(200):
+        text1 = _random_text(rng, rng.randint(0, 40))
+        text2 = _random_text(rng, rng.randint(0, 40))
+        diff = comparator.generate_unified_diff(text1, text2, context=rng.randint(0, 3))
+        patched = _apply_patch(text1, diff) if diff else text1
+
+        # O resultado só pode diferir do texto da direita em linhas ignoradas
+        comparator.compare_blocks(patched, text2)
+        assert not comparator.has_differences()
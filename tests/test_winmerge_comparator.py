@@ -0,0 +1,48 @@
+from app.core.winmerge_comparator import IgnoreOptions, LineView, WinMergeLikeComparator
+
+
+def test_line_view_compares_equal_to_sequences():
+    view = LineView(['a', 'b', 'c', 'd'], 1, 3)
+    assert view == ['b', 'c']
+    assert ['b', 'c'] == view
+    assert view == ('b', 'c')
+    assert view == LineView(['x', 'b', 'c'], 1, 3)
+    assert view != ['b']
+    assert view != 'bc'
+
+
+def test_diff_block_lines_compare_with_lists():
+    comparator = WinMergeLikeComparator()
+    comparator.compare_blocks("a\nb\nc", "a\nx\nc")
+    changed = [block for block in comparator.get_diff_blocks() if block.type != 'equal']
+    assert [(block.left_lines, block.right_lines) for block in changed] == [(['b'], ['x'])]
+
+
+def test_ignore_patterns_with_backreferences_keep_their_groups():
+    options = IgnoreOptions()
+    options.ignore_regex_patterns = [r'(--|#)', r"(['\"]).*\1$"]
+    assert options.should_ignore_line("-- comment")
+    assert options.should_ignore_line("# comment")
+    assert options.should_ignore_line("'quoted'")
+    assert not options.should_ignore_line("'mismatched\"")
+    assert not options.should_ignore_line("SELECT 1")
+
+
+def test_ignore_options_recompile_when_changed():
+    options = IgnoreOptions()
+    assert options.preprocess_line("  Select   1 ") == "  Select   1 "
+
+    options.ignore_whitespace = True
+    options.ignore_case = True
+    assert options.preprocess_line("  Select   1 ") == "select 1"
+
+    options.ignore_blank_lines = True
+    assert options.preprocess_line("   ") is None
+
+
+def test_ignore_options_apply_to_comparison():
+    comparator = WinMergeLikeComparator()
+    comparator.set_ignore_options(ignore_case=True, ignore_blank_lines=True,
+                                  ignore_regex_patterns=[r'\s*--'])
+    comparator.compare_blocks("SELECT 1\n\n-- old\nFROM t", "select 1\n-- new\nFROM T")
+    assert not comparator.has_differences()